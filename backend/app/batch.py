@@ -0,0 +1,172 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 無界面批次會議執行器
+
+從 JSONL 檔案讀取多個 ConferenceConfig，不經過 WebSocket、關閉所有顯示用的停頓，
+以指定的並行度同時執行，並將每場會議的完整記錄寫成 JSONL。
+
+用法 (在 backend 目錄下執行):
+    python -m app.batch conferences.jsonl -o transcripts.jsonl -p 8
+    python -m app.batch conferences.jsonl --provider mock   # 不連網離線執行
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from app import llm
+from app.bus import get_bus
+from app.config import ORCHESTRATION_CONFIG, STREAMING_CONFIG
+from app.llm.providers import PROVIDER_NAMES
+from app.main import (
+    ConferenceConfig,
+    active_conferences,
+    conference_contexts,
+    conference_controls,
+    conference_events,
+    conference_plans,
+    conference_spectators,
+    conference_summarizers,
+    configure_logging,
+    connected_clients,
+    create_conference,
+    start_orchestrator
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_configs(path: str) -> List[Tuple[int, Optional[ConferenceConfig], Optional[str]]]:
+    """讀取 JSONL，返回 (行號, 配置, 錯誤訊息) 列表；空行與 # 開頭的行會被略過"""
+    configs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                configs.append((line_no, ConferenceConfig(**json.loads(line)), None))
+            except (json.JSONDecodeError, ValidationError, TypeError) as e:
+                configs.append((line_no, None, f"第 {line_no} 行配置無效: {str(e)[:200]}"))
+    return configs
+
+
+async def run_one(line_no: int, config: ConferenceConfig) -> Dict[str, Any]:
+    """執行單場會議並返回其記錄"""
+    conference_id = create_conference(config, pacing=False)
+    started = time.monotonic()
+    try:
+        runner = start_orchestrator(conference_id)
+        if runner is None:
+            raise RuntimeError(f"會議 {conference_id} 已結束，無法啟動")
+        await runner
+        conference = active_conferences[conference_id]
+        return {
+            "line": line_no,
+            "conference_id": conference_id,
+            "topic": conference["topic"],
+            "scenario": conference["scenario"],
+            "rounds": conference["rounds"],
+            "stage": conference["stage"],
+            "start_time": conference["start_time"],
+            "duration": round(time.monotonic() - started, 3),
+            "messages": conference["messages"]
+        }
+    finally:
+        # 批次執行不保留會議狀態，避免記憶體隨批次大小成長
+        active_conferences.pop(conference_id, None)
+        connected_clients.pop(conference_id, None)
+        conference_contexts.pop(conference_id, None)
+        conference_plans.pop(conference_id, None)
+        conference_controls.pop(conference_id, None)
+        conference_events.pop(conference_id, None)
+        conference_summarizers.pop(conference_id, None)
+        conference_spectators.pop(conference_id, None)
+        get_bus().discard(conference_id)
+
+
+async def run_batch(configs: List[Tuple[int, Optional[ConferenceConfig], Optional[str]]],
+                    output: TextIO, parallelism: int) -> Dict[str, Any]:
+    """以指定並行度執行所有會議，每完成一場就寫出一行 JSON"""
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+    summary = {"total": len(configs), "succeeded": 0, "failed": 0}
+    started = time.monotonic()
+
+    def write(record: Dict[str, Any]):
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+
+    async def worker(line_no: int, config: Optional[ConferenceConfig], error: Optional[str]):
+        if config is None:
+            summary["failed"] += 1
+            write({"line": line_no, "error": error})
+            return
+        async with semaphore:
+            try:
+                record = await run_one(line_no, config)
+                summary["succeeded"] += 1
+            except Exception as e:
+                logger.exception(f"第 {line_no} 行會議執行失敗")
+                summary["failed"] += 1
+                record = {"line": line_no, "topic": config.topic, "error": str(e)[:200]}
+            write(record)
+            print(f"[{summary['succeeded'] + summary['failed']}/{summary['total']}] 第 {line_no} 行: {config.topic}", file=sys.stderr)
+
+    await asyncio.gather(*(worker(*item) for item in configs))
+
+    elapsed = time.monotonic() - started
+    summary["elapsed"] = round(elapsed, 3)
+    summary["conferences_per_hour"] = round(summary["succeeded"] * 3600 / elapsed, 1) if elapsed > 0 else 0.0
+    summary["scheduler"] = llm.scheduler.get_stats()
+    summary["cache"] = {"exact": llm.response_cache.get_stats(), "introductions": llm.introduction_cache.get_stats()}
+    summary["usage"] = llm.usage_stats.get_stats()
+    await llm.close_async_client()
+    return summary
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description="批次執行會議並輸出 JSONL 會議記錄")
+    parser.add_argument("input", help="每行一個 ConferenceConfig 的 JSONL 檔案")
+    parser.add_argument("-o", "--output", help="輸出 JSONL 路徑 (預設為標準輸出)")
+    parser.add_argument("-p", "--parallelism", type=int, default=4, help="同時執行的會議數 (預設 4)")
+    parser.add_argument("--provider", choices=PROVIDER_NAMES, help="LLM 供應商 (預設依 LLM_PROVIDER)")
+    parser.add_argument("--sequential-discussion", action="store_true", help="停用管線化討論，逐一生成發言")
+    parser.add_argument("--log-level", default="WARNING", help="日誌級別 (預設 WARNING)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    configure_logging(args.log_level.upper())
+
+    if args.provider:
+        llm.set_provider(args.provider)
+
+    # 沒有觀眾：不串流，盡量讓生成重疊
+    STREAMING_CONFIG["enabled"] = False
+    ORCHESTRATION_CONFIG["concurrent_introductions"] = True
+    ORCHESTRATION_CONFIG["pipelined_discussion"] = not args.sequential_discussion
+
+    configs = load_configs(args.input)
+    print(f"{datetime.now().isoformat()} 開始批次執行 {len(configs)} 場會議，並行度 {args.parallelism}，供應商 {llm.get_provider().name}", file=sys.stderr)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = asyncio.run(run_batch(configs, output, args.parallelism))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+會議匯流排
+
+讓多個工作程序共享會議：執行會議的工作程序發布事件與狀態快照，
+其他工作程序上的客戶端透過訂閱收到同一場會議的事件。
+
+- memory: 程序內匯流排 (預設，單一工作程序)
+- socket: 透過 Unix socket 代理程序 (python -m app.bus.broker) 跨程序共享，
+  用於 uvicorn --workers N 或多個容器
+"""
+
+import logging
+import os
+from typing import Optional, Union
+
+from app.config import BUS_CONFIG
+from .base import BusError, ConferenceBus, ConferenceState
+from .memory import MemoryBus, MemoryHub
+from .socket_bus import SocketBus
+
+logger = logging.getLogger(__name__)
+
+# 可用的匯流排名稱
+BUS_NAMES = ["memory", "socket"]
+
+
+def create_bus(name: str) -> ConferenceBus:
+    if name == "memory":
+        return MemoryBus()
+    if name == "socket":
+        return SocketBus(os.getenv("CONFERENCE_BUS_PATH") or BUS_CONFIG["socket_path"])
+    raise ValueError(f"未知的會議匯流排: {name}")
+
+
+_bus: Optional[ConferenceBus] = None
+
+
+def get_bus() -> ConferenceBus:
+    """取得目前使用的匯流排 (第一次使用時依環境變數 CONFERENCE_BUS 或配置建立)"""
+    global _bus
+    if _bus is None:
+        _bus = create_bus(os.getenv("CONFERENCE_BUS") or BUS_CONFIG["backend"])
+    return _bus
+
+
+def set_bus(bus: Union[str, ConferenceBus]):
+    """切換目前使用的匯流排 (名稱或匯流排實例)，須在匯流排啟動前呼叫"""
+    global _bus
+    _bus = create_bus(bus) if isinstance(bus, str) else bus
+    logger.info(f"會議匯流排已切換為: {_bus.name}")
+
+
+__all__ = [
+    "BusError",
+    "ConferenceBus",
+    "ConferenceState",
+    "MemoryBus",
+    "MemoryHub",
+    "SocketBus",
+    "BUS_NAMES",
+    "create_bus",
+    "get_bus",
+    "set_bus"
+]
@@ -0,0 +1,225 @@
+"""
+會議匯流排介面
+
+執行會議的工作程序 (擁有者) 把每則廣播事件與最新的會議狀態發布到匯流排；
+其他工作程序上的客戶端連接某場會議時向匯流排訂閱，
+取得目前狀態後持續收到之後的事件，轉送給自己的客戶端。
+
+每場會議只由一個工作程序執行：新會議依成員名單的一致性雜湊環決定擁有者，
+其他工作程序收到的建立請求與控制指令透過匯流排轉交給擁有者。
+擁有者離線後，它的會議成為孤兒，由雜湊環上的新擁有者向匯流排認領並從狀態快照接手執行。
+"""
+
+import json
+import logging
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.config import BUS_CONFIG
+from app.connections import Frame
+from .ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+
+class BusError(Exception):
+    """匯流排無法使用 (例如代理程序未啟動或請求逾時)"""
+
+
+class ConferenceState:
+    """
+    匯流排上保存的會議狀態快照；owner 為執行會議的工作程序
+    seq 為會議最後一則事件的序號：快照之後的事件只有不改變狀態的增量文字，快照即為該序號時的狀態
+    跨程序收到的快照分為會議消息以外的狀態欄位 (head) 與逐則編碼的消息，之後以 apply 附加新的消息
+    """
+
+    __slots__ = ("conference_id", "seq", "owner", "_data", "_head", "_messages")
+
+    def __init__(self, conference_id: str, seq: int, owner: str, data: Optional[Dict[str, Any]] = None,
+                 head: Optional[bytes] = None, messages: Sequence[bytes] = ()):
+        self.conference_id = conference_id
+        self.seq = seq
+        self.owner = owner
+        self._data = data
+        self._head = head
+        self._messages = list(messages)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """會議狀態 (跨程序收到的快照在第一次讀取時才解碼)"""
+        if self._data is None:
+            self._data = json.loads(self._head)
+            self._data["messages"] = [json.loads(message) for message in self._messages]
+            self._messages = []
+        return self._data
+
+    @property
+    def message_count(self) -> int:
+        if self._data is not None:
+            return len(self._data.get("messages", []))
+        return len(self._messages)
+
+    def apply(self, seq: int, owner: str, head: bytes, messages: Sequence[bytes], offset: int) -> bool:
+        """
+        套用擁有者發布的增量：新的狀態欄位，以及從第 offset 則起新增的消息 (offset 為 0 時取代全部消息)
+        與已有的消息不連續時不套用並返回 False
+        """
+        if offset not in (0, self.message_count):
+            return False
+        self.seq = seq
+        self.owner = owner
+        if self._data is None:
+            self._head = head
+            if offset == 0:
+                self._messages = []
+            self._messages.extend(messages)
+        else:
+            kept = self._data.get("messages", []) if offset else []
+            kept.extend(json.loads(message) for message in messages)
+            self._data = json.loads(head)
+            self._data["messages"] = kept
+        return True
+
+
+# 收到其他工作程序的事件：(會議ID, 事件幀或 None, 新的狀態快照或 None)
+EventHandler = Callable[[str, Optional[Frame], Optional[ConferenceState]], None]
+# 會議已由擁有者結束：(會議ID)
+EndHandler = Callable[[str], None]
+# 其他工作程序的請求：(請求種類, 內容) -> 回覆內容
+CallHandler = Callable[[str, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+# 成員變動後失去擁有者的會議：(會議ID 列表)
+OrphanHandler = Callable[[List[str]], None]
+# 本工作程序已不再擁有會議 (已由其他工作程序認領)：(會議ID)
+FencedHandler = Callable[[str], None]
+
+
+def default_worker_id() -> str:
+    """工作程序識別碼：主機名稱、程序編號與隨機後綴"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class ConferenceBus(ABC):
+    """會議匯流排基底類別"""
+
+    name = "base"
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or default_worker_id()
+        self._on_event: Optional[EventHandler] = None
+        self._on_end: Optional[EndHandler] = None
+        self._on_call: Optional[CallHandler] = None
+        self._on_orphans: Optional[OrphanHandler] = None
+        self._on_fenced: Optional[FencedHandler] = None
+        self._set_members([self.worker_id])
+
+    def set_handlers(self, on_event: EventHandler, on_end: EndHandler, on_call: Optional[CallHandler] = None,
+                     on_orphans: Optional[OrphanHandler] = None, on_fenced: Optional[FencedHandler] = None):
+        """設定收到事件、結束通知、其他工作程序的請求、孤兒會議與失去擁有權時的處理函數"""
+        self._on_event = on_event
+        self._on_end = on_end
+        self._on_call = on_call
+        self._on_orphans = on_orphans
+        self._on_fenced = on_fenced
+
+    def _set_members(self, workers: Iterable[str]):
+        self.members: List[str] = sorted(set(workers))
+        self._ring = HashRing(self.members, BUS_CONFIG["ring_replicas"])
+
+    def owner_for(self, conference_id: str) -> str:
+        """依目前的成員名單決定新會議 (或孤兒會議) 的擁有者"""
+        return self._ring.owner(conference_id) or self.worker_id
+
+    def _deliver_event(self, conference_id: str, frame: Optional[Frame], state: Optional[ConferenceState]):
+        if self._on_event:
+            try:
+                self._on_event(conference_id, frame, state)
+            except Exception as e:
+                logger.error(f"處理會議 {conference_id} 的匯流排事件時出錯: {str(e)}")
+
+    def _deliver_end(self, conference_id: str):
+        if self._on_end:
+            try:
+                self._on_end(conference_id)
+            except Exception as e:
+                logger.error(f"處理會議 {conference_id} 的結束通知時出錯: {str(e)}")
+
+    async def _handle_call(self, kind: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self._on_call:
+            raise BusError(f"工作程序 {self.worker_id} 無法處理請求: {kind}")
+        return await self._on_call(kind, payload)
+
+    async def _handle_send(self, kind: str, payload: Dict[str, Any]):
+        """處理不需回覆的請求，錯誤只記錄"""
+        try:
+            await self._handle_call(kind, payload)
+        except Exception as e:
+            logger.error(f"處理請求 {kind} 時出錯: {str(e)}")
+
+    def _deliver_orphans(self, conference_ids: List[str]):
+        if self._on_orphans and conference_ids:
+            try:
+                self._on_orphans(conference_ids)
+            except Exception as e:
+                logger.error(f"處理孤兒會議時出錯: {str(e)}")
+
+    def _deliver_fenced(self, conference_id: str):
+        if self._on_fenced:
+            try:
+                self._on_fenced(conference_id)
+            except Exception as e:
+                logger.error(f"處理會議 {conference_id} 的擁有權變更時出錯: {str(e)}")
+
+    async def start(self):
+        """開始運作 (連接代理程序等)"""
+        return None
+
+    async def stop(self):
+        """停止運作並釋放資源"""
+        return None
+
+    @abstractmethod
+    def publish(self, conference_id: str, frame: Frame, state: Optional[Dict[str, Any]] = None):
+        """
+        發布已編上序號的事件給其他工作程序上的訂閱者，不等待送出，快照序號隨之更新
+        state 不為 None 時同時以它更新會議狀態快照 (增量文字以外的事件都應附上)；
+        會議消息只會附加，實作可只傳送上次發布之後新增的消息
+        """
+
+    @abstractmethod
+    def put_state(self, conference_id: str, state: Dict[str, Any], seq: int):
+        """只更新會議狀態快照 (例如會議剛建立、尚無事件時)"""
+
+    @abstractmethod
+    async def fetch(self, conference_id: str) -> Optional[ConferenceState]:
+        """取得會議狀態快照，會議不存在時返回 None"""
+
+    @abstractmethod
+    async def subscribe(self, conference_id: str) -> Optional[ConferenceState]:
+        """訂閱會議事件並返回目前的狀態快照；之後收到的事件都在快照之後"""
+
+    @abstractmethod
+    def unsubscribe(self, conference_id: str):
+        """取消訂閱會議事件"""
+
+    @abstractmethod
+    def end(self, conference_id: str):
+        """通知訂閱者會議已結束，各工作程序關閉該會議的客戶端連接"""
+
+    @abstractmethod
+    def discard(self, conference_id: str):
+        """移除會議狀態快照 (並通知訂閱者會議已結束)"""
+
+    @abstractmethod
+    async def call(self, worker_id: str, kind: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """請指定的工作程序處理請求並等待回覆；無法送達或處理失敗時引發 BusError"""
+
+    @abstractmethod
+    def send(self, worker_id: str, kind: str, payload: Dict[str, Any]):
+        """請指定的工作程序處理請求，不等待回覆"""
+
+    @abstractmethod
+    async def claim(self, conference_id: str) -> Optional[ConferenceState]:
+        """認領擁有者已離線的會議，成功時返回最新的狀態快照 (其他工作程序已認領時返回 None)"""
@@ -0,0 +1,188 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 會議匯流排代理程序
+
+多工作程序部署 (uvicorn --workers N 或多個容器共用一個 socket 目錄) 時，
+各工作程序以 CONFERENCE_BUS=socket 連接本代理程序：
+代理程序保存各會議最新的狀態快照，並把事件轉送給訂閱該會議的其他工作程序。
+代理程序只解析消息標頭，事件與狀態內容原樣轉送；
+狀態快照由會議消息以外的狀態欄位與逐則編碼的消息組成，擁有者每次只發送新增的消息，代理程序附加到已有的快照。
+
+代理程序也是會議擁有權的唯一裁定者：快照記錄每場會議的擁有者，
+只接受擁有者發布的事件 (其他工作程序收到 fenced 後停止執行該會議)；
+工作程序離線時通知其餘成員新的成員名單與失去擁有者的會議，由第一個認領 (claim) 的工作程序接手。
+
+用法:
+    python -m app.bus.broker [--path /tmp/flypig-bus.sock]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import BUS_CONFIG
+from .protocol import pack, read_message, split_payload
+
+logger = logging.getLogger(__name__)
+
+
+class Peer:
+    """一個已連接的工作程序"""
+
+    def __init__(self, writer: asyncio.StreamWriter, max_buffer: int):
+        self.writer = writer
+        self.max_buffer = max_buffer
+        self.worker = "unknown"
+        self.subscriptions: Set[str] = set()
+
+    def send(self, data: bytes):
+        """寫入送出緩衝區；工作程序消化過慢時斷開 (工作程序會重新連接並重新訂閱)"""
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > self.max_buffer:
+            logger.warning(f"工作程序 {self.worker} 消化過慢，斷開連線")
+            self.writer.close()
+            return
+        self.writer.write(data)
+
+
+class Broker:
+    """會議狀態快照與事件轉送"""
+
+    def __init__(self, path: str, max_buffer: int = BUS_CONFIG["max_buffer"]):
+        self.path = path
+        self.max_buffer = max_buffer
+        # 會議ID -> (序號, 擁有者, 狀態欄位, 各則消息)
+        self.states: Dict[str, Tuple[int, str, bytes, List[bytes]]] = {}
+        self.subscribers: Dict[str, Set[Peer]] = {}
+        # 已連線的工作程序：工作程序ID -> 連線
+        self.workers: Dict[str, Peer] = {}
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._handle, self.path)
+        logger.info(f"會議匯流排代理程序已啟動: {self.path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = Peer(writer, self.max_buffer)
+        try:
+            while True:
+                header, line, payload = await read_message(reader)
+                self._dispatch(peer, header, line, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"處理工作程序 {peer.worker} 的消息時出錯: {str(e)}")
+        finally:
+            for conference_id in peer.subscriptions:
+                self._unsubscribe(peer, conference_id)
+            writer.close()
+            logger.info(f"工作程序 {peer.worker} 已斷線")
+            if self.workers.get(peer.worker) is peer:
+                del self.workers[peer.worker]
+                self._announce_members()
+
+    def _announce_members(self):
+        """通知所有工作程序目前的成員名單，以及擁有者已離線的會議"""
+        orphans = [cid for cid, (_, owner, _, _) in self.states.items() if owner not in self.workers]
+        data = pack({"op": "members", "workers": sorted(self.workers), "orphans": orphans})
+        for peer in list(self.workers.values()):
+            peer.send(data)
+
+    def _dispatch(self, peer: Peer, header: dict, line: bytes, payload: bytes):
+        op = header.get("op")
+        conference_id: Optional[str] = header.get("cid")
+        if op == "pub":
+            owner = header.get("owner", peer.worker)
+            current = self.states.get(conference_id)
+            if current is not None and current[1] != owner:
+                # 會議已由其他工作程序認領
+                peer.send(pack({"op": "fenced", "cid": conference_id}))
+                return
+            _, head, *messages = split_payload(header, payload)
+            offset = header.get("offset", 0)
+            if head and offset and (current is None or offset != len(current[3])):
+                # 新增的消息與保存的快照不連續：請擁有者下次發送完整狀態
+                logger.warning(f"會議 {conference_id} 的狀態增量不連續 (offset {offset})，要求重新發送")
+                peer.send(pack({"op": "resend", "cid": conference_id}))
+                head = b""
+            if head:
+                stored = current[3] if offset else []
+                stored.extend(messages)
+                self.states[conference_id] = (header["seq"], owner, head, stored)
+            elif current is not None:
+                self.states[conference_id] = (header["seq"], owner, current[2], current[3])
+            self._forward(peer, conference_id, line + payload)
+        elif op in ("get", "sub"):
+            if op == "sub":
+                peer.subscriptions.add(conference_id)
+                self.subscribers.setdefault(conference_id, set()).add(peer)
+            if "req" in header:
+                seq, owner, head, messages = self.states.get(conference_id, (0, "", b"", []))
+                peer.send(pack({"op": "state", "req": header["req"], "cid": conference_id, "seq": seq, "owner": owner}, head, *messages))
+        elif op == "unsub":
+            peer.subscriptions.discard(conference_id)
+            self._unsubscribe(peer, conference_id)
+        elif op == "end":
+            self._forward(peer, conference_id, line)
+        elif op == "discard":
+            self.states.pop(conference_id, None)
+            self._forward(peer, conference_id, pack({"op": "end", "cid": conference_id}))
+        elif op in ("call", "reply"):
+            target = self.workers.get(header.get("to"))
+            if target is not None:
+                target.send(line + payload)
+            elif op == "call" and "req" in header:
+                peer.send(pack({"op": "reply", "req": header["req"], "error": f"工作程序 {header.get('to')} 不在線上"}))
+        elif op == "claim":
+            self._claim(peer, header)
+        elif op == "hello":
+            peer.worker = header.get("worker", peer.worker)
+            self.workers[peer.worker] = peer
+            logger.info(f"工作程序 {peer.worker} 已連接")
+            self._announce_members()
+
+    def _claim(self, peer: Peer, header: dict):
+        """孤兒會議交給第一個認領的工作程序，並回覆最新的狀態快照；擁有者仍在線上時拒絕"""
+        conference_id = header["cid"]
+        current = self.states.get(conference_id)
+        reply = {"op": "claimed", "req": header["req"], "cid": conference_id}
+        if current is None or (current[1] in self.workers and current[1] != peer.worker):
+            peer.send(pack({**reply, "ok": False}))
+            return
+        seq, previous_owner, head, messages = current
+        self.states[conference_id] = (seq, peer.worker, head, messages)
+        logger.info(f"會議 {conference_id} 由工作程序 {peer.worker} 接手 (原擁有者 {previous_owner})")
+        peer.send(pack({**reply, "ok": True, "seq": seq, "owner": peer.worker}, head, *messages))
+
+    def _forward(self, sender: Peer, conference_id: str, data: bytes):
+        for peer in self.subscribers.get(conference_id, ()):
+            if peer is not sender:
+                peer.send(data)
+
+    def _unsubscribe(self, peer: Peer, conference_id: str):
+        subscribers = self.subscribers.get(conference_id)
+        if subscribers is not None:
+            subscribers.discard(peer)
+            if not subscribers:
+                del self.subscribers[conference_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="飛豬隊友會議匯流排代理程序")
+    parser.add_argument("--path", default=os.getenv("CONFERENCE_BUS_PATH") or BUS_CONFIG["socket_path"],
+                        help="Unix socket 路徑 (預設依 CONFERENCE_BUS_PATH)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(Broker(args.path).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+程序內會議匯流排
+
+同一程序內的所有 MemoryBus 共用一個 MemoryHub：狀態快照直接保存會議狀態的參照，
+事件以函數呼叫同步轉交給訂閱者。單一工作程序部署時會議都在本程序內，
+不會有訂閱者，發布事件只需更新一個參照。
+已啟動的 MemoryBus 即為成員 (可在同一程序內模擬多個工作程序)，停止時它的會議成為孤兒。
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+from app.connections import Frame
+from .base import BusError, ConferenceBus, ConferenceState
+
+
+class MemoryHub:
+    """同一程序內共用的狀態快照與訂閱關係"""
+
+    def __init__(self):
+        self.states: Dict[str, ConferenceState] = {}
+        self.subscribers: Dict[str, Set["MemoryBus"]] = {}
+        # 已啟動的成員：工作程序ID -> 匯流排
+        self.workers: Dict[str, "MemoryBus"] = {}
+
+    def _announce_members(self, orphans=()):
+        for bus in list(self.workers.values()):
+            bus._set_members(self.workers)
+            bus._deliver_orphans(list(orphans))
+
+
+_default_hub = MemoryHub()
+
+
+class MemoryBus(ConferenceBus):
+    """程序內會議匯流排"""
+
+    name = "memory"
+
+    def __init__(self, hub: Optional[MemoryHub] = None, worker_id: Optional[str] = None):
+        super().__init__(worker_id)
+        self.hub = hub or _default_hub
+
+    async def start(self):
+        self.hub.workers[self.worker_id] = self
+        self.hub._announce_members()
+
+    async def stop(self):
+        if self.hub.workers.pop(self.worker_id, None) is None:
+            return
+        for subscribers in self.hub.subscribers.values():
+            subscribers.discard(self)
+        orphans = [cid for cid, state in self.hub.states.items() if state.owner == self.worker_id]
+        self.hub._announce_members(orphans)
+
+    def _others(self, conference_id: str):
+        return [bus for bus in self.hub.subscribers.get(conference_id, ()) if bus is not self]
+
+    def publish(self, conference_id: str, frame: Frame, state: Optional[Dict[str, Any]] = None):
+        snapshot = None
+        if state is not None:
+            snapshot = self.hub.states[conference_id] = ConferenceState(conference_id, frame.seq, self.worker_id, data=state)
+        elif conference_id in self.hub.states:
+            self.hub.states[conference_id].seq = frame.seq
+        for bus in self._others(conference_id):
+            bus._deliver_event(conference_id, frame, snapshot)
+
+    def put_state(self, conference_id: str, state: Dict[str, Any], seq: int):
+        snapshot = self.hub.states[conference_id] = ConferenceState(conference_id, seq, self.worker_id, data=state)
+        for bus in self._others(conference_id):
+            bus._deliver_event(conference_id, None, snapshot)
+
+    async def fetch(self, conference_id: str) -> Optional[ConferenceState]:
+        return self.hub.states.get(conference_id)
+
+    async def subscribe(self, conference_id: str) -> Optional[ConferenceState]:
+        self.hub.subscribers.setdefault(conference_id, set()).add(self)
+        return self.hub.states.get(conference_id)
+
+    def unsubscribe(self, conference_id: str):
+        subscribers = self.hub.subscribers.get(conference_id)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.hub.subscribers[conference_id]
+
+    def end(self, conference_id: str):
+        for bus in self._others(conference_id):
+            bus._deliver_end(conference_id)
+
+    def discard(self, conference_id: str):
+        self.hub.states.pop(conference_id, None)
+        self.end(conference_id)
+
+    async def call(self, worker_id: str, kind: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        bus = self.hub.workers.get(worker_id)
+        if bus is None:
+            raise BusError(f"工作程序 {worker_id} 不在線上")
+        return await bus._handle_call(kind, payload)
+
+    def send(self, worker_id: str, kind: str, payload: Dict[str, Any]):
+        bus = self.hub.workers.get(worker_id)
+        if bus is not None:
+            asyncio.create_task(bus._handle_send(kind, payload))
+
+    async def claim(self, conference_id: str) -> Optional[ConferenceState]:
+        state = self.hub.states.get(conference_id)
+        if state is None or (state.owner in self.hub.workers and state.owner != self.worker_id):
+            return None
+        state = self.hub.states[conference_id] = ConferenceState(conference_id, state.seq, self.worker_id, data=state.data)
+        return state
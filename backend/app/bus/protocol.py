@@ -0,0 +1,37 @@
+"""
+跨程序匯流排的線路格式
+
+每則消息是一行 JSON 標頭，後面緊接標頭 sizes 所列長度的原始位元組 (事件幀文字、會議狀態等)。
+代理程序只解析標頭，內容原樣保存與轉送，不需要重新編碼。
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+
+
+def pack(header: Dict[str, Any], *payloads: bytes) -> bytes:
+    """組成一則消息"""
+    header["sizes"] = [len(payload) for payload in payloads]
+    return json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n" + b"".join(payloads)
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes, bytes]:
+    """讀取一則消息，返回 (標頭, 標頭原文, 內容)；連線已關閉時引發 asyncio.IncompleteReadError"""
+    line = await reader.readline()
+    if not line:
+        raise asyncio.IncompleteReadError(b"", None)
+    header = json.loads(line)
+    total = sum(header.get("sizes") or ())
+    payload = await reader.readexactly(total) if total else b""
+    return header, line, payload
+
+
+def split_payload(header: Dict[str, Any], payload: bytes) -> List[bytes]:
+    """依標頭的 sizes 切開內容"""
+    parts = []
+    offset = 0
+    for size in header.get("sizes") or ():
+        parts.append(payload[offset:offset + size])
+        offset += size
+    return parts
@@ -0,0 +1,30 @@
+"""
+一致性雜湊環
+
+依會議ID決定由哪個工作程序執行會議。每個工作程序在環上佔多個虛擬節點，
+工作程序加入或離開時只有約 1/N 的會議改變歸屬，所有工作程序依相同的成員名單算出相同的結果。
+"""
+
+import bisect
+import hashlib
+from typing import Iterable, List, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """工作程序的一致性雜湊環"""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        points = sorted((_hash(f"{node}#{index}"), node) for node in set(nodes) for index in range(replicas))
+        self._keys: List[int] = [point for point, _ in points]
+        self._nodes: List[str] = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """負責 key 的節點 (環上順時針方向的第一個虛擬節點)，環為空時返回 None"""
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[index]
@@ -0,0 +1,279 @@
+"""
+跨程序會議匯流排 (Unix socket)
+
+所有工作程序連接同一個代理程序 (python -m app.bus.broker)：
+代理程序保存各會議最新的狀態快照，並把事件轉送給訂閱該會議的其他工作程序。
+狀態快照分為會議消息以外的狀態欄位與逐則編碼的消息：擁有者每次只發送狀態欄位與上次之後新增的消息，
+代理程序與訂閱者把新的消息附加到已有的快照，發布事件的成本不隨會議記錄增長。
+與代理程序的連線中斷時自動重新連接，重新訂閱原有的會議並重新發送自己擁有的會議狀態；
+中斷期間的事件不會補送，受影響的客戶端可用 ?since=<seq> 重新連線取得快照。
+代理程序追蹤已連線的工作程序，成員變動時通知所有工作程序新的成員名單與失去擁有者的會議，
+並負責轉送工作程序之間的請求，以及裁定孤兒會議由誰認領。
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import BUS_CONFIG
+from app.connections import Frame, encode_message
+from .base import BusError, ConferenceBus, ConferenceState
+from .protocol import pack, read_message, split_payload
+
+logger = logging.getLogger(__name__)
+
+
+class SocketBus(ConferenceBus):
+    """透過 Unix socket 代理程序在多個工作程序間共享會議"""
+
+    name = "socket"
+
+    def __init__(self, path: Optional[str] = None, config: Optional[Dict[str, Any]] = None,
+                 worker_id: Optional[str] = None):
+        super().__init__(worker_id)
+        self.config = config or BUS_CONFIG
+        self.path = path or self.config["socket_path"]
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._subscriptions: Set[str] = set()
+        # 已訂閱的會議目前的狀態快照，隨收到的增量更新
+        self._remote: Dict[str, ConferenceState] = {}
+        # 本工作程序擁有的會議：最後發布的 (序號, 會議狀態)，重新連線後重新發送完整狀態
+        self._owned: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # 本工作程序擁有的會議已發送給代理程序的消息數
+        self._sent: Dict[str, int] = {}
+        self.dropped = 0
+
+    async def start(self):
+        if self._task is None:
+            self._connected = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    async def _run(self):
+        delay = self.config["reconnect_delay"]
+        warned = False
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                if not warned:
+                    logger.warning(f"無法連接會議匯流排代理程序 {self.path}: {str(e)}，將持續重試")
+                    warned = True
+                await asyncio.sleep(delay)
+                continue
+            warned = False
+            self._writer = writer
+            self._write(pack({"op": "hello", "worker": self.worker_id}))
+            # 重新訂閱並取得最新的快照 (中斷期間的增量已遺失)
+            for conference_id in self._subscriptions:
+                self._write(pack({"op": "sub", "cid": conference_id, "req": next(self._request_ids)}))
+            for conference_id, (seq, state) in self._owned.items():
+                self._sent.pop(conference_id, None)
+                self._write(self._pack_state({"op": "pub", "cid": conference_id, "seq": seq, "owner": self.worker_id},
+                                             conference_id, state, b""))
+            self._connected.set()
+            logger.info(f"已連接會議匯流排代理程序 {self.path}，工作程序 {self.worker_id}")
+            try:
+                while True:
+                    self._dispatch(*await read_message(reader))
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                logger.warning(f"與會議匯流排代理程序的連線中斷: {type(e).__name__}，{delay} 秒後重新連接")
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(BusError("與會議匯流排代理程序的連線中斷"))
+                self._pending.clear()
+            await asyncio.sleep(delay)
+
+    def _dispatch(self, header: Dict[str, Any], line: bytes, payload: bytes):
+        op = header.get("op")
+        if op == "pub":
+            frame_bytes, head, *messages = split_payload(header, payload)
+            conference_id, seq = header["cid"], header["seq"]
+            frame = Frame(header.get("type", ""), frame_bytes.decode("utf-8"), seq) if frame_bytes else None
+            self._deliver_event(conference_id, frame, self._apply(header, head, messages) if head else None)
+        elif op in ("state", "reply", "claimed"):
+            if op == "state" and header.get("cid") in self._subscriptions:
+                # 依代理程序的處理順序，回覆的快照之後才會收到新的增量
+                state = self._state_from(header, payload)
+                if state is not None:
+                    self._remote[header["cid"]] = state
+            future = self._pending.pop(header.get("req"), None)
+            if future is not None and not future.done():
+                future.set_result((header, payload))
+        elif op == "call":
+            asyncio.create_task(self._serve_call(header, payload))
+        elif op == "end":
+            self._deliver_end(header["cid"])
+        elif op == "members":
+            self._set_members(header["workers"])
+            logger.info(f"會議匯流排成員: {', '.join(self.members)}")
+            self._deliver_orphans(header.get("orphans") or [])
+        elif op == "fenced":
+            # 會議已由其他工作程序認領 (例如本工作程序曾與代理程序斷線過久)
+            self._owned.pop(header["cid"], None)
+            self._sent.pop(header["cid"], None)
+            self._deliver_fenced(header["cid"])
+        elif op == "resend":
+            # 代理程序的快照與已發送的消息不連續：下次發布時改送完整狀態
+            self._sent.pop(header["cid"], None)
+
+    def _apply(self, header: Dict[str, Any], head: bytes, messages: List[bytes]) -> Optional[ConferenceState]:
+        """把擁有者發布的增量套用到已訂閱會議的快照"""
+        conference_id = header["cid"]
+        state = self._remote.get(conference_id)
+        if state is None:
+            return None
+        if not state.apply(header["seq"], header.get("owner", ""), head, messages, header.get("offset", 0)):
+            logger.warning(f"會議 {conference_id} 的狀態增量不連續，重新取得快照")
+            self._write(pack({"op": "get", "cid": conference_id, "req": next(self._request_ids)}))
+            return None
+        return state
+
+    async def _serve_call(self, header: Dict[str, Any], payload: bytes):
+        """處理其他工作程序轉來的請求，需要回覆時送回結果或錯誤"""
+        request = json.loads(payload) if payload else {}
+        if "req" not in header:
+            await self._handle_send(header["kind"], request)
+            return
+        reply = {"op": "reply", "to": header["from"], "req": header["req"]}
+        try:
+            result = await self._handle_call(header["kind"], request)
+            data = pack(reply, encode_message(result).encode("utf-8") if result is not None else b"")
+        except Exception as e:
+            logger.error(f"處理工作程序 {header['from']} 的請求 {header['kind']} 時出錯: {str(e)}")
+            data = pack({**reply, "error": str(e)[:200]})
+        self._write(data)
+
+    @staticmethod
+    def _state_from(header: Dict[str, Any], payload: bytes) -> Optional[ConferenceState]:
+        parts = split_payload(header, payload)
+        if not parts or not parts[0]:
+            return None
+        return ConferenceState(header["cid"], header["seq"], header.get("owner", ""), head=parts[0], messages=parts[1:])
+
+    def _pack_state(self, header: Dict[str, Any], conference_id: str, state: Dict[str, Any], frame_bytes: bytes) -> bytes:
+        """組成附帶狀態的發布消息：狀態欄位與上次發送之後新增的消息 (各自編碼)"""
+        messages = state.get("messages", [])
+        offset = self._sent.get(conference_id, 0)
+        if offset > len(messages):
+            offset = 0
+        self._sent[conference_id] = len(messages)
+        head = {key: value for key, value in state.items() if key != "messages"}
+        header["offset"] = offset
+        return pack(header, frame_bytes, encode_message(head).encode("utf-8"),
+                    *(encode_message(message).encode("utf-8") for message in messages[offset:]))
+
+    def _write(self, data: bytes, droppable: bool = False) -> bool:
+        """寫入送出緩衝區 (不等待)；未連線，或可捨棄的消息在緩衝區過大時返回 False"""
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return False
+        if droppable and writer.transport.get_write_buffer_size() > self.config["max_buffer"]:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"會議匯流排送出緩衝區已滿，已捨棄 {self.dropped} 則事件")
+            return False
+        writer.write(data)
+        return True
+
+    def publish(self, conference_id: str, frame: Frame, state: Optional[Dict[str, Any]] = None):
+        header = {"op": "pub", "cid": conference_id, "seq": frame.seq, "type": frame.type, "owner": self.worker_id}
+        if state is None:
+            self._write(pack(header, frame.text.encode("utf-8"), b""), droppable=True)
+            return
+        self._owned[conference_id] = (frame.seq, state)
+        if not self._write(self._pack_state(header, conference_id, state, frame.text.encode("utf-8"))):
+            # 未送出：重新連線時會重新發送完整狀態
+            self._sent.pop(conference_id, None)
+
+    def put_state(self, conference_id: str, state: Dict[str, Any], seq: int):
+        header = {"op": "pub", "cid": conference_id, "seq": seq, "owner": self.worker_id}
+        self._owned[conference_id] = (seq, state)
+        self._sent.pop(conference_id, None)
+        if not self._write(self._pack_state(header, conference_id, state, b"")):
+            self._sent.pop(conference_id, None)
+
+    async def _request(self, header: Dict[str, Any], *payloads: bytes) -> Tuple[Dict[str, Any], bytes]:
+        timeout = self.config["request_timeout"]
+        if self._connected is None:
+            raise BusError("會議匯流排尚未啟動")
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise BusError(f"無法連接會議匯流排代理程序 {self.path}")
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        header["req"] = request_id
+        if not self._write(pack(header, *payloads)):
+            self._pending.pop(request_id, None)
+            raise BusError("與會議匯流排代理程序的連線中斷")
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise BusError("會議匯流排請求逾時")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def fetch(self, conference_id: str) -> Optional[ConferenceState]:
+        return self._state_from(*await self._request({"op": "get", "cid": conference_id}))
+
+    async def subscribe(self, conference_id: str) -> Optional[ConferenceState]:
+        self._subscriptions.add(conference_id)
+        try:
+            await self._request({"op": "sub", "cid": conference_id})
+        except BusError:
+            self._subscriptions.discard(conference_id)
+            raise
+        # 收到回覆時已保存快照，之後已收到的增量也已套用
+        return self._remote.get(conference_id)
+
+    def unsubscribe(self, conference_id: str):
+        self._subscriptions.discard(conference_id)
+        self._remote.pop(conference_id, None)
+        self._write(pack({"op": "unsub", "cid": conference_id}))
+
+    def end(self, conference_id: str):
+        self._write(pack({"op": "end", "cid": conference_id}))
+
+    def discard(self, conference_id: str):
+        self._owned.pop(conference_id, None)
+        self._sent.pop(conference_id, None)
+        self._write(pack({"op": "discard", "cid": conference_id}))
+
+    async def call(self, worker_id: str, kind: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        header, result = await self._request({"op": "call", "to": worker_id, "from": self.worker_id, "kind": kind},
+                                             encode_message(payload).encode("utf-8"))
+        if "error" in header:
+            raise BusError(f"工作程序 {worker_id} 無法處理請求 {kind}: {header['error']}")
+        return json.loads(result) if result else None
+
+    def send(self, worker_id: str, kind: str, payload: Dict[str, Any]):
+        header = {"op": "call", "to": worker_id, "from": self.worker_id, "kind": kind}
+        if not self._write(pack(header, encode_message(payload).encode("utf-8"))):
+            logger.warning(f"無法轉交請求 {kind} 給工作程序 {worker_id}：未連接會議匯流排代理程序")
+
+    async def claim(self, conference_id: str) -> Optional[ConferenceState]:
+        header, payload = await self._request({"op": "claim", "cid": conference_id, "worker": self.worker_id})
+        return self._state_from(header, payload) if header.get("ok") else None
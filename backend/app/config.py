@@ -33,31 +33,187 @@ AI_CONFIG = {
     "system_message_template": "你是一個名為{participant_id}的虛擬角色。{role_prompt} 你正在參加一場正式的商務會議，請務必以你角色的專業職責為基礎發言。使用精確、嚴謹的繁體中文進行表達。"
 }
 
+# LLM 非同步引擎連線池配置 (所有會議共用同一個 AsyncOpenAI / httpx 客戶端)
+LLM_CLIENT_CONFIG = {
+    "max_connections": 100,            # 連線池最大連線數
+    "max_keepalive_connections": 20,   # 保持存活的閒置連線數
+    "keepalive_expiry": 30.0,          # 閒置連線保留秒數
+    "timeout": 60.0,                   # 單次請求逾時 (秒)
+    "connect_timeout": 10.0,           # 建立連線逾時 (秒)
+    "max_retries": 2,                  # SDK 自動重試次數
+    "stream_usage": True               # 串流請求附帶 stream_options.include_usage，以取得用量與快取命中的 token 數
+}
+
+# LLM 供應商配置
+LLM_PROVIDER_CONFIG = {
+    "provider": "openai",   # openai / mock，可由環境變數 LLM_PROVIDER 覆蓋
+    "base_url": None,       # OpenAI 相容 API 位址 (例如本地模型伺服器)，可由環境變數 LLM_BASE_URL 覆蓋
+    # 本地模擬供應商：不連網、可重現，用於壓力測試與離線執行整場會議
+    "mock": {
+        "seed": 42,
+        "latency": {"distribution": "lognormal", "median": 0.8, "sigma": 0.4},  # 首字延遲 (秒)
+        "tokens_per_second": 40.0,          # 輸出速度，0 表示立即返回
+        "response_chars": [60, 200],        # 回應長度範圍 (字)
+        "error_rate": 0.0,                  # 錯誤注入機率
+        "error_status_codes": [429, 500],   # 注入錯誤時使用的狀態碼
+        "retry_after": 1.0,                 # 注入 429 時回傳的 retry-after (秒)
+        # 模擬供應商端的提示詞前綴快取：提示詞至少 min_chars 字時，以 block_chars 為單位比對曾出現過的前綴
+        "prompt_cache": {"enabled": True, "min_chars": 1024, "block_chars": 128, "max_blocks": 100000}
+    }
+}
+
+# 全局 LLM 准入排程器配置 (跨會議共用的 RPM / TPM 額度與公平排隊)
+LLM_SCHEDULER_CONFIG = {
+    "enabled": True,
+    "requests_per_minute": 3500,   # 每分鐘請求數上限 (依供應商帳戶等級調整)
+    "tokens_per_minute": 90000,    # 每分鐘 token 數上限
+    "max_concurrency": 50,         # 同時進行中的請求上限
+    "default_weight": 1,           # 會議的預設權重 (同時排隊時取得名額的相對比例)
+    "max_lag": 4                   # 會議短暫沒有排隊時保留的進度上限 (以預設權重的請求數計)
+}
+
+# LLM 回應快取配置 (完全比對)
+# 預設停用：命中時同樣的提示會重播先前的回應 (例如同主題的會議得到相同的自我介紹)。
+# 啟用後只有 stages 中列出的階段，或溫度不高於 max_temperature (None 表示不依溫度) 的請求會使用快取，
+# 兩者都未設定時不快取任何請求
+# 可用階段: introduction, chair_opening, discussion, summary, conclusion
+LLM_CACHE_CONFIG = {
+    "enabled": False,
+    "stages": [],                  # 例如 ["introduction"]
+    "max_temperature": None,
+    "memory_entries": 1024,        # 記憶體 LRU 筆數上限
+    "disk_path": None,             # 磁碟層路徑 (可用 LLM_CACHE_PATH 設定)，None 表示只保存在記憶體
+    "ttl": 7 * 24 * 3600,          # 回應的存活時間 (秒)，記憶體層與磁碟層相同
+    "max_disk_entries": 50000      # 磁碟層筆數上限，超過時淘汰最久未使用的項目
+}
+
+# 自我介紹語意快取配置：同一參與者在主題相近的會議中重用舊的自我介紹
+# 預設停用：啟用後不同會議之間會共用自我介紹
+SEMANTIC_CACHE_CONFIG = {
+    "enabled": False,
+    "threshold": 0.92,             # 主題與角色提示的餘弦相似度都須達到此門檻 (只改年份或季度的主題約 0.90)
+    "dimensions": 512,             # 特徵雜湊向量維度
+    "max_entries_per_participant": 20,
+    "disk_path": None,             # 磁碟路徑 (可用 SEMANTIC_CACHE_PATH 設定)，None 表示只保存在記憶體
+    "ttl": 30 * 24 * 3600
+}
+
+# 發言串流配置 (邊生成邊透過 WebSocket 推送 message_delta / message_end)
+STREAMING_CONFIG = {
+    "enabled": True,          # 是否以串流方式推送智能體發言
+    "flush_interval": 0.05    # 增量文字合併推送的最短間隔 (秒)
+}
+
+# WebSocket 廣播配置：每個客戶端有專屬的寫入任務與有界待送佇列
+BROADCAST_CONFIG = {
+    "queue_size": 256,                   # 每個客戶端最多累積的待送消息數
+    "slow_consumer_policy": "coalesce",  # 佇列已滿時：coalesce (捨棄未送出的增量文字) / drop (捨棄新消息) / disconnect (斷線)
+    "send_timeout": 10.0,                # 單次送出逾時 (秒)，逾時視為客戶端已斷線
+    "replay_buffer": 1000,               # 每場會議保留最近多少則已編碼事件，供 ?since=<seq> 重新連線補送
+    "snapshot_chunk": 50                 # 補送不完整時改送快照，每段包含的消息數
+}
+
+# 唯讀觀眾配置 (/ws/conference/{id}/spectate)
+SPECTATOR_CONFIG = {
+    "tick_interval": 0.1,        # 觀眾的喚醒間隔 (秒)：每次喚醒送出這段期間的所有事件，與事件頻率無關
+    "heartbeat_interval": 15.0,  # 沒有新事件超過此秒數時送出心跳
+    "max_spectators": 20000      # 每場會議在單一工作程序上的觀眾上限
+}
+
+# 會議匯流排配置：多個工作程序共享會議事件與狀態
+BUS_CONFIG = {
+    "backend": "memory",                    # memory (單一工作程序) / socket (經代理程序跨程序共享)，可由環境變數 CONFERENCE_BUS 覆蓋
+    "socket_path": "/tmp/flypig-bus.sock",  # 代理程序的 Unix socket 路徑，可由環境變數 CONFERENCE_BUS_PATH 覆蓋
+    "reconnect_delay": 1.0,                 # 與代理程序斷線後重新連接的間隔 (秒)
+    "request_timeout": 5.0,                 # 查詢會議狀態的逾時 (秒)
+    "max_buffer": 16 * 1024 * 1024,         # 送出緩衝區上限 (位元組)：工作程序超過時捨棄事件，代理程序超過時斷開該工作程序
+    "ring_replicas": 64                     # 每個工作程序在一致性雜湊環上的虛擬節點數
+}
+
+# 會議流程編排配置
+ORCHESTRATION_CONFIG = {
+    "concurrent_introductions": True,   # 同時生成所有自我介紹，再依順序逐一發布
+    "pipelined_discussion": False       # 管線化討論：上一位發言確定後立即生成下一位的發言 (預先生成的發言不串流)
+}
+
+# 會議節奏配置 (讓對話在界面上顯示得更自然的停頓，單位：秒)
+# 會議狀態中的 "pacing" 為 False 時 (例如批次執行) 全部略過
+PACING_CONFIG = {
+    "after_message": 0.5,           # 每則消息廣播後
+    "after_opening": 1,             # 秘書開場白後
+    "introduction_interval": 3,     # 非串流發布時，相鄰自我介紹之間
+    "after_handover": 1,            # 秘書交接給主席後
+    "after_turn": 2,                # 討論中每位發言者之後
+    "before_conclusion": 2,         # 結論引導語之後
+    "after_conclusion": 3           # 秘書總結之後
+}
+
+# 會議上下文視窗配置 (提示詞中引用的最近發言則數)
+# scenarios 可依情境 ID 覆寫個別數值，例如 {"debate": {"discussion": 20}}
+CONTEXT_CONFIG = {
+    "discussion": 15,     # 討論發言引用的最近消息數
+    "conclusion": 30,     # 秘書總結引用的最近消息數
+    "scenarios": {}
+}
+
+# 提示詞 token 預算 (各階段使用者提示的估算上限，不含系統訊息與回應長度)
+# 超出時先捨棄最舊的會議記錄，補充資料最多佔預算的 notes_share
+PROMPT_BUDGET_CONFIG = {
+    "introduction": 1000,
+    "discussion": 2500,
+    "chair_opening": 2500,
+    "conclusion": 5000,
+    "round_summary": 4000,
+    "round_extract": 4000,
+    "meeting_summary": 2000,
+    "notes_share": 0.4
+}
+
+# 滾動摘要配置：每輪結束後在背景壓縮為本輪摘要，並更新整場會議的累積摘要
+SUMMARY_CONFIG = {
+    "enabled": True,
+    "temperature": 0.3,
+    "round_max_tokens": 300,      # 單輪摘要的回應長度上限
+    "meeting_max_tokens": 500,    # 累積摘要的回應長度上限
+    "extract_max_tokens": 300,    # 單輪重點與行動項目的回應長度上限
+    # 增量總結：每輪結束即擷取重點與行動項目，會議結束時只需彙整 (失敗時回退為讀取最近發言)
+    "incremental_conclusion": True,
+    "conclusion_max_tokens": 600
+}
+
 # 階段提示詞模板
 PROMPT_TEMPLATES = {
     "introduction": "你是{name}（{title}），請你用專業、簡潔的繁體中文做一個自我介紹，說明你的核心職責。然後，針對會議主題「{topic}」，提出你從你的職位角度看到的最關鍵的1-2個問題點，不超過100字。",
     
+    # 討論與主席提示詞分為兩段：整場會議固定不變的前綴 (角色、指示、補充資料) 在前，
+    # 每次發言才變動的內容 (本輪重點、摘要、最近發言) 在後，使同一參與者的請求前綴逐位元組相同
     "discussion": """
     你是{name}（{title}）。
-    當前會議主題是「{topic}」，本輪討論的重點是：{round_topic}。
-
-    **會議記錄摘要 (最近幾條發言):**
-    {context}
+    當前會議主題是「{topic}」。
 
     **請嚴格遵守以下指示：**
     1.  **角色扮演**: 你的發言必須完全基於你的職位 ({title}) 和專業知識。
-    2.  **聚焦議題**: 緊密圍繞當前討論的焦點 {round_topic} 或主席指定的具體問題發言。
+    2.  **聚焦議題**: 緊密圍繞下方列出的本輪討論重點或主席指定的具體問題發言。
     3.  **回應指派**: 如果主席剛剛明確指派你回答某個問題，請直接、清晰地回應那個問題。
     4.  **回應他人**: 如果未被直接指派，請針對**上一位發言者的核心論點**或**當前正在討論的具體問題點**，提出你的分析、補充、反駁或建議。引用數據或事實（如果適用）。
     5.  **嚴肅專業**: 保持嚴肅、專業的商業語氣，避免閒聊、幽默或與議題無關的內容。
     6.  **簡潔高效**: 發言力求簡潔明瞭，直擊要點，不超過150字。
+    """,
+
+    "discussion_turn": """
+    **本輪討論的重點:** {round_topic}
+
+    **先前各輪的會議摘要:**
+    {summary}
+
+    **會議記錄摘要 (最近幾條發言):**
+    {context}
 
     **你的任務**: 根據上述指示，發表你的專業意見。
     """,
     
     "chair_opening": """
     你是會議主席{name}（{title}）。會議主題：「{topic}」。
-    本輪是第 {round_num} 輪討論，重點是：{round_topic}。
 
     **會議補充資料:**
     {additional_notes}
@@ -70,7 +226,7 @@ PROMPT_TEMPLATES = {
     --- 開始：第 1 輪 指令 ---
     (僅在 round_num == 1 時執行)
     1.  簡要開場，說明會議主題「{topic}」的重要性，**並結合「會議補充資料」的內容**。
-    2.  將本輪重點「{round_topic}」**基於補充資料和主題**，拆解為 2-3 個具體的、需要優先討論的問題點。
+    2.  將本輪重點**基於補充資料和主題**，拆解為 2-3 個具體的、需要優先討論的問題點。
     3.  **必須清晰地從「目前活躍的與會者」列表中指派第一位發言者（說明姓名和職位）**，並明確要求他/她針對**第一個**討論問題點發表意見。
     4.  **發言範例（請注意，這只是格式範例，括號內的文字是提示而非實際內容）：** *（思考如何結合補充資料後，你的發言應類似於）*「現在開始第一輪討論，重點是市場分析。根據我們收到的資料，我認為關鍵問題在於：1) [問題點1]；2) [問題點2]。針對第一點 [問題點1]，我想先請 [張三 營銷經理] 談談你的專業分析。」
     --- 結束：第 1 輪 指令 ---
@@ -78,7 +234,7 @@ PROMPT_TEMPLATES = {
     --- 開始：後續輪次 (第 2 輪及以後) 指令 ---
     (僅在 round_num > 1 時執行)
     1.  極簡要地總結上一輪的核心結論或遺留問題（一句話即可）。
-    2.  說明本輪的討論重點：「{round_topic}」。
+    2.  說明本輪的討論重點。
     3.  將本輪重點拆解為 2-3 個具體的討論問題點。
     4.  **必須清晰地從「目前活躍的與會者」列表中指派一位參與者（說明姓名和職位）**，要求他/她針對**第一個**討論問題點發表意見。
     5.  **發言範例（同樣，括號內文字是提示）：** *（思考如何總結並引入新問題後，你的發言應類似於）*「上一輪我們確定了策略方向。本輪重點是資源分配，具體來看：1) [問題點A]；2) [問題點B]。關於 [問題點A]，請 [李四 財務經理] 先說明你的建議。」
@@ -90,6 +246,11 @@ PROMPT_TEMPLATES = {
     *   語言專業、精煉，直接切入主題，控制在200字內。
     *   確保引導會議高效進行。
     """,
+
+    "chair_opening_turn": """
+    本輪是第 {round_num} 輪討論，重點是：{round_topic}。
+    請執行第 {round_num} 輪對應的指令。
+    """,
     
     "conclusion": """
     你是會議秘書。會議主題是關於「{topic}」。
@@ -103,6 +264,54 @@ PROMPT_TEMPLATES = {
     3.  基於討論結果，列出 5-7 條明確的、可執行的**決策或行動項目**，包含責任人（如果討論中有明確指定）。
     4.  如有必要，簡述懸而未決的問題或需要後續跟進的事項。
     5.  總結需嚴謹、精煉，總字數不超過300字。
+    """,
+
+    "round_summary": """
+    以下是會議「{topic}」第 {round_num} 輪討論（重點：{round_topic}）的發言記錄：
+    {transcript}
+
+    請用繁體中文將本輪討論壓縮為 150 字以內的摘要：列出提出的主要觀點（註明發言者職位）、
+    達成的共識或決定，以及尚未解決的問題。只輸出摘要內容。
+    """,
+
+    "meeting_summary": """
+    會議主題是「{topic}」。
+
+    **先前的會議累積摘要:**
+    {summary}
+
+    **最新一輪（第 {round_num} 輪）的摘要:**
+    {round_summary}
+
+    請用繁體中文將兩者整合為一份 250 字以內的會議累積摘要，依時間順序保留各輪的關鍵決定、
+    共識與待解決事項，省略重複與細節。只輸出摘要內容。
+    """,
+
+    "round_extract": """
+    以下是會議「{topic}」第 {round_num} 輪討論（重點：{round_topic}）的發言記錄：
+    {transcript}
+
+    請用繁體中文條列擷取本輪的：
+    重點：3-5 條主要觀點或共識（註明提出者職位）
+    行動項目：明確提出的決定或待辦事項（有指定責任人時註明）
+    待決問題：尚未解決、需要後續跟進的事項（沒有則寫「無」）
+    每條不超過 40 字，只輸出條列內容。
+    """,
+
+    "conclusion_reduce": """
+    你是{name}（{title}），負責整理會議記錄並提出總結。
+    會議主題是「{topic}」，共進行了 {rounds} 輪討論。{notes}
+
+    以下是各輪討論擷取的重點與行動項目：
+    {points}
+
+    請你用繁體中文進行以下工作：
+    1. 簡短回應主席（如果有的話）或直接開始，表示你將進行會議總結
+    2. 總結整場會議的討論重點和主要觀點
+    3. 合併重複的項目，條理清晰地列出5-7點關鍵結論或行動項目
+    4. 提出1-2個後續可能需要關注的方向
+
+    格式為：先有一段回應/開頭，然後是總結內容，最後是帶編號的結論列表。總字數控制在400字以內。
     """
 }
 
@@ -117,12 +326,17 @@ ROUND_TOPICS = {
 # WebSocket 消息類型
 MESSAGE_TYPES = {
     "new_message": "new_message",
+    "message_delta": "message_delta",   # 串流中的增量文字
+    "message_end": "message_end",       # 串流結束，附帶完整消息
     "init": "init",
     "stage_change": "stage_change",
     "round_update": "round_update",
     "round_completed": "round_completed",
     "conclusion": "conclusion",
     "error": "error",
+    "resync": "resync",                 # 重新連線：隨後補送錯過的事件
+    "snapshot_chunk": "snapshot_chunk", # 重新連線：分段送出的會議記錄快照
+    "heartbeat": "heartbeat",           # 唯讀觀眾連線閒置時的心跳
     "next_round": "next_round",
     "end_conference": "end_conference"
 }
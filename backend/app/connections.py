@@ -0,0 +1,175 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - WebSocket 客戶端連線
+
+每個 WebSocket 客戶端一個 ClientConnection：廣播只把消息放入該連線的有界佇列 (不等待網路)，
+由連線專屬的寫入任務依序送出。單一緩慢或半斷線的瀏覽器只會影響自己，
+不會拖慢其他觀眾或會議流程。
+每次廣播只編碼一次 (Frame)，所有客戶端共用同一份已編碼的文字幀。
+未安裝 orjson 時以標準庫 json 編碼，輸出與 WebSocket.send_json 逐位元組相同；
+安裝 orjson 時改用它編碼，解碼後的內容相同，但非 ASCII 字元不跳脫 (幀較小)。
+
+佇列已滿時依 BROADCAST_CONFIG["slow_consumer_policy"] 處理：
+- coalesce: 捨棄佇列中尚未送出的 message_delta (隨後的 message_end 含完整內容)，仍無空間時斷線
+- drop: 捨棄新的消息
+- disconnect: 直接斷開該客戶端
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+from app.config import BROADCAST_CONFIG, MESSAGE_TYPES
+
+try:
+    import orjson
+except ImportError:  # 選用相依套件
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """將消息編碼為 JSON 文字 (標準庫路徑與 WebSocket.send_json 的參數相同)"""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(message, separators=(",", ":"))
+
+
+class Frame:
+    """已編碼的 WebSocket 文字幀，可同時放入多個客戶端的佇列；seq 為會議事件序號 (若有)"""
+
+    __slots__ = ("type", "text", "seq")
+
+    def __init__(self, message_type: str, text: str, seq: Optional[int] = None):
+        self.type = message_type
+        self.text = text
+        self.seq = seq
+
+    @classmethod
+    def encode(cls, message: Dict[str, Any]) -> "Frame":
+        return cls(message.get("type", ""), encode_message(message), message.get("seq"))
+
+
+# 寫入任務收到此項目時送出關閉幀並結束
+_CLOSE = object()
+
+# 緩慢客戶端被斷開時使用的關閉碼 (Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ClientConnection:
+    """單一 WebSocket 客戶端的待送佇列與寫入任務"""
+
+    def __init__(self, websocket: Any, conference_id: str,
+                 on_closed: Optional[Callable[["ClientConnection"], None]] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.websocket = websocket
+        self.conference_id = conference_id
+        self.config = config or BROADCAST_CONFIG
+        self._on_closed = on_closed
+        self._queue: Deque[Any] = deque()  # Frame 或 _CLOSE
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._close_args = (1000, "")
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        try:
+            self.label = f"{websocket.client.host}:{websocket.client.port}"
+        except AttributeError:
+            self.label = "unknown"
+
+    def start(self):
+        """啟動寫入任務"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def send(self, frame: Frame) -> bool:
+        """放入待送佇列並立即返回；連線已關閉或依政策捨棄時返回 False"""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.config["queue_size"] and not self._make_room():
+            return False
+        self._queue.append(frame)
+        self._wakeup.set()
+        return True
+
+    def prime(self, frames: Iterable[Frame]):
+        """連線建立時放入初始消息 (初始化、重播或快照)，不受佇列容量限制"""
+        if self.closed:
+            return
+        self._queue.extend(frames)
+        self._wakeup.set()
+
+    def _make_room(self) -> bool:
+        """佇列已滿時依政策處理，返回是否可放入新消息"""
+        policy = self.config["slow_consumer_policy"]
+        if policy == "drop":
+            self.dropped += 1
+            return False
+        if policy == "coalesce":
+            kept = [item for item in self._queue if item is _CLOSE or item.type != MESSAGE_TYPES["message_delta"]]
+            dropped = len(self._queue) - len(kept)
+            if dropped:
+                self._queue = deque(kept)
+                self.dropped += dropped
+                logger.debug(f"客戶端 {self.label} 佇列已滿，合併捨棄 {dropped} 則增量文字")
+                if len(self._queue) < self.config["queue_size"]:
+                    return True
+        logger.warning(f"客戶端 {self.label} 消化過慢 (待送 {len(self._queue)} 則)，斷開會議 {self.conference_id} 的連接")
+        self.abort(SLOW_CONSUMER_CLOSE_CODE, "slow consumer")
+        return False
+
+    def close(self, code: int = 1000, reason: str = ""):
+        """送出佇列中剩餘的消息後關閉連接"""
+        if self.closed:
+            return
+        self.closed = True
+        self._close_args = (code, reason)
+        self._queue.append(_CLOSE)
+        self._wakeup.set()
+
+    def abort(self, code: int = 1000, reason: str = ""):
+        """捨棄待送消息並立即關閉連接"""
+        self.closed = True
+        self._queue.clear()
+        self._close_args = (code, reason)
+        self._queue.append(_CLOSE)
+        self._wakeup.set()
+
+    def stop(self):
+        """客戶端已斷線：停止寫入任務"""
+        self.closed = True
+        if self._writer and not self._writer.done():
+            self._writer.cancel()
+
+    async def _run(self):
+        send_timeout = self.config.get("send_timeout")
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                item = self._queue.popleft()
+                if item is _CLOSE:
+                    code, reason = self._close_args
+                    await asyncio.wait_for(self.websocket.close(code=code, reason=reason), send_timeout)
+                    break
+                # 半斷線的客戶端可能永遠無法完成送出，逾時即視為斷線
+                await asyncio.wait_for(self.websocket.send_text(item.text), send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"向客戶端 {self.label} 送出消息失敗，停止寫入: {type(e).__name__} {str(e)}")
+        finally:
+            self.closed = True
+            self._queue.clear()
+            if self._on_closed:
+                self._on_closed(self)
@@ -0,0 +1,132 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 會議上下文
+
+每場會議一個 ConferenceContext，以有界 deque 保存預先格式化好的發言行：
+新增消息時只格式化該則消息 (O(1))，討論與總結的上下文視窗直接從 deque 尾端取出，
+不必每次發言都重新切片、格式化整份會議記錄。
+提示詞依各階段的 token 預算組合，超出時先捨棄最舊的發言。
+"""
+
+import logging
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from app.config import CONTEXT_CONFIG, PROMPT_BUDGET_CONFIG
+from app.llm.tokens import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def format_context_line(message: dict) -> str:
+    """將一則消息格式化為上下文中的一行"""
+    return f"{message.get('speakerName', 'Unknown')} ({message.get('speakerTitle', 'Unknown')}): {message.get('text', '')}"
+
+
+def context_budgets(scenario: Optional[str]) -> Dict[str, int]:
+    """取得情境的上下文視窗大小 (情境覆寫優先於預設值)"""
+    budgets = {"discussion": CONTEXT_CONFIG["discussion"], "conclusion": CONTEXT_CONFIG["conclusion"]}
+    budgets.update(CONTEXT_CONFIG.get("scenarios", {}).get(scenario or "", {}))
+    return budgets
+
+
+class ConferenceContext:
+    """會議的滾動上下文緩衝區"""
+
+    # 討論提示詞沿用原本以字面 "\n" 分隔發言的格式
+    DISCUSSION_SEPARATOR = "\\n"
+    CONCLUSION_SEPARATOR = "\n"
+
+    def __init__(self, discussion_window: int, conclusion_window: int):
+        self.discussion_window = discussion_window
+        self.conclusion_window = conclusion_window
+        # (格式化後的行, 估算 token 數)
+        self._lines: Deque[Tuple[str, int]] = deque(maxlen=max(discussion_window, conclusion_window, 1))
+        # 已組合好的視窗字串，新增消息時失效
+        self._cache: Dict[Tuple[int, str, Optional[int]], str] = {}
+
+    @classmethod
+    def for_scenario(cls, scenario: Optional[str], messages: Iterable[dict] = ()) -> "ConferenceContext":
+        """依情境預算建立上下文，並載入既有消息"""
+        budgets = context_budgets(scenario)
+        context = cls(budgets["discussion"], budgets["conclusion"])
+        for message in messages:
+            context.append(message)
+        return context
+
+    def append(self, message: dict):
+        """加入一則新消息"""
+        line = format_context_line(message)
+        self._lines.append((line, estimate_tokens(line)))
+        self._cache.clear()
+
+    def _window(self, size: int, separator: str, max_tokens: Optional[int]) -> str:
+        """取最近 size 行；指定 max_tokens 時由最舊的一行開始捨棄直到符合預算"""
+        key = (size, separator, max_tokens)
+        if key not in self._cache:
+            separator_tokens = estimate_tokens(separator)
+            selected = []
+            used = 0
+            for line, tokens in islice(reversed(self._lines), size):
+                cost = tokens + (separator_tokens if selected else 0)
+                if max_tokens is not None and used + cost > max_tokens:
+                    break
+                selected.append(line)
+                used += cost
+            self._cache[key] = separator.join(reversed(selected))
+        return self._cache[key]
+
+    def discussion(self, max_tokens: Optional[int] = None) -> str:
+        """討論發言使用的最近上下文"""
+        return self._window(self.discussion_window, self.DISCUSSION_SEPARATOR, max_tokens)
+
+    def conclusion(self, max_tokens: Optional[int] = None) -> str:
+        """秘書總結使用的上下文"""
+        return self._window(self.conclusion_window, self.CONCLUSION_SEPARATOR, max_tokens)
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+
+def assemble_prompt(stage: str, render: Callable[[str, str], str], notes: str = "",
+                    context: Optional[Callable[[Optional[int]], str]] = None) -> str:
+    """
+    在階段的 token 預算 (PROMPT_BUDGET_CONFIG) 內組合提示詞
+    render(notes, context) 返回完整提示詞，notes 為空字串時應省略補充資料段落。
+    補充資料有上下文時最多佔預算的 notes_share，剩餘預算由最新的上下文依序填入。
+    """
+    budget = PROMPT_BUDGET_CONFIG[stage]
+    base_tokens = estimate_tokens(render("", ""))
+    notes = (notes or "").strip()
+    if notes:
+        notes_budget = budget - base_tokens
+        if context:
+            notes_budget = min(notes_budget, int(budget * PROMPT_BUDGET_CONFIG["notes_share"]))
+        notes = truncate_to_tokens(notes, max(notes_budget, 0))
+        # 補充資料段落的標題等固定文字也計入預算
+        overflow = estimate_tokens(render(notes, "")) - budget
+        if notes and overflow > 0:
+            notes = truncate_to_tokens(notes, max(estimate_tokens(notes) - overflow, 0))
+    context_text = context(max(budget - estimate_tokens(render(notes, "")), 0)) if context else ""
+    prompt = render(notes, context_text)
+    if base_tokens > budget:
+        logger.warning(f"{stage} 階段的提示詞模板估算 {base_tokens} tokens，已超過預算 {budget}")
+    return prompt
+
+
+def assemble_prefix(stage: str, render: Callable[[str], str], notes: str = "",
+                    reserve_tokens: int = 0, with_context: bool = False) -> str:
+    """
+    組合整場會議固定不變的提示詞前綴 (角色、指示、補充資料)
+    render(notes) 返回前綴，notes 為空字串時應省略補充資料段落。
+    reserve_tokens 為預留給變動部分的預算；with_context 時補充資料最多佔預算的 notes_share。
+    截斷只取決於前綴本身，每次發言都得到逐位元組相同的前綴，可命中供應商端的提示詞快取。
+    """
+    budget = PROMPT_BUDGET_CONFIG[stage]
+    notes = (notes or "").strip()
+    if notes:
+        notes_budget = budget - reserve_tokens - estimate_tokens(render(""))
+        if with_context:
+            notes_budget = min(notes_budget, int(budget * PROMPT_BUDGET_CONFIG["notes_share"]))
+        notes = truncate_to_tokens(notes, max(notes_budget, 0))
+    return render(notes)
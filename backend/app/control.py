@@ -0,0 +1,105 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 會議執行控制
+
+每場會議一個 ConferenceControl：
+- 暫停以 asyncio.Event 表示，流程在檢查點等待事件，恢復時立即繼續，暫停中的會議不佔用任何喚醒
+- 推進會議的協程都以受追蹤的任務執行，結束會議時一併取消，
+  取消會傳遞到等待中的 LLM 請求 (排程器佇列、串流與預先生成)，不再繼續消耗 token
+- 每場會議只有一個流程推進任務 (runner)，重複啟動是冪等的，會議一律自動執行到結束
+- 客戶端的控制指令放入會議的指令信箱，由信箱的消費任務依序執行；
+  WebSocket 讀取迴圈只負責放入信箱，不論一輪討論多長，暫停與結束都能立即處理
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Coroutine, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 指令信箱的容量，已滿時捨棄新的指令
+MAILBOX_SIZE = 64
+
+
+class ConferenceControl:
+    """單場會議的流程推進、暫停、恢復與取消控制"""
+
+    def __init__(self, conference_id: str):
+        self.conference_id = conference_id
+        # 設定 (set) 表示會議正在進行，清除表示暫停
+        self._running = asyncio.Event()
+        self._running.set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.ended = False
+        # 唯一的流程推進任務
+        self._runner: Optional[asyncio.Task] = None
+        self.completed_rounds = 0
+        # 指令信箱：(指令名稱, 處理函數)；消費任務在信箱清空後結束，有新指令時再啟動
+        self._mailbox: "asyncio.Queue[Tuple[str, Callable[[], Awaitable[None]]]]" = asyncio.Queue(MAILBOX_SIZE)
+        self._consumer: Optional[asyncio.Task] = None
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    async def checkpoint(self):
+        """暫停時等待恢復；會議已結束時以 CancelledError 中止呼叫端的流程"""
+        if self.paused and not self.ended:
+            logger.debug(f"會議 {self.conference_id} 已暫停，等待恢復...")
+            await self._running.wait()
+        if self.ended:
+            raise asyncio.CancelledError(f"會議 {self.conference_id} 已結束")
+
+    def start(self, coroutine: Coroutine) -> asyncio.Task:
+        """以受追蹤的任務執行推進會議的協程"""
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def ensure_runner(self, factory: Callable[[], Coroutine]) -> Optional[asyncio.Task]:
+        """冪等地啟動會議唯一的流程推進任務，已啟動時直接返回原任務；會議已結束時返回 None"""
+        if self._runner is None and not self.ended:
+            self._runner = self.start(factory())
+        return self._runner
+
+    @property
+    def runner(self) -> Optional[asyncio.Task]:
+        return self._runner
+
+    def post(self, command: str, handler: Callable[[], Awaitable[None]]) -> bool:
+        """把指令放入信箱並立即返回，指令依到達順序執行；信箱已滿時返回 False"""
+        try:
+            self._mailbox.put_nowait((command, handler))
+        except asyncio.QueueFull:
+            logger.warning(f"會議 {self.conference_id} 的指令信箱已滿，捨棄指令: {command}")
+            return False
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.create_task(self._consume())
+        return True
+
+    async def _consume(self):
+        while not self._mailbox.empty():
+            command, handler = self._mailbox.get_nowait()
+            try:
+                await handler()
+            except Exception as e:
+                logger.error(f"會議 {self.conference_id} 執行指令 {command} 時出錯: {str(e)}")
+
+    @property
+    def running_tasks(self) -> int:
+        return sum(1 for task in self._tasks if not task.done())
+
+    def cancel(self):
+        """結束會議：喚醒暫停中的流程並取消所有受追蹤的任務 (呼叫端本身的任務除外)"""
+        self.ended = True
+        self._running.set()
+        current = asyncio.current_task()
+        for task in list(self._tasks):
+            if task is not current and not task.done():
+                task.cancel()
@@ -0,0 +1,54 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 會議事件記錄
+
+每場會議的廣播事件帶有遞增的序號 (seq)，最近的事件以已編碼的文字幀保存在有界的重播緩衝區。
+重新連線的客戶端以 ?since=<seq> 連接時，只需補送錯過的事件；
+錯過的事件已不在緩衝區內時，改送分段的會議快照。
+"""
+
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+from app.connections import Frame
+
+
+class EventLog:
+    """會議事件的序號與重播緩衝區"""
+
+    def __init__(self, capacity: int, last_seq: int = 0):
+        self.last_seq = last_seq
+        self._frames: Deque[Frame] = deque(maxlen=max(capacity, 1))
+
+    def publish(self, message: Dict[str, Any]) -> Frame:
+        """為事件編上下一個序號並編碼，保存到重播緩衝區"""
+        self.last_seq += 1
+        frame = Frame.encode({**message, "seq": self.last_seq})
+        self._frames.append(frame)
+        return frame
+
+    def record(self, frame: Frame) -> bool:
+        """
+        保存由其他工作程序編上序號的事件 (會議在其他工作程序執行時)，返回是否為新事件
+        序號不連續時清空緩衝區，之後無法補送的重新連線改用快照
+        """
+        if frame.seq is None or frame.seq <= self.last_seq:
+            return False
+        if frame.seq != self.last_seq + 1:
+            self._frames.clear()
+        self.last_seq = frame.seq
+        self._frames.append(frame)
+        return True
+
+    def since(self, seq: int) -> Optional[List[Frame]]:
+        """序號 seq 之後的所有事件；缺少部分事件 (已被淘汰或序號無效) 時返回 None"""
+        if seq == self.last_seq:
+            return []
+        if seq > self.last_seq or seq < 0 or not self._frames or self._frames[0].seq > seq + 1:
+            return None
+        return list(islice(self._frames, seq + 1 - self._frames[0].seq, None))
+
+    @property
+    def first_seq(self) -> Optional[int]:
+        """緩衝區中最舊事件的序號"""
+        return self._frames[0].seq if self._frames else None
@@ -0,0 +1,42 @@
+"""
+LLM 存取層
+
+集中管理所有會議共用的非同步 LLM 呼叫介面、供應商與排程器。
+"""
+
+from .client import (
+    aclosing,
+    set_provider,
+    get_provider,
+    set_api_key,
+    get_api_key,
+    is_available,
+    close_async_client,
+    create_chat_completion,
+    stream_chat_completion
+)
+from .cache import response_cache
+from .semantic_cache import introduction_cache
+from .scheduler import scheduler
+from .tokens import estimate_tokens, estimate_messages_tokens, truncate_to_tokens
+from .usage import usage_stats
+
+# 允許外部直接導入這些名稱
+__all__ = [
+    "set_provider",
+    "get_provider",
+    "set_api_key",
+    "get_api_key",
+    "is_available",
+    "close_async_client",
+    "create_chat_completion",
+    "stream_chat_completion",
+    "aclosing",
+    "scheduler",
+    "response_cache",
+    "introduction_cache",
+    "usage_stats",
+    "estimate_tokens",
+    "estimate_messages_tokens",
+    "truncate_to_tokens"
+]
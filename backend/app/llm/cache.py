@@ -0,0 +1,208 @@
+"""
+LLM 回應快取 (完全比對)
+
+以 (供應商, 模型, 系統訊息, 使用者提示, 溫度, 回應長度上限) 為鍵：
+- 記憶體層：有界 LRU，命中時不需任何 I/O
+- 磁碟層：SQLite，跨程序與重啟保留，依筆數上限淘汰
+兩層都依建立時間套用同一個 TTL (從磁碟載入記憶體的項目保留原建立時間)。
+是否使用快取由呼叫端提供的階段名稱與溫度決定 (LLM_CACHE_CONFIG 中的政策)。
+快取預設停用，啟用時也只快取明確列出的階段，避免讓本應多樣化的討論發言變成固定內容。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import LLM_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(provider: str, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+    """計算請求的快取鍵"""
+    payload = json.dumps([provider, model, messages, temperature, max_tokens], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """SQLite 磁碟層 (同步介面，由 ResponseCache 在執行緒中呼叫)"""
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """返回 (回應文字, 建立時間)；不存在或已過期時返回 None"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT text, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row[0], row[1]
+
+    def set(self, key: str, text: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, text, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, text, now, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """刪除過期項目，並在超過筆數上限時淘汰最久未使用的項目"""
+        if self.ttl:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ResponseCache:
+    """兩層的完全比對回應快取"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        # 鍵 -> (回應文字, 建立時間)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        disk_path = os.getenv("LLM_CACHE_PATH") or config.get("disk_path")
+        self._disk = DiskCache(disk_path, config["ttl"], config["max_disk_entries"]) if disk_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def should_cache(self, stage: Optional[str], temperature: float) -> bool:
+        """依政策判斷此請求是否使用快取：階段在白名單內，或溫度不高於設定上限"""
+        if not self.config["enabled"]:
+            return False
+        if stage and stage in self.config["stages"]:
+            return True
+        max_temperature = self.config.get("max_temperature")
+        return max_temperature is not None and temperature <= max_temperature
+
+    def _expired(self, created_at: float) -> bool:
+        ttl = self.config["ttl"]
+        return bool(ttl) and time.time() - created_at > ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._memory[key]
+        if self._disk:
+            try:
+                entry = await asyncio.to_thread(self._disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"讀取 LLM 磁碟快取失敗: {str(e)}")
+                entry = None
+            if entry is not None:
+                self._remember(key, *entry)
+                self.disk_hits += 1
+                return entry[0]
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, text: str):
+        if not text:
+            return
+        self._remember(key, text, time.time())
+        self.stores += 1
+        if self._disk:
+            try:
+                await asyncio.to_thread(self._disk.set, key, text)
+            except sqlite3.Error as e:
+                logger.warning(f"寫入 LLM 磁碟快取失敗: {str(e)}")
+
+    def _remember(self, key: str, text: str, created_at: float):
+        self._memory[key] = (text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config["memory_entries"]:
+            self._memory.popitem(last=False)
+
+    async def clear(self):
+        """清除兩層快取 (計數器保留)"""
+        self._memory.clear()
+        if self._disk:
+            await asyncio.to_thread(self._disk.clear)
+
+    def close(self):
+        if self._disk:
+            self._disk.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.config["enabled"],
+            "stages": list(self.config["stages"]),
+            "max_temperature": self.config.get("max_temperature"),
+            "memory_entries": len(self._memory),
+            "disk_path": self._disk.path if self._disk else None,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+
+# 整個程序共用的快取
+response_cache = ResponseCache(LLM_CACHE_CONFIG)
@@ -0,0 +1,202 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 非同步 LLM 引擎
+
+所有會議的 LLM 請求都以 await 方式等待網路，不會阻塞事件迴圈，
+使多場會議、WebSocket 與 REST 請求可以同時進行。
+實際的生成由可替換的供應商 (app.llm.providers) 完成：
+預設使用 OpenAI (共用 httpx 長連線池)，也可切換為不連網的模擬供應商。
+呼叫端標明階段 (stage) 時，符合快取政策的請求會先查詢回應快取，命中時不佔用排程名額。
+供應商回報的用量 (含命中提示詞快取的輸入 token 數) 依階段累計於 usage_stats。
+"""
+
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from app.config import AI_CONFIG, LLM_PROVIDER_CONFIG
+from .cache import make_cache_key, response_cache
+from .semantic_cache import introduction_cache
+from .providers import LLMProvider, MockProvider, OpenAIProvider, ProviderError, TokenUsage
+from .scheduler import scheduler, estimate_request_tokens
+from .tokens import estimate_tokens
+from .usage import usage_stats
+
+logger = logging.getLogger(__name__)
+
+try:
+    from contextlib import aclosing
+except ImportError:  # Python 3.9
+    @asynccontextmanager
+    async def aclosing(generator):
+        """離開區塊時關閉非同步產生器 (contextlib.aclosing 自 Python 3.10 起提供)"""
+        try:
+            yield generator
+        finally:
+            await generator.aclose()
+
+# OpenAI 供應商永遠存在，API 金鑰的更新都作用在它身上
+_openai_provider = OpenAIProvider(base_url=os.getenv("LLM_BASE_URL") or LLM_PROVIDER_CONFIG["base_url"])
+
+
+def _create_provider(name: str) -> LLMProvider:
+    if name == "openai":
+        return _openai_provider
+    if name == "mock":
+        return MockProvider(LLM_PROVIDER_CONFIG["mock"])
+    raise ValueError(f"未知的 LLM 供應商: {name}")
+
+
+# 啟動時依環境變數 LLM_PROVIDER (或配置) 選擇供應商
+_provider: LLMProvider = _create_provider(os.getenv("LLM_PROVIDER") or LLM_PROVIDER_CONFIG["provider"])
+
+
+def set_provider(provider: Union[str, LLMProvider]):
+    """切換目前使用的供應商 (名稱或供應商實例)"""
+    global _provider
+    _provider = _create_provider(provider) if isinstance(provider, str) else provider
+    logger.info(f"LLM 供應商已切換為: {_provider.name}")
+
+
+def get_provider() -> LLMProvider:
+    """取得目前使用的供應商"""
+    return _provider
+
+
+def set_api_key(api_key: Optional[str]):
+    """設定 OpenAI API 金鑰，底層連線池保持不變"""
+    _openai_provider.set_api_key(api_key)
+
+
+def get_api_key() -> Optional[str]:
+    """取得目前使用中的 API 金鑰"""
+    return _openai_provider.api_key
+
+
+def is_available() -> bool:
+    """目前的供應商是否可接受請求"""
+    return _provider.is_available()
+
+
+async def close_async_client():
+    """釋放供應商持有的連線池與快取資料庫（應用關閉時呼叫）"""
+    await _openai_provider.aclose()
+    if _provider is not _openai_provider:
+        await _provider.aclose()
+    response_cache.close()
+    introduction_cache.close()
+
+
+def _cache_key_for(provider: LLMProvider, stage: Optional[str], messages: List[Dict[str, str]], model: str,
+                   temperature: float, max_tokens: int) -> Optional[str]:
+    """符合快取政策時返回快取鍵，否則返回 None"""
+    if not response_cache.should_cache(stage, temperature):
+        return None
+    return make_cache_key(provider.name, model, messages, temperature, max_tokens)
+
+
+def _observe_error(ticket, error: Exception):
+    """將供應商錯誤回應的標頭交給排程器 (例如 429 的 retry-after)"""
+    if isinstance(error, ProviderError):
+        ticket.observe_headers(error.headers, error.status_code)
+
+
+async def create_chat_completion(
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+    conference_id: Optional[str] = None,
+    stage: Optional[str] = None
+) -> str:
+    """
+    非同步生成完整回應並返回文字內容
+    請求會先經過全局排程器取得名額 (依 conference_id 公平排隊)
+    stage 標明生成階段，用於判斷是否使用回應快取
+
+    供應商不可用時拋出 RuntimeError，其餘錯誤由呼叫端處理。
+    """
+    provider = _provider
+    model = model or AI_CONFIG["default_model"]
+    temperature = AI_CONFIG["default_temperature"] if temperature is None else temperature
+    max_tokens = max_tokens or AI_CONFIG["max_tokens"]
+    cache_key = _cache_key_for(provider, stage, messages, model, temperature, max_tokens)
+    if cache_key:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    async with scheduler.admit(conference_id, estimate_request_tokens(messages, max_tokens)) as ticket:
+        try:
+            result = await provider.complete(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+        except Exception as e:
+            _observe_error(ticket, e)
+            raise
+        ticket.observe_headers(result.headers)
+        ticket.record_usage(result.total_tokens)
+    if result.usage:
+        usage_stats.record(stage, result.usage)
+    text = result.text.strip()
+    if cache_key:
+        await response_cache.set(cache_key, text)
+    return text
+
+
+async def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+    conference_id: Optional[str] = None,
+    stage: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    以串流方式生成回應，逐段產生增量文字
+    請求會先經過全局排程器取得名額 (依 conference_id 公平排隊)
+    stage 標明生成階段，快取命中時一次產生完整文字
+    呼叫端應以 aclosing() 包住迭代，提前停止或被取消時立即歸還名額並關閉連線
+
+    供應商不可用時拋出 RuntimeError，其餘錯誤由呼叫端處理。
+    """
+    provider = _provider
+    model = model or AI_CONFIG["default_model"]
+    temperature = AI_CONFIG["default_temperature"] if temperature is None else temperature
+    max_tokens = max_tokens or AI_CONFIG["max_tokens"]
+    cache_key = _cache_key_for(provider, stage, messages, model, temperature, max_tokens)
+    if cache_key:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    estimated = estimate_request_tokens(messages, max_tokens)
+    chunks = []
+    reported: List[TokenUsage] = []
+    async with scheduler.admit(conference_id, estimated) as ticket:
+        generated_tokens = 0
+        try:
+            # 本產生器被關閉 (呼叫端停止或被取消) 時一併關閉供應商的串流，再歸還排程名額
+            async with aclosing(provider.stream(
+                messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                on_headers=ticket.observe_headers,
+                on_usage=reported.append
+            )) as deltas:
+                async for delta in deltas:
+                    generated_tokens += estimate_tokens(delta)
+                    chunks.append(delta)
+                    yield delta
+        except Exception as e:
+            _observe_error(ticket, e)
+            raise
+        if reported:
+            ticket.record_usage(reported[-1].total_tokens)
+        else:
+            # 供應商未回報 usage 時，以提示估算值加上實際輸出長度修正
+            ticket.record_usage(estimated - max_tokens + generated_tokens)
+    if reported:
+        usage_stats.record(stage, reported[-1])
+    if cache_key:
+        await response_cache.set(cache_key, "".join(chunks).strip())
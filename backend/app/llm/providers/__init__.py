@@ -0,0 +1,23 @@
+"""
+LLM 供應商
+
+- openai: 透過 AsyncOpenAI 呼叫 OpenAI 或任何相容 API
+- mock: 不連網的確定性模擬供應商，用於壓力測試與離線執行
+"""
+
+from .base import CompletionResult, LLMProvider, ProviderError, TokenUsage
+from .openai_provider import OpenAIProvider
+from .mock_provider import MockProvider
+
+# 可用的供應商名稱
+PROVIDER_NAMES = ["openai", "mock"]
+
+__all__ = [
+    "CompletionResult",
+    "LLMProvider",
+    "ProviderError",
+    "TokenUsage",
+    "OpenAIProvider",
+    "MockProvider",
+    "PROVIDER_NAMES"
+]
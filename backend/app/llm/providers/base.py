@@ -0,0 +1,65 @@
+"""
+LLM 供應商介面
+
+每個供應商 (OpenAI、本地模擬等) 實作相同的非同步介面，
+由 app.llm.client 統一負責排程、串流與錯誤處理。
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Mapping, Optional
+
+
+@dataclass
+class TokenUsage:
+    """供應商回報的 token 用量；cached_tokens 為命中供應商端提示詞快取的輸入 token 數"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass
+class CompletionResult:
+    """一次完整生成的結果"""
+    text: str
+    total_tokens: Optional[int] = None
+    headers: Optional[Mapping[str, str]] = None
+    usage: Optional[TokenUsage] = None
+
+
+class ProviderError(Exception):
+    """供應商回傳的錯誤，附帶 HTTP 狀態碼與回應標頭 (供排程器調整額度)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, headers: Optional[Mapping[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class LLMProvider(ABC):
+    """LLM 供應商基底類別"""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """供應商是否已可接受請求 (例如已設置 API 金鑰)"""
+        return True
+
+    @abstractmethod
+    async def complete(self, messages: List[Dict[str, str]], *, model: str, temperature: float,
+                       max_tokens: int) -> CompletionResult:
+        """生成完整回應"""
+
+    @abstractmethod
+    def stream(self, messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int,
+               on_headers: Optional[Callable[[Mapping[str, str]], None]] = None,
+               on_usage: Optional[Callable[[TokenUsage], None]] = None) -> AsyncIterator[str]:
+        """以非同步迭代器逐段產生增量文字；取得回應標頭後呼叫 on_headers，取得用量 (若有) 後呼叫 on_usage"""
+
+    async def aclose(self):
+        """釋放供應商持有的連線等資源"""
+        return None
@@ -0,0 +1,152 @@
+"""
+本地模擬供應商
+
+不連網、不花費 token 的確定性 LLM 替身，用於壓力測試與離線跑完整場會議：
+- 可設定首字延遲分佈 (fixed / uniform / normal / lognormal / exponential)
+- 依 tokens_per_second 模擬逐字輸出速度
+- 依 error_rate 注入錯誤 (例如 429 搭配 retry-after)
+- 回應文字由種子與請求內容決定，同樣的請求永遠得到同樣的文字
+- 模擬供應商端的提示詞前綴快取，回報 usage 中的 cached_tokens (以字數代替 token 數)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional
+
+from .base import CompletionResult, LLMProvider, ProviderError, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+# 模擬回應使用的罐頭句子
+CANNED_SENTENCES = [
+    "從我的職責角度來看，這個議題的關鍵在於資源配置是否到位。",
+    "我建議先以小規模試點驗證可行性，再逐步擴大範圍。",
+    "根據目前掌握的數據，市場需求仍有明顯的成長空間。",
+    "我們需要明確各部門的分工與時間表，避免進度延誤。",
+    "成本控制是不可忽視的一環，預算必須有清楚的上限。",
+    "同意前一位的看法，但我想補充風險評估的部分。",
+    "技術上是可行的，不過需要預留足夠的測試與整合時間。",
+    "客戶回饋顯示，使用體驗仍是我們最需要加強的地方。",
+    "建議設立明確的衡量指標，每季檢視一次執行成果。",
+    "人力安排方面，可能需要跨部門支援或短期招募。",
+    "這個方向與公司的長期策略一致，值得優先投入。",
+    "我們也應該評估競爭對手的動向，保留調整的彈性。"
+]
+
+
+def _sample(rng: random.Random, spec: Dict[str, Any]) -> float:
+    """依延遲分佈設定抽樣 (秒)，結果不小於 0"""
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "uniform":
+        value = rng.uniform(spec.get("min", 0.0), spec.get("max", 0.0))
+    elif distribution == "normal":
+        value = rng.gauss(spec.get("mean", 0.0), spec.get("stddev", 0.0))
+    elif distribution == "lognormal":
+        median = spec.get("median", 0.0)
+        value = median * rng.lognormvariate(0.0, spec.get("sigma", 0.0)) if median > 0 else 0.0
+    elif distribution == "exponential":
+        mean = spec.get("mean", 0.0)
+        value = rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+    else:
+        value = spec.get("value", 0.0)
+    return max(0.0, value)
+
+
+class MockProvider(LLMProvider):
+    """確定性的本地模擬供應商"""
+
+    name = "mock"
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.seed = config.get("seed", 0)
+        # 延遲與錯誤注入使用整個執行期共用的亂數序列 (同一種子可重現)
+        self._rng = random.Random(self.seed)
+        self.requests = 0
+        self.errors = 0
+        # 曾出現過的提示詞前綴 (以區塊為單位的累積雜湊)
+        self._prefix_blocks: "OrderedDict[bytes, None]" = OrderedDict()
+
+    def _text_for(self, messages: List[Dict[str, str]], model: str, max_tokens: int) -> str:
+        """依種子與請求內容產生固定的罐頭回應"""
+        digest = hashlib.sha256(
+            json.dumps([self.seed, model, messages], ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).digest()
+        rng = random.Random(digest)
+        low, high = self.config.get("response_chars", [60, 200])
+        target = min(rng.randint(low, high), max_tokens)
+        sentences = []
+        length = 0
+        while length < target:
+            sentence = rng.choice(CANNED_SENTENCES)
+            sentences.append(sentence)
+            length += len(sentence)
+        return "".join(sentences)[:max(target, 1)]
+
+    def _usage_for(self, messages: List[Dict[str, str]], text: str) -> TokenUsage:
+        """計算用量，並依曾出現過的最長區塊前綴模擬快取命中的 token 數"""
+        prompt = "".join(f"{m.get('role')}\x1f{m.get('content') or ''}\x1e" for m in messages)
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages)
+        cache_config = self.config.get("prompt_cache", {})
+        cached = 0
+        if cache_config.get("enabled") and len(prompt) >= cache_config.get("min_chars", 1024):
+            block = cache_config.get("block_chars", 128)
+            digest = hashlib.sha256()
+            for end in range(block, len(prompt) + 1, block):
+                digest.update(prompt[end - block:end].encode("utf-8"))
+                key = digest.digest()
+                if key in self._prefix_blocks:
+                    self._prefix_blocks.move_to_end(key)
+                    cached = end
+                else:
+                    self._prefix_blocks[key] = None
+            while len(self._prefix_blocks) > cache_config.get("max_blocks", 100000):
+                self._prefix_blocks.popitem(last=False)
+        return TokenUsage(prompt_tokens=prompt_tokens, completion_tokens=len(text), cached_tokens=min(cached, prompt_tokens))
+
+    async def _before_response(self) -> None:
+        """模擬首字延遲與錯誤注入"""
+        self.requests += 1
+        delay = _sample(self._rng, self.config.get("latency", {}))
+        failed = self._rng.random() < self.config.get("error_rate", 0.0)
+        status_code = self._rng.choice(self.config.get("error_status_codes", [500])) if failed else None
+        if delay:
+            await asyncio.sleep(delay)
+        if failed:
+            self.errors += 1
+            headers = {}
+            if status_code == 429:
+                headers["retry-after"] = str(self.config.get("retry_after", 1.0))
+            raise ProviderError(f"模擬供應商注入錯誤 (HTTP {status_code})", status_code, headers)
+
+    async def complete(self, messages: List[Dict[str, str]], *, model: str, temperature: float,
+                       max_tokens: int) -> CompletionResult:
+        await self._before_response()
+        text = self._text_for(messages, model, max_tokens)
+        tokens_per_second = self.config.get("tokens_per_second", 0)
+        if tokens_per_second:
+            await asyncio.sleep(len(text) / tokens_per_second)
+        usage = self._usage_for(messages, text)
+        return CompletionResult(text=text, total_tokens=usage.total_tokens, headers={}, usage=usage)
+
+    async def stream(self, messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int,
+                     on_headers: Optional[Callable[[Mapping[str, str]], None]] = None,
+                     on_usage: Optional[Callable[[TokenUsage], None]] = None) -> AsyncIterator[str]:
+        await self._before_response()
+        if on_headers:
+            on_headers({})
+        text = self._text_for(messages, model, max_tokens)
+        tokens_per_second = self.config.get("tokens_per_second", 0)
+        # 每次送出約 50 毫秒份量的文字，避免高速率時產生過多極小片段
+        chunk_size = max(1, int(tokens_per_second * 0.05)) if tokens_per_second else len(text)
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start:start + chunk_size]
+            if tokens_per_second:
+                await asyncio.sleep(len(chunk) / tokens_per_second)
+            yield chunk
+        if on_usage:
+            on_usage(self._usage_for(messages, text))
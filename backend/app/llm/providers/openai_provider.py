@@ -0,0 +1,178 @@
+"""
+OpenAI 供應商
+
+整個程序共用一個長期存在的 httpx.AsyncClient 連線池，
+並在其上建立 AsyncOpenAI 客戶端；更換 API 金鑰時只重建輕量的客戶端包裝。
+"""
+
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional
+
+import httpx
+import openai
+
+from app.config import LLM_CLIENT_CONFIG
+from .base import CompletionResult, LLMProvider, ProviderError, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+
+def _mask_key(api_key: str) -> str:
+    """遮蔽 API 金鑰用於日誌"""
+    return (api_key[:5] + "..." + api_key[-5:]) if len(api_key) > 10 else "***"
+
+
+def _to_provider_error(error: Exception) -> Exception:
+    """將 OpenAI 的 HTTP 錯誤轉為 ProviderError，保留狀態碼與標頭"""
+    if isinstance(error, openai.APIStatusError):
+        provider_error = ProviderError(str(error), error.status_code, error.response.headers)
+        provider_error.__cause__ = error
+        return provider_error
+    return error
+
+
+def _field(obj: Any, name: str) -> Any:
+    """讀取回應欄位 (新版 API 的欄位在舊版 SDK 中可能以 dict 形式保留)"""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _to_usage(usage: Any) -> Optional[TokenUsage]:
+    """將回應中的 usage 轉為 TokenUsage，包含 prompt_tokens_details.cached_tokens"""
+    if usage is None:
+        return None
+    details = _field(usage, "prompt_tokens_details")
+    return TokenUsage(
+        prompt_tokens=_field(usage, "prompt_tokens") or 0,
+        completion_tokens=_field(usage, "completion_tokens") or 0,
+        cached_tokens=_field(details, "cached_tokens") or 0
+    )
+
+
+class OpenAIProvider(LLMProvider):
+    """透過 AsyncOpenAI 呼叫 OpenAI (或任何相容 API 的 base_url)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self._api_key = api_key
+        self._base_url = base_url
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional["openai.AsyncOpenAI"] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key
+
+    def set_api_key(self, api_key: Optional[str]):
+        """更新 API 金鑰，底層連線池保持不變"""
+        self._api_key = api_key
+        self._client = None
+        if api_key:
+            logger.info(f"LLM 引擎已更新 API 金鑰 (已遮蔽: {_mask_key(api_key)})")
+
+    def is_available(self) -> bool:
+        return self.get_client() is not None
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """取得共用的 httpx 連線池，必要時建立"""
+        if self._http_client is None or self._http_client.is_closed:
+            limits = httpx.Limits(
+                max_connections=LLM_CLIENT_CONFIG["max_connections"],
+                max_keepalive_connections=LLM_CLIENT_CONFIG["max_keepalive_connections"],
+                keepalive_expiry=LLM_CLIENT_CONFIG["keepalive_expiry"]
+            )
+            timeout = httpx.Timeout(
+                LLM_CLIENT_CONFIG["timeout"],
+                connect=LLM_CLIENT_CONFIG["connect_timeout"]
+            )
+            self._http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+            logger.info(f"已建立共用 LLM 連線池 (最大連線數: {limits.max_connections}, 保持連線數: {limits.max_keepalive_connections})")
+        return self._http_client
+
+    def get_client(self) -> Optional["openai.AsyncOpenAI"]:
+        """取得共用的 AsyncOpenAI 客戶端，未設置金鑰時返回 None"""
+        if not self._api_key:
+            logger.warning("未設置 OpenAI API 金鑰，無法創建客戶端")
+            return None
+
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._base_url,
+                max_retries=LLM_CLIENT_CONFIG["max_retries"],
+                http_client=self._get_http_client()
+            )
+            logger.info(f"成功創建共用 AsyncOpenAI 客戶端 (OpenAI庫版本: {getattr(openai, '__version__', '未知')})")
+        return self._client
+
+    def _require_client(self) -> "openai.AsyncOpenAI":
+        client = self.get_client()
+        if not client:
+            raise RuntimeError("未配置OpenAI API或客戶端創建失敗")
+        return client
+
+    async def complete(self, messages: List[Dict[str, str]], *, model: str, temperature: float,
+                       max_tokens: int) -> CompletionResult:
+        client = self._require_client()
+        try:
+            raw = await client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        except Exception as e:
+            raise _to_provider_error(e)
+        response = raw.parse()
+        return CompletionResult(
+            text=response.choices[0].message.content or "",
+            total_tokens=response.usage.total_tokens if response.usage else None,
+            headers=raw.headers,
+            usage=_to_usage(response.usage)
+        )
+
+    async def stream(self, messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int,
+                     on_headers: Optional[Callable[[Mapping[str, str]], None]] = None,
+                     on_usage: Optional[Callable[[TokenUsage], None]] = None) -> AsyncIterator[str]:
+        client = self._require_client()
+        # 要求伺服器在串流最後附上一個只含 usage 的片段
+        extra_body = {"stream_options": {"include_usage": True}} if LLM_CLIENT_CONFIG.get("stream_usage") else None
+        try:
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                extra_body=extra_body
+            )
+        except Exception as e:
+            raise _to_provider_error(e)
+        try:
+            if on_headers:
+                on_headers(stream.response.headers)
+
+            async for chunk in stream:
+                usage = _to_usage(_field(chunk, "usage"))
+                if usage and on_usage:
+                    on_usage(usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            # 呼叫端提前停止或被取消 (例如結束會議) 時立即關閉回應，把連線歸還連線池
+            await stream.response.aclose()
+
+    async def aclose(self):
+        """關閉共用連線池（應用關閉時呼叫）"""
+        self._client = None
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+            logger.info("已關閉共用 LLM 連線池")
+        self._http_client = None
@@ -0,0 +1,383 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 全局 LLM 准入排程器
+
+所有會議的 LLM 請求在送出前都必須先向排程器取得名額：
+- 以令牌桶控制每分鐘請求數 (RPM) 與每分鐘 token 數 (TPM)
+- 依據供應商回傳的 x-ratelimit-* 標頭與 429 的 retry-after 動態收斂
+- 各會議 (conference_id) 各自排隊，以虛擬時間的加權公平佇列 (start-time fair queuing) 分配名額，
+  避免長時間的多輪會議餓死短會議；一次只發出一個請求的會議短暫沒有排隊時保留它的進度 (最多 max_lag)，
+  權重對逐一發言的討論同樣有效
+- 提供佇列深度與等待時間統計，供監控使用
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Mapping, Optional, Tuple
+
+from app.config import LLM_SCHEDULER_CONFIG
+from .tokens import estimate_messages_tokens
+
+logger = logging.getLogger(__name__)
+
+# 沒有會議上下文的請求 (例如 API 測試頁面) 共用此佇列
+DEFAULT_QUEUE = "_default"
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """解析 x-ratelimit-reset-* 標頭 (例如 "6m0s"、"1.5s"、"20ms")，返回秒數"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """以固定速率補充的令牌桶，容量即每分鐘額度"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """取得足夠令牌所需等待的秒數"""
+        # 單一請求超過整桶容量時，只要求桶滿即可，避免永遠無法放行
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.rate
+
+    def set_capacity(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = min(self.tokens, self.capacity)
+
+
+class SchedulerTicket:
+    """一個已取得名額的 LLM 請求；請求結束後用來回報實際用量與回應標頭"""
+
+    def __init__(self, scheduler: "LLMScheduler", conference_id: str, estimated_tokens: int, enqueued_at: float):
+        self.scheduler = scheduler
+        self.conference_id = conference_id
+        self.estimated_tokens = estimated_tokens
+        self.enqueued_at = enqueued_at
+        self.granted_at: Optional[float] = None
+        self.used_tokens: Optional[int] = None
+        # 放行時實際從 token 桶扣除的數量 (超過桶容量的預估只扣到容量)
+        self.charged_tokens = 0
+        # 公平佇列的虛擬開始時間
+        self.start_tag = 0.0
+        self.future: Optional[asyncio.Future] = None
+
+    @property
+    def wait_time(self) -> float:
+        if self.granted_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.granted_at - self.enqueued_at
+
+    def record_usage(self, total_tokens: Optional[int]):
+        """回報供應商計算的實際 token 用量 (用於修正預估值)"""
+        if total_tokens is not None:
+            self.used_tokens = int(total_tokens)
+
+    def observe_headers(self, headers: Optional[Mapping[str, str]], status_code: Optional[int] = None):
+        """將回應標頭交給排程器以調整額度"""
+        self.scheduler.observe_headers(headers, status_code)
+
+
+class LLMScheduler:
+    """程序層級的 LLM 准入排程器"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int,
+                 default_weight: int = 1, enabled: bool = True, max_lag: float = 4.0):
+        self.enabled = enabled
+        self.configured_rpm = requests_per_minute
+        self.configured_tpm = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.default_weight = max(1, int(default_weight))
+        self.max_lag = max(0.0, float(max_lag))
+
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._queues: Dict[str, Deque[SchedulerTicket]] = {}
+        self._weights: Dict[str, int] = {}
+        # 排隊中的請求依 (虛擬開始時間, 到達順序) 排序；已取消的項目在到達堆頂時略過
+        self._waiting: List[Tuple[float, int, SchedulerTicket]] = []
+        self._arrivals = itertools.count()
+        # 各會議最後一個請求的虛擬結束時間
+        self._finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # 統計資料
+        self._admitted = 0
+        self._rate_limited = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=200)
+
+    # ---------- 公開介面 ----------
+
+    @property
+    def in_flight(self) -> int:
+        """已放行、尚未結束的請求數"""
+        return self._in_flight
+
+    def set_weight(self, conference_id: str, weight: int):
+        """設定會議的權重 (同時排隊時取得名額的相對比例)"""
+        self._weights[conference_id] = max(1, int(weight))
+
+    def forget(self, conference_id: str):
+        """會議結束後清除其權重設定與公平佇列進度"""
+        self._weights.pop(conference_id, None)
+        if conference_id not in self._queues:
+            self._finish.pop(conference_id, None)
+
+    @asynccontextmanager
+    async def admit(self, conference_id: Optional[str], estimated_tokens: int):
+        """
+        取得一個 LLM 請求名額
+        用法: async with scheduler.admit(conference_id, tokens) as ticket: ...
+        """
+        ticket = await self.acquire(conference_id, estimated_tokens)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    async def acquire(self, conference_id: Optional[str], estimated_tokens: int) -> SchedulerTicket:
+        """排隊等待名額，返回已放行的 ticket"""
+        queue_id = conference_id or DEFAULT_QUEUE
+        ticket = SchedulerTicket(self, queue_id, max(1, int(estimated_tokens)), time.monotonic())
+
+        if not self.enabled:
+            ticket.granted_at = ticket.enqueued_at
+            self._in_flight += 1
+            return ticket
+
+        loop = asyncio.get_running_loop()
+        ticket.future = loop.create_future()
+        queue = self._queues.get(queue_id)
+        if queue is None:
+            queue = self._queues[queue_id] = deque()
+        # 虛擬開始時間：接續會議上一個請求，但最多落後目前的虛擬時間 max_lag (短暫閒置不失去進度，也不能累積過多)
+        weight = self._weights.get(queue_id, self.default_weight)
+        ticket.start_tag = max(self._finish.get(queue_id, self._virtual_time), self._virtual_time - self.max_lag)
+        self._finish[queue_id] = ticket.start_tag + 1.0 / weight
+        heapq.heappush(self._waiting, (ticket.start_tag, next(self._arrivals), ticket))
+        queue.append(ticket)
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            # 排隊中被取消：移出佇列；若剛好已放行，則歸還名額
+            if ticket.granted_at is None:
+                self._remove_waiting(ticket)
+            else:
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: SchedulerTicket):
+        """請求結束，歸還並發名額並以實際用量修正 token 桶"""
+        self._in_flight = max(0, self._in_flight - 1)
+        if ticket.used_tokens is not None and self.enabled:
+            # 以放行時實際扣除的數量為準：多扣的退回，少扣的補扣
+            self._tokens.tokens = min(self._tokens.capacity,
+                                      self._tokens.tokens + ticket.charged_tokens - ticket.used_tokens)
+        if self.enabled:
+            self._dispatch()
+
+    def observe_headers(self, headers: Optional[Mapping[str, str]], status_code: Optional[int] = None):
+        """根據 x-ratelimit-* 與 retry-after 標頭調整額度"""
+        if not headers or not self.enabled:
+            return
+        now = time.monotonic()
+
+        limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+        limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+        if limit_requests:
+            self._requests.set_capacity(min(self.configured_rpm, limit_requests))
+        if limit_tokens:
+            self._tokens.set_capacity(min(self.configured_tpm, limit_tokens))
+
+        # 供應商回報的剩餘額度比本地估計更少時，以供應商為準
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests is not None:
+            self._requests.tokens = min(self._requests.tokens, remaining_requests)
+        if remaining_tokens is not None:
+            self._tokens.tokens = min(self._tokens.tokens, remaining_tokens)
+
+        if status_code == 429:
+            self._rate_limited += 1
+            retry_after = parse_reset_duration(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = max(
+                    parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                    parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+                    1.0
+                )
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            logger.warning(f"LLM 供應商回報速率限制 (429)，暫停放行 {retry_after:.2f} 秒")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回佇列深度、等待時間與額度狀態"""
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        queues = {cid: len(q) for cid, q in self._queues.items() if q}
+        oldest_wait = max((now - q[0].enqueued_at for q in self._queues.values() if q), default=0.0)
+        recent = list(self._recent_waits)
+        return {
+            "enabled": self.enabled,
+            "queue_depth": sum(queues.values()),
+            "queues": queues,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "admitted": self._admitted,
+            "rate_limited": self._rate_limited,
+            "avg_wait": (self._total_wait / self._admitted) if self._admitted else 0.0,
+            "recent_avg_wait": (sum(recent) / len(recent)) if recent else 0.0,
+            "max_wait": self._max_wait,
+            "oldest_wait": oldest_wait,
+            "requests_per_minute": self._requests.capacity,
+            "tokens_per_minute": self._tokens.capacity,
+            "requests_available": round(self._requests.tokens, 2),
+            "tokens_available": round(self._tokens.tokens, 2),
+            "blocked_for": max(0.0, self._blocked_until - now)
+        }
+
+    # ---------- 內部排程 ----------
+
+    def _remove_waiting(self, ticket: SchedulerTicket):
+        queue_id = ticket.conference_id
+        queue = self._queues.get(queue_id)
+        if queue and ticket in queue:
+            # 取消的是最後一個排隊的請求時退回它佔用的虛擬時間
+            if queue[-1] is ticket:
+                self._finish[queue_id] = ticket.start_tag
+            queue.remove(ticket)
+        if queue is not None and not queue:
+            self._queues.pop(queue_id, None)
+
+    def _next_ticket(self) -> Optional[SchedulerTicket]:
+        """虛擬開始時間最早的候選請求 (不移出佇列)；同一會議的請求開始時間遞增，堆頂必為某會議的隊首"""
+        while self._waiting:
+            ticket = self._waiting[0][2]
+            queue = self._queues.get(ticket.conference_id)
+            if queue and queue[0] is ticket:
+                return ticket
+            heapq.heappop(self._waiting)
+        return None
+
+    def _dispatch(self):
+        """在額度允許的範圍內放行排隊中的請求"""
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+
+        while self._in_flight < self.max_concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+
+            wait = max(
+                self._blocked_until - now,
+                self._requests.wait_time(1),
+                self._tokens.wait_time(ticket.estimated_tokens)
+            )
+            if wait > 0:
+                self._schedule_retry(wait)
+                return
+
+            # 放行
+            heapq.heappop(self._waiting)
+            queue_id = ticket.conference_id
+            queue = self._queues[queue_id]
+            queue.popleft()
+            if not queue:
+                del self._queues[queue_id]
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+
+            ticket.charged_tokens = min(ticket.estimated_tokens, self._tokens.capacity)
+            self._requests.tokens -= 1
+            self._tokens.tokens -= ticket.charged_tokens
+            self._in_flight += 1
+            ticket.granted_at = now
+            waited = ticket.wait_time
+            self._admitted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._recent_waits.append(waited)
+            if not ticket.future.done():
+                ticket.future.set_result(ticket)
+
+    def _schedule_retry(self, delay: float):
+        if self._timer is not None and not self._timer.cancelled():
+            return
+        loop = asyncio.get_running_loop()
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = loop.call_later(min(delay, 60.0), fire)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """估算一次請求會消耗的 token 數 (提示估算值 + 回應上限)"""
+    return estimate_messages_tokens(messages) + int(max_tokens or 0)
+
+
+# 程序層級的單例
+scheduler = LLMScheduler(
+    requests_per_minute=LLM_SCHEDULER_CONFIG["requests_per_minute"],
+    tokens_per_minute=LLM_SCHEDULER_CONFIG["tokens_per_minute"],
+    max_concurrency=LLM_SCHEDULER_CONFIG["max_concurrency"],
+    default_weight=LLM_SCHEDULER_CONFIG["default_weight"],
+    enabled=LLM_SCHEDULER_CONFIG["enabled"],
+    max_lag=LLM_SCHEDULER_CONFIG["max_lag"]
+)
@@ -0,0 +1,207 @@
+"""
+自我介紹的語意快取
+
+同一位參與者在主題相近的會議中，自我介紹幾乎相同，不必每場重新生成。
+以純 CPU 的特徵雜湊 (字元 n-gram) 將主題與角色提示各自嵌入為向量，
+同一參與者 (ID、姓名、職位相同) 的舊介紹若兩者的餘弦相似度都達到門檻，即直接重用。
+記憶體中保存最近的項目；設定磁碟路徑時並寫入 SQLite，以跨程序與重啟保留。
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import SEMANTIC_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_IGNORED_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def hash_embedding(text: str, dimensions: int, ngram_sizes: Tuple[int, ...] = (1, 2, 3)) -> array:
+    """以字元 n-gram 特徵雜湊產生 L2 正規化的向量 (忽略空白、標點與大小寫)"""
+    normalized = _IGNORED_PATTERN.sub("", text.lower())
+    vector = array("f", [0.0]) * dimensions
+    for size in ngram_sizes:
+        for start in range(len(normalized) - size + 1):
+            digest = hashlib.blake2b(normalized[start:start + size].encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % dimensions] += 1.0 if (value >> 63) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        for i in range(dimensions):
+            vector[i] /= norm
+    return vector
+
+
+def cosine_similarity(a: array, b: array) -> float:
+    """兩個已正規化向量的餘弦相似度；兩者皆為空文字 (零向量) 時視為相同"""
+    if not any(a) and not any(b):
+        return 1.0
+    return sum(x * y for x, y in zip(a, b))
+
+
+class _Entry:
+    __slots__ = ("topic_vector", "role_vector", "text", "created_at")
+
+    def __init__(self, topic_vector: array, role_vector: array, text: str, created_at: float):
+        self.topic_vector = topic_vector
+        self.role_vector = role_vector
+        self.text = text
+        self.created_at = created_at
+
+
+class SemanticIntroductionCache:
+    """依參與者分組、以相似度比對主題與角色提示的自我介紹快取"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.path = os.getenv("SEMANTIC_CACHE_PATH") or config.get("disk_path")
+        self._buckets: Dict[str, List[_Entry]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def bucket_key(participant: Dict[str, Any]) -> str:
+        """同一位參與者 (ID、姓名、職位皆相同) 的介紹才可互相重用"""
+        return "\x1f".join([participant.get("id", ""), participant.get("name", ""), participant.get("title", "")])
+
+    def _embed(self, text: str) -> array:
+        return hash_embedding(text, self.config["dimensions"])
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS introductions ("
+                "bucket TEXT NOT NULL, topic_vector BLOB NOT NULL, role_vector BLOB NOT NULL, "
+                "text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS introductions_bucket ON introductions (bucket)")
+            self._conn.commit()
+        return self._conn
+
+    def _load_bucket(self, bucket: str) -> List[_Entry]:
+        """載入一位參與者的項目 (首次查詢時從磁碟讀取)"""
+        with self._lock:
+            entries = self._buckets.get(bucket)
+            if entries is not None:
+                return entries
+            entries = []
+            if self.path:
+                try:
+                    rows = self._connect().execute(
+                        "SELECT topic_vector, role_vector, text, created_at FROM introductions "
+                        "WHERE bucket = ? ORDER BY created_at DESC LIMIT ?",
+                        (bucket, self.config["max_entries_per_participant"])
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logger.warning(f"讀取自我介紹快取失敗: {str(e)}")
+                    rows = []
+                for topic_blob, role_blob, text, created_at in reversed(rows):
+                    topic_vector, role_vector = array("f"), array("f")
+                    topic_vector.frombytes(topic_blob)
+                    role_vector.frombytes(role_blob)
+                    entries.append(_Entry(topic_vector, role_vector, text, created_at))
+            self._buckets[bucket] = entries
+            return entries
+
+    def _lookup(self, bucket: str, topic: str, role_prompt: str) -> Tuple[Optional[str], float]:
+        entries = self._load_bucket(bucket)
+        if not entries:
+            return None, 0.0
+        topic_vector, role_vector = self._embed(topic), self._embed(role_prompt)
+        now = time.time()
+        ttl = self.config["ttl"]
+        best_text, best_similarity = None, 0.0
+        for entry in entries:
+            if ttl and now - entry.created_at > ttl:
+                continue
+            # 主題與角色提示都必須相近
+            similarity = min(cosine_similarity(topic_vector, entry.topic_vector),
+                             cosine_similarity(role_vector, entry.role_vector))
+            if similarity > best_similarity:
+                best_text, best_similarity = entry.text, similarity
+        if best_similarity >= self.config["threshold"]:
+            return best_text, best_similarity
+        return None, best_similarity
+
+    def _store(self, bucket: str, topic: str, role_prompt: str, text: str):
+        entry = _Entry(self._embed(topic), self._embed(role_prompt), text, time.time())
+        entries = self._load_bucket(bucket)
+        with self._lock:
+            entries.append(entry)
+            del entries[:-self.config["max_entries_per_participant"]]
+            if not self.path:
+                return
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT INTO introductions (bucket, topic_vector, role_vector, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (bucket, entry.topic_vector.tobytes(), entry.role_vector.tobytes(), text, entry.created_at)
+                )
+                # 每位參與者只保留最近的項目
+                conn.execute(
+                    "DELETE FROM introductions WHERE bucket = ? AND rowid NOT IN ("
+                    "SELECT rowid FROM introductions WHERE bucket = ? ORDER BY created_at DESC LIMIT ?)",
+                    (bucket, bucket, self.config["max_entries_per_participant"])
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"寫入自我介紹快取失敗: {str(e)}")
+
+    async def get(self, participant: Dict[str, Any], topic: str, role_prompt: str) -> Optional[str]:
+        """查詢相似的舊介紹，未命中時返回 None"""
+        if not self.config["enabled"]:
+            return None
+        bucket = self.bucket_key(participant)
+        text, similarity = await asyncio.to_thread(self._lookup, bucket, topic, role_prompt)
+        if text is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(f"自我介紹語意快取命中: {participant.get('id')} (相似度 {similarity:.3f})")
+        return text
+
+    async def set(self, participant: Dict[str, Any], topic: str, role_prompt: str, text: str):
+        """保存新生成的介紹"""
+        if not self.config["enabled"] or not text:
+            return
+        self.stores += 1
+        await asyncio.to_thread(self._store, self.bucket_key(participant), topic, role_prompt, text)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.config["enabled"],
+            "threshold": self.config["threshold"],
+            "participants": len(self._buckets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# 整個程序共用的自我介紹快取
+introduction_cache = SemanticIntroductionCache(SEMANTIC_CACHE_CONFIG)
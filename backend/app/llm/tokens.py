@@ -0,0 +1,58 @@
+"""
+Token 數估算
+
+不依賴分詞器的快速估算，針對繁體中文調整：
+cl100k 一類的 BPE 分詞器對常用中文字多為 1 個 token、較少見的繁體字常被拆成 2–3 個，
+因此中日韓文字 (含全形標點) 每字以 1.5 計；英數字串約每 4 字元 1 個 token；
+其他符號每字 1 個，空白不計。估算值刻意偏高，可安全地作為上限使用。
+"""
+
+import math
+import re
+from typing import Dict, List
+
+# 中日韓統一表意文字、擴充區、相容表意文字、注音、假名、諺文與全形標點
+_CJK_PATTERN = re.compile(
+    "[\u3000-\u303f\u3040-\u30ff\u3100-\u312f\u3400-\u4dbf\u4e00-\u9fff"
+    "\uac00-\ud7af\uf900-\ufaff\uff00-\uffef\U00020000-\U0002fa1f]"
+)
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+_SYMBOL_PATTERN = re.compile(r"[^\sA-Za-z0-9_]")
+
+CJK_TOKENS_PER_CHAR = 1.5
+CHARS_PER_WORD_TOKEN = 4
+# 每則聊天消息的格式開銷 (角色標記與分隔符)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """估算一段文字的 token 數"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    words = sum(math.ceil(len(word) / CHARS_PER_WORD_TOKEN) for word in _WORD_PATTERN.findall(text))
+    symbols = len(_SYMBOL_PATTERN.findall(text)) - cjk
+    return math.ceil(cjk * CJK_TOKENS_PER_CHAR) + words + max(symbols, 0)
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """估算聊天消息列表的提示 token 數"""
+    return sum(estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "…") -> str:
+    """截斷文字使其估算 token 數不超過 max_tokens (保留開頭，截斷處加上 suffix)"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(suffix)
+    if budget <= 0:
+        return ""
+    # 估算值隨長度單調遞增，以二分搜尋找出最長的前綴
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + suffix
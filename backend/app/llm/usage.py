@@ -0,0 +1,47 @@
+"""
+LLM 用量統計
+
+累計供應商回報的輸入、輸出 token 數，以及命中供應商端提示詞快取的輸入 token 數，
+依生成階段分開統計，用於觀察固定前綴的提示詞快取效果。
+"""
+
+from typing import Any, Dict, Optional
+
+from .providers import TokenUsage
+
+
+class UsageStats:
+    """依階段累計的 token 用量"""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, stage: Optional[str], usage: TokenUsage):
+        totals = self._stages.setdefault(stage or "other", {
+            "requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0
+        })
+        totals["requests"] += 1
+        totals["prompt_tokens"] += usage.prompt_tokens
+        totals["cached_tokens"] += usage.cached_tokens
+        totals["completion_tokens"] += usage.completion_tokens
+
+    def reset(self):
+        self._stages.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        def with_ratio(totals: Dict[str, int]) -> Dict[str, Any]:
+            prompt_tokens = totals["prompt_tokens"]
+            return {**totals, "cached_ratio": totals["cached_tokens"] / prompt_tokens if prompt_tokens else 0.0}
+
+        overall = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        for totals in self._stages.values():
+            for name in overall:
+                overall[name] += totals[name]
+        return {
+            **with_ratio(overall),
+            "stages": {stage: with_ratio(totals) for stage, totals in self._stages.items()}
+        }
+
+
+# 整個程序共用的用量統計
+usage_stats = UsageStats()
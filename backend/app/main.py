@@ -4,18 +4,27 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, ValidationError
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Callable, Awaitable
 import os
 from dotenv import load_dotenv
 import logging
 import asyncio
 import openai
+from app import llm
+from app.context import ConferenceContext, assemble_prompt
+from app.summarizer import MeetingSummarizer
+from app.plan import ConferencePlan, compile_participant
+from app.control import ConferenceControl
+from app.connections import ClientConnection, Frame
+from app.events import EventLog
+from app.spectators import SpectatorFeed
+from app.bus import BusError, ConferenceState, get_bus
 from datetime import datetime
 import json
 import uuid
 import time
 from starlette.websockets import WebSocketDisconnect
-from app.config import ROLE_PROMPTS, MODERATOR_CONFIG, AI_CONFIG, PROMPT_TEMPLATES, ROUND_TOPICS, MESSAGE_TYPES
+from app.config import MODERATOR_CONFIG, AI_CONFIG, PROMPT_TEMPLATES, MESSAGE_TYPES, STREAMING_CONFIG, ORCHESTRATION_CONFIG, PACING_CONFIG, SUMMARY_CONFIG, BROADCAST_CONFIG
 # 引入新的動態場景模組
 from app.scenarios import DISCUSSION_SCENARIOS, SCENARIO_INFO, DEFAULT_SCENARIO, SCENARIO_SELECTION_GUIDE
 import importlib # 用於重新載入模組
@@ -25,27 +34,27 @@ import pprint # 用於格式化 Python 代碼字串
 # 載入環境變數
 load_dotenv()
 
-# 配置日誌
-log_directory = "app/logs"
-os.makedirs(log_directory, exist_ok=True)
-log_file_path = os.path.join(log_directory, "app.log")
-
-# 移除可能存在的舊 Handler
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(log_file_path)
-    ]
-)
 logger = logging.getLogger(__name__)
 
-logger.info("日誌級別設置為 DEBUG")
-logger.info(f"日誌級別設置為 DEBUG，日誌文件路徑為 {log_file_path}")
+# 伺服器的日誌文件路徑 (相對於 backend 目錄)，可用 LOG_FILE 覆寫，設為空字串時只輸出到終端
+log_file_path = os.getenv("LOG_FILE", os.path.join("app", "logs", "app.log"))
+
+def configure_logging(level: str = "DEBUG", log_file: Optional[str] = None):
+    """配置根日誌；由程式入口 (伺服器啟動、批次執行器) 呼叫，匯入本模組時不改變日誌設定"""
+    # 移除可能存在的舊 Handler
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+    logger.info(f"日誌級別設置為 {level}，日誌文件路徑為 {log_file or '(無)'}")
 
 # 檢查 OpenAI API 密鑰
 if not os.getenv("OPENAI_API_KEY"):
@@ -81,68 +90,32 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
     logger.warning("OPENAI_API_KEY環境變量未設置。LLM功能將不可用。")
 else:
-    # 新版OpenAI API不再使用全局設置
-    # 我們將在每次調用時創建客戶端並提供API密鑰
+    # 所有請求共用同一個非同步客戶端與連線池
     logger.info("OpenAI API密鑰已設置")
-
-# 創建OpenAI客戶端實例的函數
-def get_openai_client():
-    """
-    根據 API 金鑰創建 OpenAI 客戶端
-    支持新舊版本 SDK 和不同格式的 API 金鑰
-    """
-    global openai_api_key
-    
-    if not openai_api_key:
-        logger.warning("未設置 OpenAI API 金鑰，無法創建客戶端")
-        return None
-    
-    # 掩蔽 API 金鑰用於日誌
-    masked_key = (openai_api_key[:5] + "..." + openai_api_key[-5:]) if len(openai_api_key) > 10 else "***"
-    logger.info(f"正在使用 API 金鑰創建客戶端 (已遮蔽: {masked_key})")
-    
-    try:
-        # 首先檢查OpenAI版本
-        openai_version = getattr(openai, "__version__", "未知")
-        logger.info(f"OpenAI庫版本: {openai_version}")
-        
-        # 首先嘗試使用現代的 OpenAI 客戶端
-        try:
-            logger.info("嘗試創建現代 OpenAI 客戶端")
-            client = openai.OpenAI(api_key=openai_api_key)
-            
-            # 驗證客戶端可用性
-            if hasattr(client, 'chat') and hasattr(client.chat, 'completions'):
-                logger.info("成功創建現代 OpenAI 客戶端")
-                return client
-            else:
-                logger.warning("現代客戶端創建成功但結構不符合預期")
-        except (TypeError, ValueError, ImportError, AttributeError) as e:
-            logger.warning(f"使用現代客戶端失敗: {str(e)}，嘗試傳統方式")
-            
-        # 如果現代客戶端失敗，嘗試使用傳統全局配置
-        try:
-            # 為傳統方法設置 API 金鑰
-            logger.info("嘗試設置全局 API 金鑰")
-            openai.api_key = openai_api_key
-            
-            # 檢查是否支持舊式 API
-            if hasattr(openai, 'ChatCompletion'):
-                # 測試客戶端有效性
-                logger.info("使用傳統 OpenAI 客戶端 (全局配置)")
-                return openai
-            else:
-                logger.warning("傳統 API 端點不可用，無法創建客戶端")
-                return None
-                
-        except Exception as legacy_err:
-            logger.error(f"傳統方式配置失敗: {str(legacy_err)}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"創建 OpenAI 客戶端時發生未預期的錯誤: {str(e)}")
-        logger.exception("OpenAI客戶端創建過程中發生異常")
-        return None
+llm.set_api_key(openai_api_key)
+
+@app.on_event("startup")
+async def setup_server_logging():
+    """伺服器 (每個工作程序) 啟動時配置日誌"""
+    configure_logging("DEBUG", log_file_path)
+
+@app.on_event("startup")
+async def start_conference_bus():
+    """連接會議匯流排，接收在其他工作程序執行的會議事件"""
+    bus = get_bus()
+    bus.set_handlers(deliver_remote_event, close_remote_clients, handle_bus_call, adopt_orphans, release_conference)
+    await bus.start()
+    logger.info(f"會議匯流排: {bus.name}，工作程序: {bus.worker_id}")
+
+@app.on_event("shutdown")
+async def shutdown_llm_client():
+    """應用關閉時釋放共用的 LLM 連線池"""
+    await llm.close_async_client()
+
+@app.on_event("shutdown")
+async def stop_conference_bus():
+    """應用關閉時斷開會議匯流排"""
+    await get_bus().stop()
 
 # 數據模型
 class Participant(BaseModel):
@@ -154,6 +127,7 @@ class Participant(BaseModel):
     isActive: bool = True
     temperature: Optional[float] = Field(default=None, ge=0.0, le=2.0) # 新增：溫度，給定合理範圍
     rolePrompt: Optional[str] = None # 新增：角色提示詞
+    aliases: List[str] = []  # 主席可能使用的其他稱呼（用於解析主席指派的發言者）
     
     class Config:
         # 允許額外的字段
@@ -167,6 +141,7 @@ class ConferenceConfig(BaseModel):
     conclusion: bool = True
     scenario: Optional[str] = DEFAULT_SCENARIO  # 新增：研討情境類型，預設為商務會議
     additional_notes: Optional[str] = ""  # 新增：附註補充資料
+    priority: int = Field(ge=1, le=10, default=1)  # LLM 排程權重，同時排隊時依比例取得名額
     
     class Config:
         # 允許額外的字段
@@ -183,6 +158,13 @@ class Message(BaseModel):
 # 內存存儲（在實際生產環境中應使用數據庫）
 active_conferences = {}
 connected_clients = {}
+conference_contexts: Dict[str, ConferenceContext] = {}  # 各會議的滾動上下文緩衝區
+conference_summarizers: Dict[str, MeetingSummarizer] = {}  # 各會議的背景摘要器
+conference_plans: Dict[str, ConferencePlan] = {}  # 各會議建立時編譯好的生成計畫
+conference_controls: Dict[str, ConferenceControl] = {}  # 各會議的暫停事件與執行中的任務
+conference_events: Dict[str, EventLog] = {}  # 各會議的事件序號與重播緩衝區
+remote_conferences: Dict[str, ConferenceState] = {}  # 在其他工作程序執行、本工作程序有客戶端訂閱的會議狀態
+conference_spectators: Dict[str, SpectatorFeed] = {}  # 各會議的唯讀觀眾
 
 # API路由
 @app.get("/")
@@ -468,35 +450,16 @@ async def test_api():
             response_data["openai_version"] = "未知"
         
         # 測試 OpenAI 連接
-        client = get_openai_client()
-        if client:
+        if llm.is_available():
             try:
                 # 簡單測試調用
                 logger.info("執行 OpenAI API 連接測試")
-                
-                if hasattr(client, 'chat') and hasattr(client.chat, 'completions') and callable(getattr(client.chat.completions, 'create', None)):
-                    # 使用新版 API
-                    logger.info("使用新版 API 格式進行測試調用")
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": "簡短的測試回應"}],
-                        max_tokens=5
-                    )
-                    resp_text = response.choices[0].message.content.strip()
-                    response_data["openai"]["api_type"] = "新版 OpenAI 客戶端"
-                else:
-                    # 使用舊版 API
-                    logger.info("使用舊版 API 格式進行測試調用")
-                    response = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": "簡短的測試回應"}],
-                        max_tokens=5
-                    )
-                    if hasattr(response.choices[0], 'message'):
-                        resp_text = response.choices[0].message.content.strip()
-                    else:
-                        resp_text = response.choices[0]['message']['content'].strip()
-                    response_data["openai"]["api_type"] = "傳統 OpenAI API"
+                resp_text = await llm.create_chat_completion(
+                    messages=[{"role": "user", "content": "簡短的測試回應"}],
+                    max_tokens=5,
+                    model="gpt-3.5-turbo"
+                )
+                response_data["openai"]["api_type"] = f"{llm.get_provider().name} 供應商"
                 
                 response_data["openai"] = {
                     "connected": True,
@@ -571,13 +534,14 @@ async def update_api_key(request: ApiKeyUpdateRequest):
         global openai_api_key
         old_key = openai_api_key
         openai_api_key = request.api_key
+        llm.set_api_key(openai_api_key)
         
         # 嘗試創建 OpenAI 客戶端以測試金鑰
-        client = get_openai_client()
-        if not client:
+        if not llm.is_available():
             # 如果創建失敗，恢復舊金鑰
             logger.error("無法使用新 API 金鑰創建客戶端，恢復原金鑰")
             openai_api_key = old_key
+            llm.set_api_key(old_key)
             return {
                 "success": False,
                 "error": "無法使用提供的 API 金鑰創建 OpenAI 客戶端",
@@ -588,28 +552,11 @@ async def update_api_key(request: ApiKeyUpdateRequest):
         # 嘗試簡單調用以確認金鑰有效
         logger.info("測試新 API 金鑰與 OpenAI 服務的連線")
         try:
-            # 檢查客戶端類型並使用適當的 API 調用
-            if hasattr(client, 'chat') and hasattr(client.chat, 'completions') and callable(getattr(client.chat.completions, 'create', None)):
-                # 使用新版 API
-                logger.info("使用新版 API 格式進行測試調用")
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "API 金鑰測試"}],
-                    max_tokens=5
-                )
-                resp_text = response.choices[0].message.content.strip()
-            else:
-                # 使用舊版 API
-                logger.info("使用舊版 API 格式進行測試調用")
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "API 金鑰測試"}],
-                    max_tokens=5
-                )
-                if hasattr(response.choices[0], 'message'):
-                    resp_text = response.choices[0].message.content.strip()
-                else:
-                    resp_text = response.choices[0]['message']['content'].strip()
+            resp_text = await llm.create_chat_completion(
+                messages=[{"role": "user", "content": "API 金鑰測試"}],
+                max_tokens=5,
+                model="gpt-3.5-turbo"
+            )
             
             logger.info(f"API 金鑰測試成功，回應: {resp_text}")
             return {
@@ -633,6 +580,7 @@ async def update_api_key(request: ApiKeyUpdateRequest):
             # 恢復舊金鑰
             logger.error(f"API 金鑰測試失敗: {str(api_err)}")
             openai_api_key = old_key
+            llm.set_api_key(old_key)
             
             return {
                 "success": False,
@@ -660,8 +608,7 @@ async def test_message(request: TestMessageRequest):
         logger.info(f"收到測試消息請求: {request.json()}")
         
         # 獲取OpenAI客戶端
-        client = get_openai_client()
-        if not client:
+        if not llm.is_available():
             logger.warning("未設置OpenAI API密鑰或客戶端創建失敗，無法處理請求")
             return {
                 "success": False,
@@ -682,35 +629,15 @@ async def test_message(request: TestMessageRequest):
         
         # 調用OpenAI API
         try:
-            if hasattr(client, 'chat') and hasattr(client.chat, 'completions') and callable(getattr(client.chat.completions, 'create', None)):
-                # 嘗試新版 API
-                logger.info("使用新版 API 格式發送請求")
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_message}
-                    ],
-                    temperature=0.7,
-                    max_tokens=300
-                )
-                ai_response = response.choices[0].message.content.strip()
-            else:
-                # 嘗試舊版 API
-                logger.info("使用舊版 API 格式發送請求")
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_message}
-                    ],
-                    temperature=0.7,
-                    max_tokens=300
-                )
-                if hasattr(response.choices[0], 'message'):
-                    ai_response = response.choices[0].message.content.strip()
-                else:
-                    ai_response = response.choices[0]['message']['content'].strip()
+            ai_response = await llm.create_chat_completion(
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.7,
+                max_tokens=300,
+                model="gpt-3.5-turbo"
+            )
             
             logger.info(f"OpenAI API 回應: {ai_response}")
             
@@ -750,6 +677,47 @@ async def test_message(request: TestMessageRequest):
             "timestamp": datetime.now().isoformat()
         }
 
+@app.get("/api/llm/scheduler")
+def get_llm_scheduler_stats():
+    """獲取全局 LLM 排程器的佇列深度、等待時間與額度狀態"""
+    return llm.scheduler.get_stats()
+
+@app.get("/api/llm/usage")
+def get_llm_usage_stats():
+    """獲取各階段的 token 用量，以及命中供應商端提示詞快取的輸入 token 比例"""
+    return llm.usage_stats.get_stats()
+
+@app.get("/api/bus")
+def get_bus_status():
+    """獲取會議匯流排狀態：本工作程序、成員名單，以及本工作程序執行與轉送的會議"""
+    bus = get_bus()
+    return {
+        "backend": bus.name,
+        "worker_id": bus.worker_id,
+        "members": bus.members,
+        "owned_conferences": list(active_conferences),
+        "remote_conferences": {cid: state.owner for cid, state in remote_conferences.items()}
+    }
+
+@app.get("/api/spectators")
+def get_spectator_counts():
+    """獲取本工作程序上各會議的唯讀觀眾人數"""
+    return {cid: feed.count for cid, feed in conference_spectators.items() if feed.count}
+
+@app.get("/api/llm/cache")
+def get_llm_cache_stats():
+    """獲取 LLM 回應快取（完全比對）與自我介紹語意快取的命中率與容量"""
+    return {
+        "exact": llm.response_cache.get_stats(),
+        "introductions": llm.introduction_cache.get_stats()
+    }
+
+@app.delete("/api/llm/cache")
+async def clear_llm_cache():
+    """清除 LLM 回應快取（記憶體與磁碟）"""
+    await llm.response_cache.clear()
+    return {"success": True}
+
 @app.get("/api/scenarios")
 def get_scenarios():
     """獲取可用的研討情境模組列表"""
@@ -892,12 +860,14 @@ async def upload_scenario_package(file: UploadFile = File(...)):
     }
 # === API 修改結束 ===
 
-@app.post("/api/conference/start")
-async def start_conference(config: ConferenceConfig, background_tasks: BackgroundTasks):
-    """開始一個新的會議"""
+def create_conference(config: ConferenceConfig, pacing: bool = True, conference_id: Optional[str] = None) -> str:
+    """
+    初始化會議狀態並返回會議ID（不啟動會議流程）
+    pacing 為 False 時略過所有顯示用的停頓（供批次執行使用）
+    """
     # 確保 DISCUSSION_SCENARIOS 是最新的
     from app.scenarios import DISCUSSION_SCENARIOS, DEFAULT_SCENARIO
-    conference_id = str(uuid.uuid4())
+    conference_id = conference_id or str(uuid.uuid4())
     
     # 驗證情境模組
     if config.scenario and config.scenario not in DISCUSSION_SCENARIOS:
@@ -919,7 +889,9 @@ async def start_conference(config: ConferenceConfig, background_tasks: Backgroun
         "scenario": config.scenario,  # 新增：記錄使用的情境模組
         "additional_notes": config.additional_notes,  # 新增：附註補充資料
         "start_time": datetime.now().isoformat(),
+        "pacing": pacing,  # 是否保留顯示用的停頓
         "connected_clients": [],  # 修改為列表而非字典
+        "summary_state": {},  # 背景摘要器的累積摘要、各輪摘要與重點（隨狀態快照發布，接手時還原）
         "config": {  # 存儲完整配置
             "topic": config.topic,
             "participants": [p.dict() for p in config.participants],
@@ -927,43 +899,93 @@ async def start_conference(config: ConferenceConfig, background_tasks: Backgroun
             "language": config.language,
             "conclusion": config.conclusion,
             "scenario": config.scenario,
-            "additional_notes": config.additional_notes  # 新增：附註補充資料
+            "additional_notes": config.additional_notes,  # 新增：附註補充資料
+            "priority": config.priority
         }
     }
     
     # 添加主持人（秘書）
     active_conferences[conference_id]["participants"][MODERATOR_CONFIG["id"]] = MODERATOR_CONFIG
+    conference_plans[conference_id] = ConferencePlan.build(active_conferences[conference_id])
+    conference_contexts[conference_id] = ConferenceContext.for_scenario(config.scenario)
+    conference_controls[conference_id] = ConferenceControl(conference_id)
+    conference_summarizers[conference_id] = MeetingSummarizer(conference_id, config.topic, conference_controls[conference_id],
+                                                              active_conferences[conference_id]["summary_state"])
+    conference_events[conference_id] = EventLog(BROADCAST_CONFIG["replay_buffer"])
     
     # 創建WebSocket連接管理器
     connected_clients[conference_id] = []
     
-    # 在背景任務中啟動會議
-    background_tasks.add_task(run_conference, conference_id)
+    # 設定此會議在全局 LLM 排程器中的權重
+    llm.scheduler.set_weight(conference_id, config.priority)
+    # 讓其他工作程序可以查詢到此會議
+    get_bus().put_state(conference_id, active_conferences[conference_id], 0)
+    return conference_id
+
+@app.post("/api/conference/start")
+async def start_conference(config: ConferenceConfig):
+    """開始一個新的會議：依會議ID的一致性雜湊決定由哪個工作程序執行，必要時轉交該工作程序建立"""
+    bus = get_bus()
+    conference_id = str(uuid.uuid4())
+    owner = bus.owner_for(conference_id)
+    if owner != bus.worker_id:
+        try:
+            return await bus.call(owner, "start_conference", {"conference_id": conference_id, "config": config.dict()})
+        except BusError as e:
+            logger.warning(f"無法轉交會議給工作程序 {owner}，改由本工作程序執行: {str(e)}")
+    return launch_conference(config, conference_id)
+
+def launch_conference(config: ConferenceConfig, conference_id: str) -> dict:
+    """在本工作程序建立會議並啟動流程"""
+    conference_id = create_conference(config, conference_id=conference_id)
+    
+    # 啟動此會議唯一的流程推進者，自動執行到會議結束
+    start_orchestrator(conference_id)
     
     # 返回結果，增加success字段以兼容前端
     return {"conference_id": conference_id, "status": "created", "success": True}
 
+async def lookup_conference(conference_id: str) -> Optional[dict]:
+    """取得會議狀態：本工作程序執行的會議直接返回，否則向會議匯流排查詢"""
+    if conference_id in active_conferences:
+        return active_conferences[conference_id]
+    try:
+        state = await get_bus().fetch(conference_id)
+    except BusError as e:
+        logger.error(f"向會議匯流排查詢會議 {conference_id} 失敗: {str(e)}")
+        return None
+    return state.data if state else None
+
 @app.get("/api/conference/{conference_id}")
-def get_conference(conference_id: str):
-    if conference_id not in active_conferences:
+async def get_conference(conference_id: str):
+    conference = await lookup_conference(conference_id)
+    if conference is None:
         raise HTTPException(status_code=404, detail="找不到指定的會議")
     
-    return active_conferences[conference_id]
+    return conference
 
 @app.get("/api/conference/{conference_id}/messages")
-def get_conference_messages(conference_id: str, limit: int = 50, offset: int = 0):
-    if conference_id not in active_conferences:
+async def get_conference_messages(conference_id: str, limit: int = 50, offset: int = 0):
+    conference = await lookup_conference(conference_id)
+    if conference is None:
         raise HTTPException(status_code=404, detail="找不到指定的會議")
     
-    messages = active_conferences[conference_id]["messages"]
+    messages = conference["messages"]
     return {
         "total": len(messages),
         "messages": messages[offset:offset+limit]
     }
 
 # 會議執行邏輯
+def start_orchestrator(conference_id: str) -> Optional[asyncio.Task]:
+    """冪等地啟動會議唯一的流程推進者 (run_conference)，已在執行時返回原任務"""
+    return get_conference_control(conference_id).ensure_runner(lambda: run_conference(conference_id))
+
 async def run_conference(conference_id: str):
-    """執行會議的主要邏輯"""
+    """
+    執行會議的主要邏輯：自我介紹 → 各輪討論 → 總結 → 結束
+    每場會議只由 start_orchestrator 啟動一次；每一步開始前經過暫停檢查點
+    """
     try:
         logger.info(f"開始執行會議 {conference_id} 的主要邏輯")
         
@@ -973,29 +995,37 @@ async def run_conference(conference_id: str):
             
         conf = active_conferences[conference_id]
         config = conf["config"]
+        control = get_conference_control(conference_id)
+        # 接手其他工作程序的會議時，已完成的階段與輪次不再重複；進行中的一步由 begin_step 從下一次發言繼續
+        resume_stage = conf.get("previous_stage", "discussion") if conf["stage"] == "paused" else conf["stage"]
         
-        # 更新狀態為介紹階段
-        await update_conference_stage(conference_id, "introduction")
-        
-        # 生成並發送自我介紹
-        try:
-            await generate_introductions(conference_id)
-        except Exception as e:
-            logger.error(f"生成自我介紹時出錯: {str(e)}")
-            logger.exception("生成自我介紹過程中發生異常")
-        
-        # 進入討論階段
-        await update_conference_stage(conference_id, "discussion")
+        if resume_stage in ("waiting", "introduction"):
+            # 更新狀態為介紹階段（暫停中接手的會議維持暫停狀態）
+            if conf["stage"] != "paused":
+                await update_conference_stage(conference_id, "introduction")
+            
+            # 生成並發送自我介紹
+            try:
+                await generate_introductions(conference_id)
+            except Exception as e:
+                logger.error(f"生成自我介紹時出錯: {str(e)}")
+                logger.exception("生成自我介紹過程中發生異常")
+            
+            # 進入討論階段
+            await update_conference_stage(conference_id, "discussion")
         
         # 進行多輪討論
-        for round_num in range(1, config["rounds"] + 1):
+        for round_num in range(control.completed_rounds + 1, config["rounds"] + 1):
+            await control.checkpoint()
             try:
                 await run_discussion_round(conference_id, round_num)
             except Exception as e:
                 logger.error(f"執行第{round_num}輪討論時出錯: {str(e)}")
                 logger.exception(f"執行第{round_num}輪討論過程中發生異常")
+            control.completed_rounds = conf["completed_rounds"] = round_num
         
         # 生成結論
+        await control.checkpoint()
         await update_conference_stage(conference_id, "conclusion")
         try:
             await generate_conclusion(conference_id)
@@ -1007,6 +1037,9 @@ async def run_conference(conference_id: str):
         await update_conference_stage(conference_id, "ended")
         
         logger.info(f"會議 {conference_id} 已成功完成")
+    except asyncio.CancelledError:
+        logger.info(f"會議 {conference_id} 的執行已被取消")
+        raise
     except Exception as e:
         logger.error(f"執行會議 {conference_id} 過程中發生錯誤: {str(e)}")
         logger.exception(f"執行會議過程中發生未捕獲的異常")
@@ -1026,6 +1059,10 @@ async def update_conference_stage(conference_id: str, stage: str):
     """更新會議階段並通知客戶端"""
     conf = active_conferences[conference_id]
     conf["stage"] = stage
+    if stage == "ended":
+        llm.scheduler.forget(conference_id)
+        if conference_id in conference_summarizers:
+            conference_summarizers[conference_id].cancel()
     
     # 通過WebSocket通知客戶端
     await broadcast_message(conference_id, {
@@ -1034,6 +1071,17 @@ async def update_conference_stage(conference_id: str, stage: str):
     })
     logger.info(f"Conference {conference_id} stage changed to {stage}")
 
+def begin_step(conference: dict, step: str) -> List[str]:
+    """
+    開始流程的一步（自我介紹、某一輪討論或總結），記錄本步在會議記錄中的起始位置，返回本步已發言者的ID
+    起始位置隨下一次發布的狀態快照送出；接手會議時若快照已在同一步，返回已寫入記錄的發言者，
+    流程據此從下一次發言繼續，不重複已發布的消息
+    """
+    if conference.get("step") != step:
+        conference["step"] = step
+        conference["step_start"] = len(conference["messages"])
+    return [message["speakerId"] for message in conference["messages"][conference["step_start"]:]]
+
 async def update_current_round(conference_id: str, round_num: int):
     """更新當前回合並通知客戶端"""
     conf = active_conferences[conference_id]
@@ -1046,68 +1094,32 @@ async def update_current_round(conference_id: str, round_num: int):
     })
 
 # MVP階段使用模擬的回應，實際環境中使用OpenAI API
-async def generate_ai_response(prompt: str, participant_id: str, conference_id: str = None, temperature: Optional[float] = None) -> str:
-    """生成AI回應"""
+async def generate_ai_response(prompt: str, participant_id: str, conference_id: str = None, temperature: Optional[float] = None,
+                               on_delta: Optional[Callable[[str], Awaitable[None]]] = None, stage: Optional[str] = None) -> str:
+    """
+    生成AI回應；提供 on_delta 時以串流方式生成，並對每段增量文字呼叫 on_delta
+    stage 為生成階段 (introduction / chair_opening / discussion)，決定是否使用回應快取
+    """
     try:
-        client = get_openai_client()
-        if not client:
+        if not llm.is_available():
             logger.error("未能獲取OpenAI客戶端，無法生成回應")
             return "很抱歉，AI服務當前不可用。請檢查API金鑰設置。"
         
-        # 獲取會議和參與者數據
-        participant_data = None
-        scenario_prompt = ""
-        final_temperature = AI_CONFIG["default_temperature"] # 從通用配置獲取預設溫度
-        role_prompt = ROLE_PROMPTS.get(participant_id, "") # 預設從 config.py 獲取
-
+        # 會議中的參與者使用會議計畫中編譯好的系統訊息與溫度
+        participant_plan = None
         if conference_id and conference_id in active_conferences:
-            conference = active_conferences[conference_id]
-            # 從會議儲存的參與者字典中獲取數據
-            participant_data = conference.get("participants", {}).get(participant_id)
-
-            if participant_data:
-                 # 優先使用參與者自訂的 Role Prompt (如果存在且非空)
-                custom_role_prompt = participant_data.get("rolePrompt")
-                if custom_role_prompt and custom_role_prompt.strip():
-                    role_prompt = custom_role_prompt
-                    logger.debug(f"使用參與者 {participant_id} 的自訂 Role Prompt")
-                else:
-                     logger.debug(f"參與者 {participant_id} 未提供自訂 Role Prompt，使用預設")
-
-                # 獲取情境相關系統提示詞
-                scenario_id = conference.get("scenario")
-                if scenario_id and scenario_id in DISCUSSION_SCENARIOS:
-                    scenario_prompt = DISCUSSION_SCENARIOS[scenario_id].get("system_prompt", "")
-
-                # 確定溫度：優先使用函數參數，其次是參與者數據，最後是全局預設
-                if temperature is not None:
-                     final_temperature = temperature
-                     logger.debug(f"使用函數傳入的溫度: {final_temperature} for {participant_id}")
-                elif participant_data.get("temperature") is not None:
-                    final_temperature = participant_data["temperature"]
-                    logger.debug(f"使用參與者 {participant_id} 的自訂溫度: {final_temperature}")
-                else:
-                    logger.debug(f"參與者 {participant_id} 未提供溫度，使用預設: {final_temperature}")
-            else:
-                 logger.warning(f"無法在會議 {conference_id} 中找到參與者 {participant_id} 的詳細數據")
-
-        else:
-             # 如果沒有會議上下文，則使用全局預設溫度
-             logger.debug(f"無會議上下文，為 {participant_id} 使用預設溫度: {final_temperature}")
-             # 如果函數直接傳入了溫度，則使用它
-             if temperature is not None:
-                 final_temperature = temperature
-
-
-        # 組合系統提示詞
-        system_message = AI_CONFIG["system_message_template"].format(
-            participant_id=participant_id,
-            role_prompt=role_prompt # 使用已確定的 role_prompt
-        )
-
-        # 如果有情境系統提示詞，附加到系統消息中
-        if scenario_prompt:
-            system_message += f"\n\n{scenario_prompt}"
+            participant_plan = get_conference_plan(conference_id).participants.get(participant_id)
+            if not participant_plan:
+                logger.warning(f"無法在會議 {conference_id} 中找到參與者 {participant_id} 的詳細數據")
+        if not participant_plan:
+            # 沒有會議上下文：使用 config.py 的預設角色提示與全局預設溫度
+            participant_plan = compile_participant(participant_id, None)
+
+        participant_data = participant_plan.data
+        role_prompt = participant_plan.role_prompt
+        system_message = participant_plan.system_message
+        # 函數傳入的溫度優先於參與者設定
+        final_temperature = participant_plan.temperature if temperature is None else temperature
 
         # 準備消息
         messages = [
@@ -1115,47 +1127,47 @@ async def generate_ai_response(prompt: str, participant_id: str, conference_id:
             {"role": "user", "content": prompt}
         ]
 
+        # 自我介紹：同一參與者在相近主題的會議中直接重用舊的介紹
+        intro_key = None
+        if stage == "introduction" and participant_data:
+            conference = active_conferences[conference_id]
+            intro_key = (participant_data, f"{conference.get('topic', '')}\n{conference.get('additional_notes') or ''}", role_prompt)
+            cached = await llm.introduction_cache.get(*intro_key)
+            if cached is not None:
+                if on_delta:
+                    await on_delta(cached)
+                return cached
+
         logger.info(f"嘗試生成AI回應，參與者ID: {participant_id}, 最終溫度: {final_temperature}") # 使用 final_temperature
 
-        # 檢查客戶端類型
-        if hasattr(client, 'chat') and hasattr(client.chat, 'completions'):
-            # 使用現代OpenAI客戶端
-            logger.info("使用現代OpenAI客戶端API調用")
-            try:
-                response = client.chat.completions.create(
-                    model=AI_CONFIG["default_model"],
-                    messages=messages,
-                    temperature=final_temperature, # 使用 final_temperature
-                    max_tokens=AI_CONFIG["max_tokens"]
-                )
-                return response.choices[0].message.content.strip()
-            except AttributeError as ae:
-                logger.error(f"現代客戶端API屬性錯誤: {str(ae)}")
-                # 嘗試備用方法
-                if hasattr(client.chat.completions, 'create'):
-                    response = client.chat.completions.create(
-                        model=AI_CONFIG["default_model"],
-                        messages=messages,
-                        temperature=final_temperature, # 使用 final_temperature
-                        max_tokens=AI_CONFIG["max_tokens"]
-                    )
-                    return response.choices[0].message.content.strip()
-                raise
-
-        # 使用傳統OpenAI客戶端
-        elif hasattr(client, 'ChatCompletion'):
-            logger.info("使用傳統OpenAI客戶端API調用")
-            response = client.ChatCompletion.create(
-                model=AI_CONFIG["default_model"],
+        # 串流模式：邊接收邊回報增量文字
+        if on_delta:
+            chunks = []
+            # on_delta 出錯或發言被取消時立即關閉串流，歸還排程名額與連線
+            async with llm.aclosing(llm.stream_chat_completion(
+                messages=messages,
+                temperature=final_temperature,
+                max_tokens=AI_CONFIG["max_tokens"],
+                conference_id=conference_id,
+                stage=stage
+            )) as deltas:
+                async for delta in deltas:
+                    chunks.append(delta)
+                    await on_delta(delta)
+            response = "".join(chunks).strip()
+        else:
+            # 以非同步方式等待回應，不阻塞其他會議
+            response = await llm.create_chat_completion(
                 messages=messages,
                 temperature=final_temperature, # 使用 final_temperature
-                max_tokens=AI_CONFIG["max_tokens"]
+                max_tokens=AI_CONFIG["max_tokens"],
+                conference_id=conference_id,
+                stage=stage
             )
-            return response['choices'][0]['message']['content'].strip()
 
-        else:
-            logger.error(f"無法識別的OpenAI客戶端類型: {type(client).__name__}")
-            return "很抱歉，AI服務當前遇到技術問題。無法識別API客戶端類型。"
+        if intro_key:
+            await llm.introduction_cache.set(*intro_key, response)
+        return response
 
     except Exception as e:
         logger.error(f"生成AI回應時發生錯誤: {str(e)}")
@@ -1166,10 +1178,83 @@ async def generate_ai_response(prompt: str, participant_id: str, conference_id:
 # 新增：檢查暫停狀態的輔助函數
 # =============================================
 async def check_pause(conference_id: str):
-    """檢查會議是否暫停，如果暫停則異步等待"""
-    while conference_id in active_conferences and active_conferences[conference_id].get("stage") == "paused":
-        logger.debug(f"會議 {conference_id} 已暫停，等待恢復...")
-        await asyncio.sleep(1) # 每秒檢查一次
+    """檢查點：會議暫停時等待恢復事件，會議已結束時中止目前的流程"""
+    if conference_id in active_conferences:
+        await get_conference_control(conference_id).checkpoint()
+
+async def pace(conference_id: str, key: str):
+    """依 PACING_CONFIG 停頓，讓界面顯示更自然；會議關閉節奏 (pacing=False) 時立即返回"""
+    conference = active_conferences.get(conference_id)
+    if conference is not None and not conference.get("pacing", True):
+        return
+    await asyncio.sleep(PACING_CONFIG[key])
+
+async def generate_streamed_response(prompt: str, speaker_id: str, conference_id: str, stage: Optional[str] = None) -> tuple:
+    """
+    以串流方式生成發言，並將增量文字以 message_delta 推送給客戶端
+    返回 (預先分配的消息ID, 完整文字)
+    """
+    message_id = str(uuid.uuid4())
+    participant = active_conferences.get(conference_id, {}).get("participants", {}).get(speaker_id) or {}
+    pending = []
+    last_flush = time.monotonic()
+
+    async def flush():
+        nonlocal last_flush
+        if pending:
+            await broadcast_message(conference_id, {
+                "type": MESSAGE_TYPES["message_delta"],
+                "message_id": message_id,
+                "speakerId": speaker_id,
+                "speakerName": participant.get("name", "未知"),
+                "speakerTitle": participant.get("title", "未知"),
+                "delta": "".join(pending)
+            })
+            pending.clear()
+        last_flush = time.monotonic()
+
+    async def on_delta(delta: str):
+        pending.append(delta)
+        # 合併短時間內的增量，避免每個 token 都送出一個 WebSocket 幀
+        if time.monotonic() - last_flush >= STREAMING_CONFIG["flush_interval"]:
+            await flush()
+
+    text = await generate_ai_response(prompt, speaker_id, conference_id, on_delta=on_delta, stage=stage)
+    await flush()
+    return message_id, text
+
+async def generate_and_add_message(conference_id: str, speaker_id: str, prompt: str, stage: Optional[str] = None) -> str:
+    """生成發言並加入會議記錄；串流模式下先推送增量文字，最後只提交一次完整消息"""
+    if STREAMING_CONFIG["enabled"]:
+        message_id, text = await generate_streamed_response(prompt, speaker_id, conference_id, stage)
+        await check_pause(conference_id) # <--- 添加消息前檢查
+        await add_message(conference_id, speaker_id, text, message_id=message_id)
+    else:
+        text = await generate_ai_response(prompt, speaker_id, conference_id, stage=stage)
+        await check_pause(conference_id) # <--- 添加消息前檢查
+        await add_message(conference_id, speaker_id, text)
+    return text
+
+async def emit_concurrent_introductions(conference_id: str, introductions: List[tuple]):
+    """
+    同時發出所有自我介紹的 LLM 請求（由全局排程器限流），
+    再依原本的順序與節奏逐一發布，整個階段只需約一次 LLM 往返時間
+    """
+    tasks = [
+        asyncio.create_task(generate_ai_response(intro_prompt, participant_id, conference_id, stage="introduction"))
+        for participant_id, intro_prompt in introductions
+    ]
+    try:
+        for (participant_id, _), task in zip(introductions, tasks):
+            response = await task
+            await check_pause(conference_id) # <--- 添加消息前檢查
+            await add_message(conference_id, participant_id, response)
+            await pace(conference_id, "introduction_interval")
+    finally:
+        # 流程中斷時不再等待尚未完成的請求
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
 async def generate_introductions(conference_id: str):
     """生成所有參與者的自我介紹"""
@@ -1177,6 +1262,8 @@ async def generate_introductions(conference_id: str):
     conf = active_conferences[conference_id]
     config = conf["config"]
     topic = config["topic"]
+    # 接手的會議只補上尚未發布的開場白、自我介紹與交接
+    spoken = begin_step(conf, "introduction")
     
     # 豬秘書(作為主持人)介紹會議
     additional_notes = conf.get("additional_notes", "")
@@ -1188,71 +1275,66 @@ async def generate_introductions(conference_id: str):
     
     intro_message += "現在我們將進行自我介紹，請各位簡單介紹自己並談談對今天主題的看法。自我介紹完成後，我們將由主席引導進入正式討論階段。"
     
-    await check_pause(conference_id) # <--- 添加消息前檢查
-    await add_message(
-        conference_id,
-        MODERATOR_CONFIG["id"],
-        intro_message
-    )
-    
-    # 等待1秒使界面顯示更自然
-    await asyncio.sleep(1)
-    
-    # 參與者依次進行自我介紹
-    for participant in config["participants"]:
-        await check_pause(conference_id) # <--- 每個參與者循環開始時檢查
-        if not participant["isActive"]:
-            continue
+    if not spoken:
+        await check_pause(conference_id) # <--- 添加消息前檢查
+        await add_message(
+            conference_id,
+            MODERATOR_CONFIG["id"],
+            intro_message
+        )
         
-        # 跳過主持人(豬秘書)，因為已經在開場白中介紹過自己
-        if participant["id"] == MODERATOR_CONFIG["id"]:
+        # 等待1秒使界面顯示更自然
+        await pace(conference_id, "after_opening")
+    
+    # 準備所有參與者的自我介紹提示（計畫中已排除未啟用者與已在開場白介紹過自己的秘書）
+    plan = get_conference_plan(conference_id)
+    introductions = []
+    for participant_id in plan.introduction_ids:
+        if participant_id in spoken:
             continue
-            
+        participant = plan.participants[participant_id].data
+        
         # 構建一般參與者的提示
-        intro_prompt = PROMPT_TEMPLATES["introduction"].format(
+        base_prompt = PROMPT_TEMPLATES["introduction"].format(
             name=participant['name'],
             title=participant['title'],
             topic=topic
         )
         
-        # 如果有附註資料，加入提示詞
-        # additional_notes = conf.get("additional_notes", "") # 已在函數開頭獲取
-        if additional_notes and additional_notes.strip():
-            intro_prompt += f"\n\n補充資料：{additional_notes}"
-        
-        # 生成回應
-        response = await generate_ai_response(intro_prompt, participant["id"], conference_id)
-        
-        await check_pause(conference_id) # <--- 添加消息前檢查
-        # 添加消息並廣播
-        await add_message(conference_id, participant["id"], response)
+        # 如果有附註資料，在預算內加入提示詞
+        intro_prompt = assemble_prompt(
+            "introduction",
+            lambda notes, _: base_prompt + (f"\n\n補充資料：{notes}" if notes else ""),
+            additional_notes
+        )
         
-        # 模擬打字延遲
-        await asyncio.sleep(3)
+        introductions.append((participant["id"], intro_prompt))
+    
+    if ORCHESTRATION_CONFIG["concurrent_introductions"]:
+        # 自我介紹彼此獨立：同時生成，再依順序發布
+        await emit_concurrent_introductions(conference_id, introductions)
+    else:
+        # 參與者依次進行自我介紹
+        for participant_id, intro_prompt in introductions:
+            await check_pause(conference_id) # <--- 每個參與者循環開始時檢查
+            
+            # 生成回應，添加消息並廣播
+            await generate_and_add_message(conference_id, participant_id, intro_prompt, stage="introduction")
+            
+            # 模擬打字延遲（串流模式下文字已逐步顯示，無需額外等待）
+            if not STREAMING_CONFIG["enabled"]:
+                await pace(conference_id, "introduction_interval")
     
     # 注意：此處不再添加主持人的結束語，將直接由主席在第一輪討論中開場
 
     # === 新增：豬秘書交接給主席 ===
-    # 識別真正的主席 (與 run_discussion_round 邏輯類似，確保一致性)
-    conf = active_conferences[conference_id]
-    config = conf["config"]
-    participants_dict = conf["participants"]
-    designated_chair_id = config.get("chair")
-    chair_id = None
-    chair_data = None
-
-    if designated_chair_id and designated_chair_id in participants_dict and participants_dict[designated_chair_id].get("isActive", True):
-        chair_id = designated_chair_id
-        chair_data = participants_dict[chair_id]
-    elif "General manager" in participants_dict and participants_dict["General manager"].get("isActive", True):
-        chair_id = "General manager"
-        chair_data = participants_dict[chair_id]
-    else:
-        for p_id, p_data in participants_dict.items():
-            if p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True):
-                chair_id = p_id
-                chair_data = p_data
-                break
+    # 主席已在會議計畫中確定，與討論及總結階段一致
+    chair_id = plan.chair_id
+    chair_data = plan.participants[chair_id].data if chair_id else None
+
+    if spoken.count(MODERATOR_CONFIG["id"]) > 1:
+        # 接手前已完成交接（開場白與交接都由秘書發言）
+        return
 
     if chair_data:
         chair_name = chair_data.get("name", "指定主席")
@@ -1260,7 +1342,7 @@ async def generate_introductions(conference_id: str):
         handover_message = f"好的，感謝大家的自我介紹。現在我們正式進入討論階段，接下來將由我們本次會議的主席 {chair_name} ({chair_title}) 來引導討論。"
         await check_pause(conference_id)
         await add_message(conference_id, MODERATOR_CONFIG["id"], handover_message)
-        await asyncio.sleep(1) # 短暫停頓
+        await pace(conference_id, "after_handover") # 短暫停頓
     else:
         logger.error(f"會議 {conference_id} 在介紹後無法確定主席，討論可能無法正常開始。")
         await check_pause(conference_id)
@@ -1269,6 +1351,178 @@ async def generate_introductions(conference_id: str):
 
     # 注意：此處不再添加主持人的結束語，將直接由主席在第一輪討論中開場
 
+class TurnPrefetcher:
+    """
+    管線化發言：上一位發言者的內容確定後，立即在背景生成下一位的發言，
+    與顯示延遲重疊。停用時不做任何預先生成，行為與逐一生成相同。
+    """
+
+    def __init__(self, conference_id: str, enabled: bool):
+        self.conference_id = conference_id
+        self.enabled = enabled
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, speaker_id: str, prompt: str, stage: str = "discussion"):
+        """在背景開始生成指定發言者的回應"""
+        if self.enabled and speaker_id not in self.tasks:
+            self.tasks[speaker_id] = asyncio.create_task(generate_ai_response(prompt, speaker_id, self.conference_id, stage=stage))
+
+    async def take(self, speaker_id: str, prompt: str, stage: str = "discussion") -> tuple:
+        """
+        取得發言內容：優先使用預先生成的結果，否則立即生成（串流模式下邊生成邊推送）
+        返回 (串流消息ID 或 None, 文字)
+        """
+        task = self.tasks.pop(speaker_id, None)
+        if task:
+            return None, await task
+        if STREAMING_CONFIG["enabled"]:
+            return await generate_streamed_response(prompt, speaker_id, self.conference_id, stage)
+        return None, await generate_ai_response(prompt, speaker_id, self.conference_id, stage=stage)
+
+    def cancel(self):
+        """取消所有尚未使用的預先生成"""
+        for task in self.tasks.values():
+            if not task.done():
+                task.cancel()
+        self.tasks.clear()
+
+async def speak_turn(conference_id: str, speaker_id: str, prompt: str, prefetcher: TurnPrefetcher,
+                     on_recorded: Optional[Callable[[str], None]] = None, stage: str = "discussion") -> str:
+    """
+    完成一次發言：生成內容、寫入記錄、廣播
+    on_recorded 在消息寫入記錄後、廣播前呼叫，用於讓下一位的生成與廣播及顯示延遲重疊
+    """
+    message_id, text = await prefetcher.take(speaker_id, prompt, stage)
+    await check_pause(conference_id) # <--- 添加消息前檢查
+    message = record_message(conference_id, speaker_id, text, message_id)
+    if on_recorded:
+        on_recorded(text)
+    if message:
+        await announce_message(conference_id, message, streamed=message_id is not None)
+    return text
+
+def get_conference_control(conference_id: str) -> ConferenceControl:
+    """取得會議的執行控制，必要時建立"""
+    control = conference_controls.get(conference_id)
+    if control is None:
+        control = conference_controls[conference_id] = ConferenceControl(conference_id)
+    return control
+
+def get_conference_events(conference_id: str) -> EventLog:
+    """取得會議的事件記錄，必要時建立"""
+    events = conference_events.get(conference_id)
+    if events is None:
+        events = conference_events[conference_id] = EventLog(BROADCAST_CONFIG["replay_buffer"])
+    return events
+
+def get_spectator_feed(conference_id: str) -> SpectatorFeed:
+    """取得會議的觀眾節拍，必要時建立"""
+    feed = conference_spectators.get(conference_id)
+    if feed is None:
+        feed = conference_spectators[conference_id] = SpectatorFeed(
+            conference_id,
+            lambda: conference_events.get(conference_id),
+            lambda since: initial_frames(conference_id, since)
+        )
+        # 已結束的會議：觀眾收到初始消息後即關閉
+        conference = active_conferences.get(conference_id)
+        if conference is None and conference_id in remote_conferences:
+            conference = remote_conferences[conference_id].data
+        if conference is not None and conference.get("stage") == "ended":
+            feed.close(code=1000, reason="Conference ended by user")
+    return feed
+
+def release_spectator_feed(conference_id: str, feed: SpectatorFeed):
+    """最後一位觀眾離開後移除會議的觀眾節拍，會議結束後不再保留"""
+    if feed.count == 0 and conference_spectators.get(conference_id) is feed:
+        del conference_spectators[conference_id]
+
+def get_conference_plan(conference_id: str) -> ConferencePlan:
+    """取得會議的生成計畫，不存在時依會議狀態建立"""
+    plan = conference_plans.get(conference_id)
+    if plan is None:
+        plan = ConferencePlan.build(active_conferences[conference_id])
+        conference_plans[conference_id] = plan
+    return plan
+
+def get_conference_context(conference_id: str) -> ConferenceContext:
+    """取得會議的上下文緩衝區，不存在時從現有記錄重建"""
+    context = conference_contexts.get(conference_id)
+    if context is None:
+        conference = active_conferences[conference_id]
+        context = ConferenceContext.for_scenario(conference.get("scenario"), conference.get("messages", []))
+        conference_contexts[conference_id] = context
+    return context
+
+def get_conference_summarizer(conference_id: str) -> MeetingSummarizer:
+    """取得會議的背景摘要器，必要時從會議狀態中的摘要還原（例如接手其他工作程序的會議）"""
+    summarizer = conference_summarizers.get(conference_id)
+    if summarizer is None:
+        conference = active_conferences[conference_id]
+        summarizer = MeetingSummarizer(conference_id, conference["topic"], get_conference_control(conference_id),
+                                       conference.setdefault("summary_state", {}))
+        conference_summarizers[conference_id] = summarizer
+    return summarizer
+
+def build_discussion_prompt(conference_id: str, participant_id: str, round_num: int, round_topic: str,
+                            context: Union[ConferenceContext, str]) -> str:
+    """
+    在討論階段的 token 預算內組合發言提示詞：會議計畫中的固定前綴 + 本輪重點、累積摘要與最近發言
+    context 為會議上下文緩衝區，或直接引用的文字（例如主席對被指派者的指示）
+    """
+    plan = get_conference_plan(conference_id)
+    summary = get_conference_summarizer(conference_id).summary
+
+    def render(_, context_text: str) -> str:
+        return plan.discussion_prompt(participant_id, round_num, round_topic, summary, context_text)
+
+    if isinstance(context, str):
+        context_text = context
+        return assemble_prompt("discussion", render,
+                               context=lambda max_tokens: llm.truncate_to_tokens(context_text, max_tokens))
+    return assemble_prompt("discussion", render, context=context.discussion)
+
+def order_remaining_speakers(conference: dict, participants_to_speak: List[dict], round_num: int,
+                             chair_id: str, first_speaker_id: Optional[str]) -> List[dict]:
+    """依情境權重與最近發言者排序剩餘的發言者（主席未明確指派後續發言者時的回退機制）"""
+    participants_to_speak = list(participants_to_speak)
+    last_speakers = []
+    if round_num > 1 or first_speaker_id: # 如果是第一輪但主席已指派，也需要考慮最後發言者
+        messages = conference.get("messages", [])
+        if messages:
+            speaker_count = 0
+            for msg in reversed(messages):
+                speaker_id = msg.get("speakerId")
+                if speaker_id != chair_id and speaker_id != MODERATOR_CONFIG["id"] and speaker_id not in last_speakers:
+                    last_speakers.append(speaker_id)
+                    speaker_count += 1
+                    if speaker_count >= 3: break
+
+    weights = {}
+    scenario_id = conference.get("scenario")
+    if scenario_id and scenario_id in DISCUSSION_SCENARIOS:
+        role_emphasis = DISCUSSION_SCENARIOS[scenario_id].get("role_emphasis", {})
+        for p in participants_to_speak:
+            p_id = p["id"]
+            base_weight = role_emphasis.get(p_id, 1.0)
+            if p_id in last_speakers:
+                position = last_speakers.index(p_id)
+                penalty = 0.5 - (position * 0.1)
+                weights[p_id] = base_weight * (1 - penalty)
+            else:
+                weights[p_id] = base_weight
+
+    if weights:
+        import random
+        for p_id in weights: weights[p_id] *= random.uniform(0.9, 1.1)
+        participants_to_speak.sort(key=lambda p: weights.get(p["id"], 1.0), reverse=True)
+    elif last_speakers:
+        def get_participant_order(p):
+            if p["id"] in last_speakers: return last_speakers.index(p["id"]) - len(last_speakers)
+            return 0
+        participants_to_speak.sort(key=get_participant_order, reverse=True)
+    return participants_to_speak
+
 async def run_discussion_round(conference_id: str, round_num: int):
     """執行一輪討論"""
     await check_pause(conference_id) # <--- 在函數開頭檢查
@@ -1277,229 +1531,115 @@ async def run_discussion_round(conference_id: str, round_num: int):
         return
 
     conference = active_conferences[conference_id]
-    main_topic = conference["topic"]
-    config = conference["config"] # 獲取會議配置
     participants_dict = conference["participants"] # 獲取參與者字典
 
+    # 本輪發言在記錄中的起始位置（本輪結束後交給背景摘要）；接手的會議只補上尚未發布的發言
+    spoken = begin_step(conference, f"round-{round_num}")
+    round_start = conference["step_start"]
+
     # 更新當前輪次
     await update_current_round(conference_id, round_num)
 
-    # === 修正：識別真正的主席 ===
-    designated_chair_id = config.get("chair") # 從前端傳來的配置中獲取指定主席ID
-    chair_id = None
-    chair_data = None
-
-    if designated_chair_id and designated_chair_id in participants_dict and participants_dict[designated_chair_id].get("isActive", True):
-        chair_id = designated_chair_id
-        chair_data = participants_dict[chair_id]
-        logger.info(f"使用指定的主席: {chair_data.get('name')} ({chair_id})")
-    else:
-        # 如果沒有指定或指定的主席無效，則嘗試找 'General manager'
-        potential_gm_id = "General manager"
-        if potential_gm_id in participants_dict and participants_dict[potential_gm_id].get("isActive", True):
-            chair_id = potential_gm_id
-            chair_data = participants_dict[chair_id]
-            logger.warning(f"未指定有效主席，回退使用 General Manager: {chair_data.get('name')} ({chair_id})")
-        else:
-            # 如果連 GM 都沒有，則使用第一個活躍的非秘書參與者
-            for p_id, p_data in participants_dict.items():
-                if p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True):
-                    chair_id = p_id
-                    chair_data = p_data
-                    logger.warning(f"未指定有效主席且無 General Manager，回退使用第一個活躍參與者: {chair_data.get('name')} ({chair_id})")
-                    break
-
-    # 如果找不到任何有效的主席（例如只有秘書），則讓秘書擔任
-    if not chair_id or not chair_data:
+    # 主席已在會議計畫中確定；找不到任何有效的主席（例如只有秘書）時讓秘書擔任
+    plan = get_conference_plan(conference_id)
+    chair_id = plan.chair_id
+    if not chair_id:
         logger.error(f"無法確定有效的主席，將由秘書 {MODERATOR_CONFIG['name']} 引導討論。")
         chair_id = MODERATOR_CONFIG["id"]
-        chair_data = MODERATOR_CONFIG
-    # === 主席識別結束 ===
-
-    chair_name = chair_data.get("name", "未知主席")
-    chair_title = chair_data.get("title", "未知職位")
 
     # 獲取輪次主題
-    round_topic = get_round_topic(round_num, main_topic, conference_id)
-
-    # 獲取補充資料
-    additional_notes = conference.get("additional_notes", "")
-
-    # === 新增：準備參與者名單字符串 ===
-    active_participants_list = []
-    for p_id, p_data in participants_dict.items():
-        # 排除主席自己和秘書
-        if p_id != chair_id and p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True):
-            active_participants_list.append(f"- {p_data.get('name', p_id)} ({p_data.get('title', '未知職位')})")
-    
-    participant_list_str = "\\n".join(active_participants_list) if active_participants_list else "無其他活躍參與者"
-    logger.debug(f"傳遞給主席提示詞的參與者列表: \\n{participant_list_str}")
-    # === 參與者名單準備結束 ===
-
-
-    # 主席開場白提示詞 - 加入 additional_notes 和 participant_list
-    chair_prompt = PROMPT_TEMPLATES["chair_opening"].format(
-        name=chair_name,
-        title=chair_title,
-        round_num=round_num,
-        topic=main_topic,
-        round_topic=round_topic,
-        additional_notes=additional_notes if additional_notes and additional_notes.strip() else "無", # 傳遞補充資料
-        participant_list=participant_list_str # 傳遞參與者列表
-    )
+    round_topic = plan.round_topic(round_num)
 
-    await check_pause(conference_id) # <--- 生成回應前檢查
-    # 生成主席開場白
-    chair_text = await generate_ai_response(chair_prompt, chair_id, conference_id)
-    await check_pause(conference_id) # <--- 添加消息前檢查
-    await add_message(conference_id, chair_id, chair_text)
+    # 主席開場白提示詞：會議計畫中的固定前綴（含補充資料與參與者名單）+ 本輪輪次與重點
+    chair_prompt = plan.chair_prompt(chair_id, round_num)
 
-    # === 新增：嘗試解析主席指派的第一位發言者 ===
+    # 管線模式下，每位發言者的內容一確定就開始生成下一位的發言
+    prefetcher = TurnPrefetcher(conference_id, ORCHESTRATION_CONFIG["pipelined_discussion"])
+    participants_to_speak = [participants_dict[p_id] for p_id in plan.speaker_ids if p_id != chair_id and p_id not in spoken]
     first_speaker_id = None
-    participants_to_speak_original = [p_data for p_id, p_data in participants_dict.items() if p_id != chair_id and p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True)]
-    
-    # 創建一個查找表：姓名/職位 -> ID
-    name_title_to_id = {}
-    for p_data in participants_to_speak_original:
-        p_id = p_data["id"]
-        name = p_data.get("name")
-        title = p_data.get("title")
-        if name: name_title_to_id[name] = p_id
-        if title: name_title_to_id[title] = p_id # 注意：如果職位重複可能會有問題，但暫時這樣處理
-        if name and title: name_title_to_id[f"{name} {title}"] = p_id # 組合查找
-        
-    logger.debug(f"用於解析主席指派的查找表: {name_title_to_id}")
-
-    # 簡單查找：檢查主席發言中是否包含參與者的姓名或職位
-    # 為了提高準確性，從最長的組合開始查找 (姓名+職位)
-    sorted_keys = sorted(name_title_to_id.keys(), key=len, reverse=True)
-    for key in sorted_keys:
-        if key in chair_text:
-            first_speaker_id = name_title_to_id[key]
-            logger.info(f"解析到主席可能指派的第一位發言者: {key} (ID: {first_speaker_id})")
-            break # 找到第一個就停止
-
-    if not first_speaker_id:
-        logger.warning(f"無法從主席發言中明確解析出第一位被指派者。將按預計順序發言。主席發言內容：\n{chair_text}")
-    # === 解析結束 ===
-
-    # 等待一下，讓客戶端有時間處理主席的消息
-    await asyncio.sleep(2)
-
-    # === 調整後續發言邏輯 ===
-    participants_to_speak = list(participants_to_speak_original) # 創建副本以修改
-    
-    # 如果解析到了第一位發言者，先讓他發言
-    if first_speaker_id:
-        assigned_participant_data = participants_dict.get(first_speaker_id)
-        if assigned_participant_data:
-            p_name = assigned_participant_data["name"]
-            p_title = assigned_participant_data["title"]
-            logger.info(f"由被指派者 {p_name} ({p_title}) 首先發言。")
-
-            discussion_prompt = PROMPT_TEMPLATES["discussion"].format(
-                name=p_name,
-                title=p_title,
-                topic=main_topic,
-                round_topic=round_topic,
-                context=chair_text # 讓被指派者看到主席的完整指示
-            )
-            if additional_notes and additional_notes.strip():
-                discussion_prompt += f"\\n\\n補充資料參考：{additional_notes}"
-
-            await check_pause(conference_id)
-            response_text = await generate_ai_response(discussion_prompt, first_speaker_id, conference_id)
-            await check_pause(conference_id)
-            await add_message(conference_id, first_speaker_id, response_text)
-            
-            # 更新上下文並等待
-            context_messages = conference["messages"][-15:]
-            context = "\\n".join([f"{msg['speakerName']} ({msg['speakerTitle']}): {msg['text']}" for msg in context_messages])
-            await asyncio.sleep(2)
 
-            # 從待發言列表中移除已被指派者
-            participants_to_speak = [p for p in participants_to_speak if p["id"] != first_speaker_id]
-        else:
-            logger.error(f"解析出的被指派者 ID {first_speaker_id} 無效。")
-            first_speaker_id = None # 重置，以執行後續的預計順序
-            
-    # (如果沒有解析到，或者解析出的ID無效，則 first_speaker_id 為 None，會跳過上面的 if 塊)
-    
-    # 讓剩下的參與者按預計順序發言
-    if participants_to_speak:
+    def prepare_remaining_speakers():
+        """決定剩餘發言順序並預先生成第一位的發言（需在上一則消息寫入記錄後呼叫）"""
+        nonlocal participants_to_speak
+        if not participants_to_speak:
+            return
         logger.info(f"由剩餘參與者按預計順序發言: {[p['id'] for p in participants_to_speak]}")
-        
-        # (這裡的排序邏輯可以保留，作為主席未明確指派後續發言者時的回退機制)
-        last_speakers = []
-        if round_num > 1 or first_speaker_id: # 如果是第一輪但主席已指派，也需要考慮最後發言者
-            messages = conference.get("messages", [])
-            if messages:
-                speaker_count = 0
-                for msg in reversed(messages):
-                    speaker_id = msg.get("speakerId")
-                    if speaker_id != chair_id and speaker_id != MODERATOR_CONFIG["id"] and speaker_id not in last_speakers:
-                        last_speakers.append(speaker_id)
-                        speaker_count += 1
-                        if speaker_count >= 3: break
-    
-        weights = {}
-        scenario_id = conference.get("scenario")
-        if scenario_id and scenario_id in DISCUSSION_SCENARIOS:
-            role_emphasis = DISCUSSION_SCENARIOS[scenario_id].get("role_emphasis", {})
-            for p in participants_to_speak:
-                p_id = p["id"]
-                base_weight = role_emphasis.get(p_id, 1.0)
-                if p_id in last_speakers:
-                    position = last_speakers.index(p_id)
-                    penalty = 0.5 - (position * 0.1)
-                    weights[p_id] = base_weight * (1 - penalty)
-                else:
-                    weights[p_id] = base_weight
-    
-        if weights:
-            import random
-            for p_id in weights: weights[p_id] *= random.uniform(0.9, 1.1)
-            participants_to_speak.sort(key=lambda p: weights.get(p["id"], 1.0), reverse=True)
-        elif last_speakers:
-            def get_participant_order(p):
-                if p["id"] in last_speakers: return last_speakers.index(p["id"]) - len(last_speakers)
-                return 0
-            participants_to_speak.sort(key=get_participant_order, reverse=True)
-    
+        participants_to_speak = order_remaining_speakers(conference, participants_to_speak, round_num, chair_id, first_speaker_id)
         speaker_order = [p["id"] for p in participants_to_speak]
         logger.info(f"輪次 {round_num} 實際剩餘發言順序: {speaker_order}")
         
         # 更新上下文 (包含主席和可能的第一位發言者)
-        context_messages = conference["messages"][-15:] 
-        context = "\\n".join([f"{msg['speakerName']} ({msg['speakerTitle']}): {msg['text']}" for msg in context_messages])
+        next_data = participants_to_speak[0]
+        prefetcher.start(next_data["id"], build_discussion_prompt(conference_id, next_data["id"], round_num, round_topic, get_conference_context(conference_id)))
+
+    def after_chair(chair_text: str):
+        """主席發言寫入記錄後：解析被指派者並預先生成其發言"""
+        nonlocal first_speaker_id, participants_to_speak
+        # === 新增：嘗試解析主席指派的第一位發言者 ===
+        first_speaker_id = plan.speaker_matcher.resolve(chair_text)
+        if not first_speaker_id:
+            logger.warning(f"無法從主席發言中明確解析出第一位被指派者。將按預計順序發言。主席發言內容：\n{chair_text}")
+        elif not participants_dict.get(first_speaker_id):
+            logger.error(f"解析出的被指派者 ID {first_speaker_id} 無效。")
+            first_speaker_id = None # 重置，以執行後續的預計順序
+        # === 解析結束 ===
+
+        if first_speaker_id in spoken:
+            # 接手前被指派者已發言
+            prepare_remaining_speakers()
+        elif first_speaker_id:
+            # 從待發言列表中移除已被指派者，並讓被指派者看到主席的完整指示
+            participants_to_speak = [p for p in participants_to_speak if p["id"] != first_speaker_id]
+            prefetcher.start(first_speaker_id, build_discussion_prompt(conference_id, first_speaker_id, round_num, round_topic, chair_text))
+        else:
+            prepare_remaining_speakers()
+
+    try:
+        if spoken:
+            # 主席開場白已發布（每輪第一則發言）：依原文重新解析被指派者
+            chair_text = conference["messages"][round_start]["text"]
+            after_chair(chair_text)
+        else:
+            await check_pause(conference_id) # <--- 生成回應前檢查
+            # 生成主席開場白
+            chair_text = await speak_turn(conference_id, chair_id, chair_prompt, prefetcher, on_recorded=after_chair,
+                                            stage="chair_opening")
+
+            # 等待一下，讓客戶端有時間處理主席的消息
+            await pace(conference_id, "after_turn")
+
+        # === 調整後續發言邏輯 ===
+        # 如果解析到了第一位發言者，先讓他發言
+        if first_speaker_id and first_speaker_id not in spoken:
+            assigned_participant_data = participants_dict[first_speaker_id]
+            logger.info(f"由被指派者 {assigned_participant_data['name']} ({assigned_participant_data['title']}) 首先發言。")
+            discussion_prompt = build_discussion_prompt(conference_id, first_speaker_id, round_num, round_topic, chair_text)
+
+            await check_pause(conference_id)
+            await speak_turn(conference_id, first_speaker_id, discussion_prompt, prefetcher,
+                             on_recorded=lambda _: prepare_remaining_speakers())
+            await pace(conference_id, "after_turn")
 
         # 讓剩下的參與者依次發言
-        for participant_data in participants_to_speak:
+        for index, participant_data in enumerate(participants_to_speak):
             await check_pause(conference_id)
             p_id = participant_data["id"]
-            p_name = participant_data["name"]
-            p_title = participant_data["title"]
-    
-            discussion_prompt = PROMPT_TEMPLATES["discussion"].format(
-                name=p_name,
-                title=p_title,
-                topic=main_topic,
-                round_topic=round_topic,
-                context=context
-            )
-    
-            if additional_notes and additional_notes.strip():
-                discussion_prompt += f"\\n\\n補充資料參考：{additional_notes}" 
-    
-            await check_pause(conference_id)
-            response_text = await generate_ai_response(discussion_prompt, p_id, conference_id)
+            discussion_prompt = build_discussion_prompt(conference_id, p_id, round_num, round_topic, get_conference_context(conference_id))
+
+            def prefetch_next(_, next_index=index + 1):
+                # 更新上下文後預先生成下一位的發言
+                if next_index < len(participants_to_speak):
+                    next_data = participants_to_speak[next_index]
+                    prefetcher.start(next_data["id"], build_discussion_prompt(conference_id, next_data["id"], round_num, round_topic, get_conference_context(conference_id)))
+
             await check_pause(conference_id)
-            await add_message(conference_id, p_id, response_text)
-    
-            # 更新上下文
-            context_messages = conference["messages"][-15:]
-            context = "\\n".join([f"{msg['speakerName']} ({msg['speakerTitle']}): {msg['text']}" for msg in context_messages])
-            await asyncio.sleep(2)
+            await speak_turn(conference_id, p_id, discussion_prompt, prefetcher, on_recorded=prefetch_next)
+            await pace(conference_id, "after_turn")
+    finally:
+        prefetcher.cancel()
+
+    # 在背景把本輪壓縮進累積摘要，不延誤下一輪
+    get_conference_summarizer(conference_id).submit_round(round_num, round_topic, conference["messages"][round_start:])
 
     await check_pause(conference_id) # <--- 廣播完成前檢查
     await broadcast_message(conference_id, {
@@ -1513,22 +1653,12 @@ async def generate_conclusion(conference_id: str):
     conf = active_conferences[conference_id]
     config = conf["config"]
     topic = config["topic"]
+    # 總結階段依序發布引導、秘書總結與結束語三則消息；接手的會議只補上尚未發布的部分
+    published = len(begin_step(conf, "conclusion"))
     
-    # 獲取主席
-    chair = None
-    # 從會議配置中獲取指定的主席 ID
-    designated_chair_id = conf.get("config", {}).get("chair")
-    if designated_chair_id and designated_chair_id in conf.get("participants", {}):
-        chair_participant_data = conf["participants"][designated_chair_id]
-        if chair_participant_data.get("isActive", True):
-             chair = chair_participant_data # 使用 Participant 字典
-
-    # 如果沒有指定或指定的主席無效，則使用第一個活躍非秘書參與者作為主席
-    if not chair:
-        for p_id, p_data in conf.get("participants", {}).items():
-             if p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True):
-                 chair = p_data
-                 break
+    # 主席與討論階段相同（會議計畫中確定），沒有主席時由秘書自行引導
+    chair_id = get_conference_plan(conference_id).chair_id
+    chair = conf["participants"][chair_id] if chair_id else None
 
     # 主席引導結論階段的文本
     chair_intro_text = f"感謝各位的精彩討論。我們已經完成了所有討論回合，現在進入會議的總結階段。讓我們請{MODERATOR_CONFIG['name']}為我們整理今天會議的重點內容。"
@@ -1538,40 +1668,59 @@ async def generate_conclusion(conference_id: str):
     # 添加引導消息
     intro_speaker_id = chair["id"] if chair else MODERATOR_CONFIG["id"]
     intro_text = chair_intro_text if chair else secretary_intro_text
-    await check_pause(conference_id) # <--- 添加消息前檢查
-    await add_message(conference_id, intro_speaker_id, intro_text)
-    
-    await asyncio.sleep(2)
-    
-    # 收集所有消息作為上下文
-    all_messages = [f"{m.get('speakerName', 'Unknown')} ({m.get('speakerTitle', 'Unknown')}): {m.get('text', '')}" for m in conf.get("messages", [])]
-    context = "\n".join(all_messages[-30:])  # 最後30條消息，增加上下文範圍
+    if published < 1:
+        await check_pause(conference_id) # <--- 添加消息前檢查
+        await add_message(conference_id, intro_speaker_id, intro_text)
+        
+        await pace(conference_id, "before_conclusion")
+    if published >= 2:
+        # 結論已發布：只差結束語，或整個總結階段都已完成
+        if published == 2:
+            await add_conclusion_closing(conference_id, chair)
+        return
     
     # 獲取附註補充資料
     additional_notes = conf.get("additional_notes", "")
     
+    summarizer = get_conference_summarizer(conference_id)
+    conclusion_max_tokens = 800
+    
+    # 增量總結：各輪的重點已在回合結束時擷取，這裡只需彙整；任何一輪缺少重點與摘要時改用上下文視窗
+    round_points = None
+    if SUMMARY_CONFIG["incremental_conclusion"]:
+        round_points = await summarizer.collect_points(conf.get("completed_rounds") or config["rounds"])
+    
     # 構建特殊的秘書結論提示
-    secretary_prompt = """
+    def render_secretary_prompt(notes: str, context: str) -> str:
+        secretary_prompt = """
     你是{name}（{title}），負責整理會議記錄並提出總結。
     
     會議主題是「{topic}」，經過了多輪討論。
     """.format(
-        name=MODERATOR_CONFIG['name'],
-        title=MODERATOR_CONFIG['title'],
-        topic=topic
-    )
-    
-    # 如果有附註資料，加入提示詞
-    if additional_notes and additional_notes.strip():
-        secretary_prompt += f"""
+            name=MODERATOR_CONFIG['name'],
+            title=MODERATOR_CONFIG['title'],
+            topic=topic
+        )
+        
+        # 如果有附註資料，加入提示詞
+        if notes:
+            secretary_prompt += f"""
     
     會議補充資料：
-    {additional_notes}
+    {notes}
     """
+        
+        # 整場會議的累積摘要，涵蓋最近發言以外的早期回合
+        if summarizer.summary:
+            secretary_prompt += f"""
     
-    secretary_prompt += """
+    會議各輪的累積摘要：
+    {summarizer.summary}
+    """
+        
+        secretary_prompt += """
     
-    以下是會議中的發言摘要：
+    以下是會議中的最近發言：
     {context}
     
     請你用繁體中文進行以下工作：
@@ -1582,29 +1731,48 @@ async def generate_conclusion(conference_id: str):
     
     格式為：先有一段回應/開頭，然後是總結內容，最後是帶編號的結論列表。總字數控制在400字以內。
     """.format(context=context)
+        return secretary_prompt
+    
+    if round_points:
+        secretary_prompt = assemble_prompt(
+            "conclusion",
+            lambda notes, points: PROMPT_TEMPLATES["conclusion_reduce"].format(
+                name=MODERATOR_CONFIG['name'],
+                title=MODERATOR_CONFIG['title'],
+                topic=topic,
+                rounds=len(round_points),
+                notes=f"\n    會議補充資料：{notes}" if notes else "",
+                points=points
+            ),
+            additional_notes,
+            lambda max_tokens: summarizer.points_text(max_tokens, round_points)
+        )
+        conclusion_max_tokens = SUMMARY_CONFIG["conclusion_max_tokens"]
+    else:
+        # 沒有擷取結果時：等待累積摘要，並以最近的消息作為上下文 (視窗大小依情境設定，超出 token 預算時捨棄最舊的發言)
+        await summarizer.wait()
+        secretary_prompt = assemble_prompt("conclusion", render_secretary_prompt, additional_notes,
+                                           get_conference_context(conference_id).conclusion)
     
     conclusion_text = "".strip() # 初始化結論文本
     try:
         await check_pause(conference_id) # <--- 生成結論前檢查
         # 生成總結
-        client = get_openai_client()
-        
-        if not client:
+        if not llm.is_available():
             # 如果API客戶端不可用，返回一個通用結論
             conclusion_text = f"謝謝{'主席' if chair else ''}。作為會議秘書，我整理了關於「{topic}」的討論要點。由於技術原因，無法生成完整的分析，但仍感謝各位的積極參與和寶貴意見。"
         else:
             try:
-                # 修改API調用，不使用await (OpenAI V1.x client is synchronous)
-                response = client.chat.completions.create(
-                    model=AI_CONFIG["default_model"],
+                conclusion_text = await llm.create_chat_completion(
                     temperature=0.5,  # 使用較低的溫度確保結論更加連貫和精確
                     messages=[
                         {"role": "system", "content": f"你是會議秘書{MODERATOR_CONFIG['name']}。你的工作是整理和總結會議內容，提供清晰的結論和後續行動項目。"},
                         {"role": "user", "content": secretary_prompt}
                     ],
-                    max_tokens=800
+                    max_tokens=conclusion_max_tokens,
+                    conference_id=conference_id,
+                    stage="conclusion"
                 )
-                conclusion_text = response.choices[0].message.content.strip()
             except Exception as e:
                 logger.error(f"生成結論時發生錯誤: {str(e)}")
                 conclusion_text = f"謝謝{'主席' if chair else ''}。作為會議秘書，我想總結一下今天關於「{topic}」的討論，但在生成過程中遇到了一些技術問題。根據我記錄的內容，我們討論了這個主題的多個方面，並達成了一些共識。感謝各位的參與和寶貴意見。"
@@ -1617,18 +1785,10 @@ async def generate_conclusion(conference_id: str):
             conclusion_text
         )
         
-        await asyncio.sleep(3)
+        await pace(conference_id, "after_conclusion")
         
         await check_pause(conference_id) # <--- 會議結束語前檢查
-        # 會議結束語
-        chair_end_text = f"感謝{MODERATOR_CONFIG['name']}的精彩總結，也感謝各位的積極參與。今天的會議到此結束，祝大家工作順利！"
-        secretary_end_text = f"以上就是今天會議的總結。感謝各位的積極參與。今天的會議到此結束，祝大家工作順利！"
-        
-        end_speaker_id = chair["id"] if chair else MODERATOR_CONFIG["id"]
-        end_text = chair_end_text if chair else secretary_end_text
-            
-        await check_pause(conference_id) # <--- 添加結束消息前檢查
-        await add_message(conference_id, end_speaker_id, end_text)
+        await add_conclusion_closing(conference_id, chair)
             
     except Exception as e:
         logger.error(f"生成結論過程中發生錯誤: {str(e)}")
@@ -1639,29 +1799,33 @@ async def generate_conclusion(conference_id: str):
             f"感謝各位的參與。由於技術原因，我無法生成完整的會議總結。今天關於「{topic}」的會議到此結束，謝謝大家！"
         )
 
-def get_round_topic(round_num: int, main_topic: str, conference_id: str = None) -> str:
-    """根據輪次和主題獲取輪次子主題"""
-    # 檢查是否有特定情境的輪次結構
-    if conference_id and conference_id in active_conferences:
-        scenario_id = active_conferences[conference_id].get("scenario")
-        if scenario_id and scenario_id in DISCUSSION_SCENARIOS:
-            scenario_rounds = DISCUSSION_SCENARIOS[scenario_id].get("round_structure", {})
-            if round_num in scenario_rounds:
-                return scenario_rounds[round_num]
+async def add_conclusion_closing(conference_id: str, chair: Optional[dict]):
+    """會議結束語：有主席時由主席發言，否則由秘書發言"""
+    chair_end_text = f"感謝{MODERATOR_CONFIG['name']}的精彩總結，也感謝各位的積極參與。今天的會議到此結束，祝大家工作順利！"
+    secretary_end_text = f"以上就是今天會議的總結。感謝各位的積極參與。今天的會議到此結束，祝大家工作順利！"
     
-    # 回退到預設輪次主題
-    return ROUND_TOPICS.get(round_num, ROUND_TOPICS[1]).format(topic=main_topic)
+    end_speaker_id = chair["id"] if chair else MODERATOR_CONFIG["id"]
+    end_text = chair_end_text if chair else secretary_end_text
+        
+    await check_pause(conference_id) # <--- 添加結束消息前檢查
+    await add_message(conference_id, end_speaker_id, end_text)
 
 # 原生WebSocket端點保持不變
 @app.websocket("/ws/conference/{conference_id}")
-async def websocket_endpoint(websocket: WebSocket, conference_id: str):
+async def websocket_endpoint(websocket: WebSocket, conference_id: str, since: Optional[int] = None):
+    """
+    會議的 WebSocket 連線；每個事件帶有序號 seq
+    重新連線時以 ?since=<最後收到的 seq> 連接，只補送錯過的事件（緩衝區不足時改送分段快照）
+    """
     try:
         await websocket.accept()
         
         client_info = f"{websocket.client.host}:{websocket.client.port}"
         logger.info(f"WebSocket連接已建立 - 客戶端: {client_info}，會議ID: {conference_id}")
         
-        if conference_id not in active_conferences:
+        # 會議可能在其他工作程序執行：向會議匯流排訂閱它的事件
+        local = conference_id in active_conferences
+        if not local and not await attach_remote_conference(conference_id):
             logger.warning(f"客戶端嘗試連接不存在的會議 {conference_id}")
             await websocket.send_json({
                 "type": MESSAGE_TYPES["error"],
@@ -1673,41 +1837,28 @@ async def websocket_endpoint(websocket: WebSocket, conference_id: str):
         if conference_id not in connected_clients:
             connected_clients[conference_id] = []
         
-        connected_clients[conference_id].append(websocket)
+        # 每個客戶端有專屬的寫入任務，廣播只放入其待送佇列
+        connection = ClientConnection(websocket, conference_id, on_closed=lambda c: remove_client(conference_id, c))
+        connection.start()
+        connected_clients[conference_id].append(connection)
         logger.info(f"客戶端已連接到會議 {conference_id}, 當前連接數: {len(connected_clients[conference_id])}")
         
-        # 發送現有消息和狀態
-        conference = active_conferences[conference_id]
-        init_data = {
-            "type": MESSAGE_TYPES["init"],
-            "messages": conference.get("messages", []),
-            "stage": conference.get("stage", "waiting"),
-            "current_round": conference.get("current_round", 0),
-            "conclusion": conference.get("conclusion")
-        }
-        logger.info(f"向客戶端發送初始化數據 - 會議ID: {conference_id}, 階段: {conference.get('stage', 'waiting')}")
-        await websocket.send_json(init_data)
-        
-        # 如果是第一個客戶端連接，開始自我介紹
-        if len(connected_clients[conference_id]) == 1 and conference["stage"] == "waiting":
-            logger.info(f"首位客戶端已連接，開始會議 {conference_id} 的自我介紹階段")
-            # 直接使用asyncio.create_task代替BackgroundTasks
-            asyncio.create_task(process_introductions(conference_id))
+        # 發送現有消息和狀態（與登記連線之間沒有 await，不會漏掉或重複任何事件）
+        connection.prime(initial_frames(conference_id, since))
         
         try:
             while True:
                 data = await websocket.receive_text()
                 logger.info(f"收到來自客戶端的消息: {data}")
-                await process_client_message(conference_id, data)
+                dispatch_client_message(conference_id, data)
         except WebSocketDisconnect:
             logger.info(f"客戶端正常斷開連接，會議 {conference_id}，客戶端: {client_info}")
         except Exception as e:
             logger.error(f"處理WebSocket消息時出錯: {str(e)}")
         finally:
             # 確保清理資源
-            if conference_id in connected_clients and websocket in connected_clients[conference_id]:
-                connected_clients[conference_id].remove(websocket)
-                logger.info(f"客戶端已從會議中移除，會議 {conference_id}，當前連接數: {len(connected_clients[conference_id])}")
+            connection.stop()
+            remove_client(conference_id, connection)
     except Exception as e:
         logger.error(f"WebSocket連接初始化錯誤: {str(e)}")
         logger.exception("WebSocket初始化時發生異常")
@@ -1716,55 +1867,266 @@ async def websocket_endpoint(websocket: WebSocket, conference_id: str):
         except:
             pass
 
-async def process_client_message(conference_id: str, data: str):
-    """處理從客戶端收到的消息"""
+@app.websocket("/ws/conference/{conference_id}/spectate")
+async def spectate_endpoint(websocket: WebSocket, conference_id: str, since: Optional[int] = None):
+    """
+    會議的唯讀觀眾連線：只接收事件 (與一般連線相同的初始消息、事件與序號)，不處理任何指令
+    觀眾不加入 connected_clients，廣播時不需逐一放入佇列，而是每個節拍讀取共用的事件記錄
+    """
+    await websocket.accept()
+    if conference_id not in active_conferences and not await attach_remote_conference(conference_id):
+        await websocket.send_json({
+            "type": MESSAGE_TYPES["error"],
+            "message": "會議不存在"
+        })
+        await websocket.close()
+        return
+
+    feed = get_spectator_feed(conference_id)
+    try:
+        if feed.full:
+            logger.warning(f"會議 {conference_id} 的觀眾已達上限 {feed.count}，拒絕新的觀眾")
+            await websocket.close(code=1013, reason="Too many spectators")
+            return
+        await feed.serve(websocket, since)
+    except Exception as e:
+        # 觀眾斷線只會在送出時發現，屬於正常情況
+        logger.debug(f"會議 {conference_id} 的觀眾連線結束: {type(e).__name__}")
+    finally:
+        release_spectator_feed(conference_id, feed)
+        detach_if_unwatched(conference_id)
+
+def dispatch_client_message(conference_id: str, data: str):
+    """控制指令由執行會議的工作程序處理：本工作程序執行的會議直接處理，否則轉交擁有者"""
+    if conference_id in active_conferences:
+        process_client_message(conference_id, data)
+    elif conference_id in remote_conferences:
+        owner = remote_conferences[conference_id].owner
+        logger.info(f"會議 {conference_id} 由工作程序 {owner} 執行，轉交客戶端指令")
+        get_bus().send(owner, "command", {"conference_id": conference_id, "data": data})
+
+def process_client_message(conference_id: str, data: str):
+    """處理從客戶端收到的消息：控制指令只放入會議的指令信箱，不在讀取迴圈中等待執行"""
+    command_handlers = {
+        "next_round": process_next_round,
+        "end_conference": end_conference,
+        "pause_conference": pause_conference,
+        "resume_conference": resume_conference
+    }
     try:
         message = json.loads(data)
         message_type = message.get("type", "")
         logger.info(f"處理客戶端消息，類型: {message_type}")
         
-        if message_type == "next_round":
-            await process_next_round(conference_id)
-        elif message_type == "end_conference":
-            await end_conference(conference_id)
-        elif message_type == "pause_conference":
-            await pause_conference(conference_id)
-        elif message_type == "resume_conference":
-            await resume_conference(conference_id)
+        handler = command_handlers.get(message_type)
+        if handler:
+            get_conference_control(conference_id).post(message_type, lambda: handler(conference_id))
     except json.JSONDecodeError:
         logger.error(f"無法解析客戶端消息: {data}")
     except Exception as e:
         logger.error(f"處理客戶端消息時出錯: {str(e)}")
 
+def initial_frames(conference_id: str, since: Optional[int]) -> List[Frame]:
+    """
+    新連線的初始消息：
+    - 未指定 since：完整的 init（包含所有消息）
+    - 指定 since 且錯過的事件都還在緩衝區：resync 後補送錯過的事件
+    - 否則：不含消息的 init，隨後以 snapshot_chunk 分段送出會議記錄
+    """
+    conference = active_conferences[conference_id] if conference_id in active_conferences else remote_conferences[conference_id].data
+    events = get_conference_events(conference_id)
+    state = {
+        "stage": conference.get("stage", "waiting"),
+        "current_round": conference.get("current_round", 0),
+        "conclusion": conference.get("conclusion"),
+        "seq": events.last_seq
+    }
+    if since is None:
+        logger.info(f"向客戶端發送初始化數據 - 會議ID: {conference_id}, 階段: {state['stage']}")
+        return [Frame.encode({"type": MESSAGE_TYPES["init"], "messages": conference.get("messages", []), **state})]
+
+    missed = events.since(since)
+    if missed is not None:
+        logger.info(f"客戶端重新連線 - 會議ID: {conference_id}, 補送序號 {since} 之後的 {len(missed)} 則事件")
+        return [Frame.encode({"type": MESSAGE_TYPES["resync"], "since": since, **state}), *missed]
+
+    messages = conference.get("messages", [])
+    chunk_size = BROADCAST_CONFIG["snapshot_chunk"]
+    logger.info(f"客戶端重新連線 - 會議ID: {conference_id}, 序號 {since} 已不在緩衝區，改送 {len(messages)} 則消息的分段快照")
+    frames = [Frame.encode({"type": MESSAGE_TYPES["init"], "messages": [], "total_messages": len(messages), **state})]
+    for offset in range(0, len(messages), chunk_size):
+        frames.append(Frame.encode({
+            "type": MESSAGE_TYPES["snapshot_chunk"],
+            "offset": offset,
+            "messages": messages[offset:offset + chunk_size],
+            "final": offset + chunk_size >= len(messages),
+            "seq": events.last_seq
+        }))
+    return frames
+
+def remove_client(conference_id: str, connection: ClientConnection):
+    """將已斷線或已關閉的客戶端移出會議的連接列表"""
+    clients = connected_clients.get(conference_id)
+    if clients and connection in clients:
+        clients.remove(connection)
+        logger.info(f"客戶端已從會議中移除，會議 {conference_id}，當前連接數: {len(clients)}")
+        if not clients:
+            detach_if_unwatched(conference_id)
+
+def detach_if_unwatched(conference_id: str):
+    """其他工作程序執行的會議在本工作程序已沒有客戶端與觀眾時取消訂閱"""
+    if conference_id not in remote_conferences or connected_clients.get(conference_id):
+        return
+    feed = conference_spectators.get(conference_id)
+    if feed is None or feed.count == 0:
+        detach_remote_conference(conference_id)
+
+async def attach_remote_conference(conference_id: str) -> bool:
+    """訂閱在其他工作程序執行的會議，返回會議是否存在；已訂閱時直接返回"""
+    if conference_id in remote_conferences:
+        return True
+    try:
+        state = await get_bus().subscribe(conference_id)
+    except BusError as e:
+        logger.error(f"向會議匯流排訂閱會議 {conference_id} 失敗: {str(e)}")
+        return False
+    if state is None:
+        get_bus().unsubscribe(conference_id)
+        return False
+    # 同時連接的另一個客戶端可能已完成訂閱，沿用既有的狀態與事件記錄
+    if conference_id not in remote_conferences:
+        remote_conferences[conference_id] = state
+        conference_events[conference_id] = EventLog(BROADCAST_CONFIG["replay_buffer"], last_seq=state.seq)
+        connected_clients.setdefault(conference_id, [])
+        logger.info(f"已訂閱在工作程序 {state.owner} 執行的會議 {conference_id} (序號 {state.seq})")
+    return True
+
+def detach_remote_conference(conference_id: str):
+    """本工作程序已沒有客戶端連接此會議：取消訂閱並釋放記錄"""
+    get_bus().unsubscribe(conference_id)
+    remote_conferences.pop(conference_id, None)
+    conference_events.pop(conference_id, None)
+    connected_clients.pop(conference_id, None)
+    conference_spectators.pop(conference_id, None)
+    logger.info(f"已取消訂閱在其他工作程序執行的會議 {conference_id}")
+
+def deliver_remote_event(conference_id: str, frame: Optional[Frame], state: Optional[ConferenceState]):
+    """收到其他工作程序發布的事件：更新狀態快照並轉送給本工作程序的客戶端"""
+    if conference_id not in remote_conferences:
+        return
+    # 先保存事件再更新狀態：快照序號永遠不超過事件記錄，新連線的初始消息不會漏掉或重複事件
+    if frame is not None and conference_events[conference_id].record(frame):
+        for client in list(connected_clients.get(conference_id, [])):
+            client.send(frame)
+    if state is not None:
+        remote_conferences[conference_id] = state
+
+async def handle_bus_call(kind: str, payload: dict) -> Optional[dict]:
+    """處理其他工作程序轉來的請求：建立由本工作程序執行的會議，或執行客戶端的控制指令"""
+    if kind == "start_conference":
+        return launch_conference(ConferenceConfig(**payload["config"]), payload["conference_id"])
+    if kind == "command":
+        conference_id = payload["conference_id"]
+        if conference_id in active_conferences:
+            process_client_message(conference_id, payload["data"])
+        else:
+            logger.warning(f"收到轉交的指令，但會議 {conference_id} 不在本工作程序執行")
+        return None
+    raise ValueError(f"未知的請求: {kind}")
+
+def adopt_orphans(conference_ids: List[str]):
+    """成員變動後，接手依一致性雜湊歸屬本工作程序、擁有者已離線的會議"""
+    bus = get_bus()
+    for conference_id in conference_ids:
+        if conference_id not in active_conferences and bus.owner_for(conference_id) == bus.worker_id:
+            asyncio.create_task(adopt_conference(conference_id))
+
+async def adopt_conference(conference_id: str):
+    """向匯流排認領會議，成功時從最新的狀態快照繼續執行"""
+    try:
+        state = await get_bus().claim(conference_id)
+    except BusError as e:
+        logger.error(f"認領會議 {conference_id} 失敗: {str(e)}")
+        return
+    if state is None or conference_id in active_conferences:
+        return
+    conference = state.data
+    active_conferences[conference_id] = conference
+    if conference_id in remote_conferences:
+        # 本工作程序已有客戶端在觀看：沿用原連線與事件記錄，不再需要訂閱
+        remote_conferences.pop(conference_id)
+        get_bus().unsubscribe(conference_id)
+    events = conference_events.get(conference_id)
+    if events is None or events.last_seq < state.seq:
+        conference_events[conference_id] = EventLog(BROADCAST_CONFIG["replay_buffer"], last_seq=state.seq)
+    connected_clients.setdefault(conference_id, [])
+    llm.scheduler.set_weight(conference_id, conference["config"].get("priority", 1))
+    logger.info(f"已接手會議 {conference_id}，階段: {conference['stage']}，已完成 {conference.get('completed_rounds', 0)} 輪")
+
+    if conference["stage"] in ("ended", "error"):
+        return
+    control = get_conference_control(conference_id)
+    control.completed_rounds = conference.get("completed_rounds", 0)
+    if conference["stage"] == "paused":
+        control.pause()
+    start_orchestrator(conference_id)
+
+def release_conference(conference_id: str):
+    """會議已由其他工作程序接手：停止本工作程序的流程，讓客戶端重新連線到新的擁有者"""
+    if conference_id not in active_conferences:
+        return
+    logger.warning(f"會議 {conference_id} 已由其他工作程序接手，停止本工作程序的執行")
+    get_conference_control(conference_id).cancel()
+    llm.scheduler.forget(conference_id)
+    summarizer = conference_summarizers.pop(conference_id, None)
+    if summarizer:
+        summarizer.cancel()
+    for client in list(connected_clients.get(conference_id, [])):
+        client.close(code=1012, reason="Conference moved to another worker")
+    feed = conference_spectators.get(conference_id)
+    if feed:
+        feed.close(code=1012, reason="Conference moved to another worker")
+    for registry in (active_conferences, connected_clients, conference_contexts, conference_plans,
+                     conference_controls, conference_events, conference_spectators):
+        registry.pop(conference_id, None)
+
+def close_remote_clients(conference_id: str):
+    """會議已由執行它的工作程序結束：送完剩餘的消息後關閉本工作程序的客戶端連接"""
+    for client in list(connected_clients.get(conference_id, [])):
+        client.close(code=1000, reason="Conference ended by user")
+    feed = conference_spectators.get(conference_id)
+    if feed:
+        feed.close(code=1000, reason="Conference ended by user")
+
 async def broadcast_message(conference_id: str, message: dict):
-    """向會議中的所有客戶端廣播消息"""
+    """向會議中的所有客戶端廣播消息：編碼一次後放入各客戶端的待送佇列，不等待網路送出"""
     if conference_id not in connected_clients:
         logger.warning(f"嘗試向不存在的會議 {conference_id} 廣播消息")
         return
     
+    # 編上序號並只編碼一次，保存到重播緩衝區（沒有客戶端時也保存，供稍後重新連線補送）
+    frame = get_conference_events(conference_id).publish(message)
+    # 發布給其他工作程序上的訂閱者；增量文字以外的事件會改變會議狀態，一併更新狀態快照
+    get_bus().publish(conference_id, frame, None if frame.type == MESSAGE_TYPES["message_delta"] else active_conferences.get(conference_id))
+    
     clients_count = len(connected_clients[conference_id])
     if clients_count == 0:
-        logger.warning(f"會議 {conference_id} 沒有連接的客戶端，無法廣播消息")
+        logger.debug(f"會議 {conference_id} 沒有連接的客戶端，無法廣播消息")
         return
         
     logger.info(f"正在向會議 {conference_id} 的 {clients_count} 個客戶端廣播消息，類型: {message.get('type', 'unknown')}")
     
-    success_count = 0
-    for client in connected_clients[conference_id]:
-        try:
-            await client.send_json(message)
-            success_count += 1
-        except Exception as e:
-            logger.error(f"向客戶端廣播消息失敗: {str(e)}")
+    # 所有客戶端共用同一份文字幀；依緩慢客戶端政策被斷開的連接會在迭代中移出列表，因此先複製
+    queued_count = sum(1 for client in list(connected_clients[conference_id]) if client.send(frame))
     
-    logger.info(f"廣播完成 - 成功: {success_count}/{clients_count}")
+    logger.info(f"廣播完成 - 已排入: {queued_count}/{clients_count}")
 
-async def add_message(conference_id: str, speaker_id: str, text: str):
-    """添加消息並廣播給所有客戶端"""
+def record_message(conference_id: str, speaker_id: str, text: str, message_id: Optional[str] = None) -> Optional[dict]:
+    """建立消息並寫入會議記錄（不廣播），返回消息內容"""
     conference = active_conferences.get(conference_id)
     if not conference:
         logger.error(f"嘗試添加消息到不存在的會議: {conference_id}")
-        return
+        return None
     
     participant = None
     # 從 config 中查找，確保數據一致性
@@ -1787,7 +2149,7 @@ async def add_message(conference_id: str, speaker_id: str, text: str):
     # === 日誌結束 ===
 
     message = {
-        "id": str(uuid.uuid4()),
+        "id": message_id or str(uuid.uuid4()),
         "speakerId": speaker_id,
         "speakerName": participant.get("name", "未知"),
         "speakerTitle": participant.get("title", "未知"),
@@ -1798,32 +2160,37 @@ async def add_message(conference_id: str, speaker_id: str, text: str):
     if "messages" not in conference:
         conference["messages"] = []
     
+    context = get_conference_context(conference_id)
     conference["messages"].append(message)
-    
+    context.append(message)
+    return message
+
+async def announce_message(conference_id: str, message: dict, streamed: bool = False):
+    """廣播已寫入記錄的消息；streamed 表示內容已透過 message_delta 推送過"""
     await broadcast_message(conference_id, {
-        "type": MESSAGE_TYPES["new_message"],
+        "type": MESSAGE_TYPES["message_end"] if streamed else MESSAGE_TYPES["new_message"],
         "message": message,
-        "current_speaker": speaker_id
+        "current_speaker": message["speakerId"]
     })
     
     # 添加短暫延遲，使對話更自然
-    await asyncio.sleep(0.5)
+    await pace(conference_id, "after_message")
+
+async def add_message(conference_id: str, speaker_id: str, text: str, message_id: Optional[str] = None):
+    """
+    添加消息並廣播給所有客戶端
+    傳入 message_id 表示該消息已透過 message_delta 串流推送，此時以 message_end 提交完整內容
+    """
+    message = record_message(conference_id, speaker_id, text, message_id)
+    if message:
+        await announce_message(conference_id, message, streamed=message_id is not None)
 
 async def process_next_round(conference_id: str):
-    """進入下一輪討論"""
-    conference = active_conferences.get(conference_id)
-    if not conference or conference["stage"] != "discussion":
-        return
-    
-    current_round = conference.get("current_round", 0)
-    total_rounds = conference["config"].get("rounds", 3)
-    
-    if current_round < total_rounds:
-        await update_current_round(conference_id, current_round + 1)
-        await run_discussion_round(conference_id, current_round + 1)
-    else:
-        # 已經是最後一輪
-        await process_conclusion(conference_id)
+    """
+    next_round 指令：會議由 /api/conference/start 啟動後一律自動執行到結束，此指令不推進流程
+    保留指令只為相容舊版客戶端，收到時記錄後忽略
+    """
+    logger.info(f"會議 {conference_id} 自動進行中，忽略 next_round 指令")
 
 async def end_conference(conference_id: str):
     """結束會議 - 直接結束，不生成結論"""
@@ -1836,6 +2203,9 @@ async def end_conference(conference_id: str):
     current_stage = conference.get("stage")
     logger.info(f"會議 {conference_id} 當前階段: {current_stage}")
 
+    # 取消所有推進此會議的任務（包括進行中的 LLM 請求），暫停中的流程也會被喚醒並中止
+    get_conference_control(conference_id).cancel()
+
     # 無論處於哪個階段（進行中、暫停等），都直接設置為 ended
     if current_stage != "ended":
         logger.info(f"強制結束會議 {conference_id}，設置狀態為 ended")
@@ -1843,86 +2213,27 @@ async def end_conference(conference_id: str):
     else:
         logger.info(f"會議 {conference_id} 狀態已為 {current_stage}，無需再次結束流程，僅清理連接。")
 
-    # 清理WebSocket連接
+    # 清理WebSocket連接（包括其他工作程序上的客戶端）
+    get_bus().end(conference_id)
     if conference_id in connected_clients:
         clients_to_close = list(connected_clients[conference_id]) # 創建副本以安全迭代
         logger.info(f"正在關閉會議 {conference_id} 的 {len(clients_to_close)} 個WebSocket連接...")
-        closed_count = 0
         for client in clients_to_close:
-            try:
-                await client.close(code=1000, reason="Conference ended by user") # 使用標準關閉碼並說明原因
-                closed_count += 1
-            except Exception as e:
-                logger.warning(f"關閉客戶端 {client} 連接時出錯: {str(e)}")
+            # 寫入任務送完佇列中剩餘的消息 (包括上面的 ended 通知) 後再送出關閉幀
+            client.close(code=1000, reason="Conference ended by user") # 使用標準關閉碼並說明原因
 
         # 清空連接列表
         if conference_id in connected_clients: # 再次檢查以防萬一
-            await asyncio.sleep(0.1) # 等待客戶端處理關閉幀
             connected_clients[conference_id] = []
-            logger.info(f"會議 {conference_id} 的 {closed_count}/{len(clients_to_close)} 個客戶端連接已關閉並移除。")
+            logger.info(f"會議 {conference_id} 的 {len(clients_to_close)} 個客戶端連接已排定關閉並移除。")
 
-    logger.info(f"會議 {conference_id} 已強制結束。")
-
-async def process_introductions(conference_id: str):
-    """處理會議的自我介紹階段"""
-    try:
-        logger.info(f"開始處理會議 {conference_id} 的自我介紹階段")
-        
-        if conference_id not in active_conferences:
-            logger.error(f"嘗試處理不存在的會議: {conference_id}")
-            return
-        
-        conference = active_conferences[conference_id]
-        
-        # 檢查是否有客戶端連接
-        if conference_id not in connected_clients or len(connected_clients[conference_id]) == 0:
-            logger.warning(f"會議 {conference_id} 沒有客戶端連接，但嘗試進行自我介紹")
-            # 我們仍然繼續處理，以便稍後客戶端連接時可以看到介紹
-        
-        # 更新會議階段為「介紹」
-        await update_conference_stage(conference_id, "introduction")
-        
-        # 生成並發送自我介紹
-        await generate_introductions(conference_id)
-        
-        # 進入討論階段
-        await update_conference_stage(conference_id, "discussion")
-        
-        # 開始第一輪討論
-        await run_discussion_round(conference_id, 1)
-    except Exception as e:
-        logger.error(f"處理自我介紹階段時出錯: {str(e)}")
-        logger.exception("處理自我介紹階段時發生異常")
-        
-        # 嘗試將會議設置為錯誤狀態
-        try:
-            if conference_id in active_conferences:
-                active_conferences[conference_id]["stage"] = "error"
-                await broadcast_message(conference_id, {
-                    "type": MESSAGE_TYPES["error"],
-                    "message": f"處理自我介紹階段時出錯: {str(e)[:100]}"
-                })
-        except:
-            pass
+    # 觀眾送完剩餘的事件後關閉，最後一位觀眾離開時移除
+    feed = conference_spectators.get(conference_id)
+    if feed:
+        feed.close(code=1000, reason="Conference ended by user")
+        release_spectator_feed(conference_id, feed)
 
-async def process_conclusion(conference_id: str):
-    """處理會議的結論階段"""
-    logger.info(f"開始處理會議 {conference_id} 的結論階段")
-    
-    if conference_id not in active_conferences:
-        logger.error(f"嘗試處理不存在的會議: {conference_id}")
-        return
-    
-    # 更新會議階段為「結論」
-    await update_conference_stage(conference_id, "conclusion")
-    
-    # 生成會議結論
-    await generate_conclusion(conference_id)
-    
-    # 標記會議結束
-    await update_conference_stage(conference_id, "ended")
-    
-    logger.info(f"會議 {conference_id} 已完成")
+    logger.info(f"會議 {conference_id} 已強制結束。")
 
 # 添加全局異常處理器
 @app.exception_handler(RequestValidationError)
@@ -1959,6 +2270,7 @@ async def pause_conference(conference_id: str):
     previous_stage = conference.get("stage", "waiting")
     conference["previous_stage"] = previous_stage
     conference["stage"] = "paused"
+    get_conference_control(conference_id).pause()
     
     # 通知所有客戶端
     await broadcast_message(conference_id, {
@@ -1984,6 +2296,7 @@ async def resume_conference(conference_id: str):
         previous_stage = "discussion"
     
     conference["stage"] = previous_stage
+    get_conference_control(conference_id).resume()
     
     # 通知所有客戶端
     await broadcast_message(conference_id, {
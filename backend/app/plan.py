@@ -0,0 +1,208 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 會議計畫
+
+會議建立時一次算好整場會議不會改變的部分：每位參與者編譯好的系統訊息與溫度、
+主席、發言者名單 (及解析主席指派用的比對器) 與各輪主題。發言時只需填入會變動的內容 (上下文、摘要等)。
+
+討論與主席提示詞的固定前綴 (角色、指示、補充資料) 也在此組合並保存，
+同一參與者每次發言的請求開頭 (系統訊息 + 前綴) 逐位元組相同，
+讓支援提示詞快取的供應商能重用已處理過的前綴。
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import AI_CONFIG, MODERATOR_CONFIG, PROMPT_TEMPLATES, ROLE_PROMPTS, ROUND_TOPICS
+from app.context import assemble_prefix
+from app.llm.tokens import estimate_tokens
+from app.speakers import SpeakerMatcher
+
+logger = logging.getLogger(__name__)
+
+# 未指定主席時優先擔任主席的角色
+DEFAULT_CHAIR_ID = "General manager"
+
+
+@dataclass
+class ParticipantPlan:
+    """單一參與者編譯好的生成設定"""
+    id: str
+    data: Dict[str, Any]
+    role_prompt: str
+    system_message: str
+    temperature: float
+
+
+def compile_participant(participant_id: str, participant_data: Optional[Dict[str, Any]],
+                        scenario_prompt: str = "") -> ParticipantPlan:
+    """解析角色提示、系統訊息與溫度 (參與者自訂值優先，其次為全局預設)"""
+    data = participant_data or {}
+    role_prompt = ROLE_PROMPTS.get(participant_id, "")
+    custom_role_prompt = data.get("rolePrompt")
+    if custom_role_prompt and custom_role_prompt.strip():
+        role_prompt = custom_role_prompt
+
+    system_message = AI_CONFIG["system_message_template"].format(
+        participant_id=participant_id,
+        role_prompt=role_prompt
+    )
+    if scenario_prompt:
+        system_message += f"\n\n{scenario_prompt}"
+
+    temperature = data.get("temperature")
+    if temperature is None:
+        temperature = AI_CONFIG["default_temperature"]
+    return ParticipantPlan(participant_id, data, role_prompt, system_message, temperature)
+
+
+def resolve_chair_id(participants: Dict[str, Dict[str, Any]], designated_chair_id: Optional[str]) -> Optional[str]:
+    """主席：指定的主席 > General manager > 第一位活躍的非秘書參與者；都沒有時返回 None"""
+    def is_candidate(p_id: Optional[str]) -> bool:
+        return bool(p_id) and p_id in participants and participants[p_id].get("isActive", True)
+
+    if is_candidate(designated_chair_id):
+        return designated_chair_id
+    if is_candidate(DEFAULT_CHAIR_ID):
+        logger.warning(f"未指定有效主席，回退使用 General Manager: {participants[DEFAULT_CHAIR_ID].get('name')}")
+        return DEFAULT_CHAIR_ID
+    for p_id, p_data in participants.items():
+        if p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True):
+            logger.warning(f"未指定有效主席且無 General Manager，回退使用第一個活躍參與者: {p_data.get('name')} ({p_id})")
+            return p_id
+    return None
+
+
+@dataclass
+class ConferencePlan:
+    """整場會議固定不變的生成計畫"""
+    conference_id: str
+    topic: str
+    scenario: Optional[str]
+    participants: Dict[str, ParticipantPlan]
+    chair_id: Optional[str]
+    # 依原始順序：自我介紹者 (活躍且非秘書) 與討論中主席以外的發言者
+    introduction_ids: List[str]
+    speaker_ids: List[str]
+    # 主席提示詞中的與會者名單，以及解析主席指派對象用的比對器
+    speaker_list: str = ""
+    speaker_matcher: Optional[SpeakerMatcher] = None
+    round_topics: Dict[int, str] = field(default_factory=dict)
+    scenario_round_structure: Dict[Any, str] = field(default_factory=dict)
+    additional_notes: str = ""
+    # 已組合的提示詞前綴：(階段, 參與者ID) -> 前綴
+    prompt_prefixes: Dict[Tuple[str, str], str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, conference: Dict[str, Any]) -> "ConferencePlan":
+        """依會議狀態建立計畫"""
+        from app.scenarios import DISCUSSION_SCENARIOS
+        scenario = conference.get("scenario")
+        scenario_config = DISCUSSION_SCENARIOS.get(scenario, {}) if scenario else {}
+        scenario_prompt = scenario_config.get("system_prompt", "")
+        participants = conference["participants"]
+
+        chair_id = resolve_chair_id(participants, conference.get("config", {}).get("chair"))
+        introduction_ids = [
+            p["id"] for p in conference["config"]["participants"]
+            if p.get("isActive", True) and p["id"] != MODERATOR_CONFIG["id"]
+        ]
+        speaker_ids = [
+            p_id for p_id, p_data in participants.items()
+            if p_id != chair_id and p_id != MODERATOR_CONFIG["id"] and p_data.get("isActive", True)
+        ]
+        plan = cls(
+            conference_id=conference["id"],
+            topic=conference["topic"],
+            scenario=scenario,
+            participants={p_id: compile_participant(p_id, p_data, scenario_prompt) for p_id, p_data in participants.items()},
+            chair_id=chair_id,
+            introduction_ids=introduction_ids,
+            speaker_ids=speaker_ids,
+            scenario_round_structure=scenario_config.get("round_structure", {}),
+            additional_notes=conference.get("additional_notes", "")
+        )
+        speaker_lines = [
+            f"- {participants[p_id].get('name', p_id)} ({participants[p_id].get('title', '未知職位')})" for p_id in speaker_ids
+        ]
+        plan.speaker_list = "\\n".join(speaker_lines) if speaker_lines else "無其他活躍參與者"
+        plan.speaker_matcher = SpeakerMatcher({"id": p_id, **participants[p_id]} for p_id in speaker_ids)
+        for round_num in range(1, conference.get("rounds", 0) + 1):
+            plan.round_topics[round_num] = plan._render_round_topic(round_num)
+        return plan
+
+    def _render_round_topic(self, round_num: int) -> str:
+        if round_num in self.scenario_round_structure:
+            return self.scenario_round_structure[round_num]
+        return ROUND_TOPICS.get(round_num, ROUND_TOPICS[1]).format(topic=self.topic)
+
+    def round_topic(self, round_num: int) -> str:
+        """取得輪次子主題 (超出預先計算範圍的輪次即時計算)"""
+        topic = self.round_topics.get(round_num)
+        if topic is None:
+            topic = self.round_topics[round_num] = self._render_round_topic(round_num)
+        return topic
+
+    def _participant_data(self, participant_id: str) -> Dict[str, Any]:
+        participant = self.participants.get(participant_id)
+        if participant is not None:
+            return participant.data
+        return MODERATOR_CONFIG if participant_id == MODERATOR_CONFIG["id"] else {}
+
+    def discussion_prefix(self, participant_id: str) -> str:
+        """參與者討論發言提示詞的固定前綴 (補充資料最多佔討論預算的 notes_share)"""
+        key = ("discussion", participant_id)
+        if key not in self.prompt_prefixes:
+            data = self._participant_data(participant_id)
+
+            def render(notes: str) -> str:
+                prefix = PROMPT_TEMPLATES["discussion"].format(
+                    name=data.get("name", participant_id),
+                    title=data.get("title", "未知職位"),
+                    topic=self.topic
+                )
+                if notes:
+                    prefix += f"\\n\\n補充資料參考：{notes}"
+                return prefix
+
+            self.prompt_prefixes[key] = assemble_prefix("discussion", render, self.additional_notes, with_context=True)
+        return self.prompt_prefixes[key]
+
+    def discussion_prompt(self, participant_id: str, round_num: int, round_topic: str, summary: str, context_text: str) -> str:
+        """固定前綴 + 本次發言的變動部分"""
+        if not summary:
+            # 第二輪起仍沒有摘要 (背景摘要尚未完成或已停用) 時不能說是第一輪
+            summary = "尚無（本輪為第一輪）" if round_num <= 1 else "（摘要尚未產生）"
+        return self.discussion_prefix(participant_id) + PROMPT_TEMPLATES["discussion_turn"].format(
+            round_topic=round_topic,
+            summary=summary,
+            context=context_text
+        )
+
+    def chair_turn(self, round_num: int) -> str:
+        """主席開場提示詞的變動部分"""
+        return PROMPT_TEMPLATES["chair_opening_turn"].format(round_num=round_num, round_topic=self.round_topic(round_num))
+
+    def chair_prefix(self, chair_id: str) -> str:
+        """主席開場提示詞的固定前綴 (補充資料使用扣除各輪變動部分後的剩餘預算)"""
+        key = ("chair_opening", chair_id)
+        if key not in self.prompt_prefixes:
+            data = self._participant_data(chair_id)
+            reserve = max((estimate_tokens(self.chair_turn(n)) for n in self.round_topics), default=0)
+            self.prompt_prefixes[key] = assemble_prefix(
+                "chair_opening",
+                lambda notes: PROMPT_TEMPLATES["chair_opening"].format(
+                    name=data.get("name", "未知主席"),
+                    title=data.get("title", "未知職位"),
+                    topic=self.topic,
+                    additional_notes=notes or "無",
+                    participant_list=self.speaker_list
+                ),
+                self.additional_notes,
+                reserve_tokens=reserve
+            )
+        return self.prompt_prefixes[key]
+
+    def chair_prompt(self, chair_id: str, round_num: int) -> str:
+        """主席開場提示詞：固定前綴 + 本輪輪次與重點"""
+        return self.chair_prefix(chair_id) + self.chair_turn(round_num)
@@ -0,0 +1,154 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 發言者指派解析
+
+主席發言後需要找出被指派的第一位發言者。每場會議建立時，以所有候選發言者的
+姓名、職位、「姓名 職位」組合與自訂別名建立一個 Aho–Corasick 自動機，
+之後每輪只需對主席發言掃描一次即可找出所有提及，與參與者人數無關。
+提及依明確程度 (姓名+職位 > 姓名或別名 > 職位) 與出現位置排序，結果固定可重現；
+多人共用的姓名或職位無法判斷指的是誰，不列入比對。
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 關鍵字的明確程度
+SPECIFICITY_COMBINED = 3
+SPECIFICITY_NAME = 2
+SPECIFICITY_TITLE = 1
+
+
+def _fold(char: str) -> str:
+    """不分大小寫比對；只採用不改變長度的轉換，使比對位置與原文一致"""
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+class AhoCorasick:
+    """多模式字串比對自動機，一次掃描找出所有模式的出現位置"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每個狀態結束的模式：(長度, 值)
+        self._outputs: List[List[Tuple[int, Any]]] = [[]]
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: Any):
+        state = 0
+        for char in pattern:
+            char = _fold(char)
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), value))
+
+    def _build(self):
+        """以廣度優先計算失敗連結，並合併後綴狀態的輸出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Any]]:
+        """返回所有出現位置 (起點, 終點, 值)，依終點排序"""
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            char = _fold(char)
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._outputs[state]:
+                matches.append((index + 1 - length, index + 1, value))
+        return matches
+
+
+@dataclass(frozen=True)
+class SpeakerMention:
+    """主席發言中對某位參與者的一次提及"""
+    participant_id: str
+    keyword: str
+    start: int
+    end: int
+    specificity: int
+
+
+class SpeakerMatcher:
+    """會議候選發言者的提及比對器 (建立後唯讀，可重複使用)"""
+
+    def __init__(self, participants: Iterable[Dict[str, Any]]):
+        keywords: Dict[str, Tuple[int, set]] = {}
+
+        def add(keyword: Optional[str], participant_id: str, specificity: int):
+            keyword = (keyword or "").strip()
+            if not keyword:
+                return
+            current_specificity, owners = keywords.get(keyword, (specificity, set()))
+            owners.add(participant_id)
+            keywords[keyword] = (max(current_specificity, specificity), owners)
+
+        for participant in participants:
+            p_id = participant["id"]
+            name = (participant.get("name") or "").strip()
+            title = (participant.get("title") or "").strip()
+            add(name, p_id, SPECIFICITY_NAME)
+            add(title, p_id, SPECIFICITY_TITLE)
+            for alias in participant.get("aliases") or []:
+                add(alias, p_id, SPECIFICITY_NAME)
+            if name and title:
+                for combined in (f"{name} {title}", f"{name}{title}", f"{title} {name}", f"{title}{name}",
+                                 f"{name}（{title}）", f"{name} ({title})"):
+                    add(combined, p_id, SPECIFICITY_COMBINED)
+
+        patterns = []
+        for keyword, (specificity, owners) in keywords.items():
+            if len(owners) > 1:
+                logger.debug(f"關鍵字「{keyword}」對應多位參與者 {sorted(owners)}，不用於解析指派")
+                continue
+            patterns.append((keyword, (next(iter(owners)), specificity)))
+        self.keyword_count = len(patterns)
+        self._automaton = AhoCorasick(patterns)
+
+    def mentions(self, text: str) -> List[SpeakerMention]:
+        """
+        找出文字中所有參與者提及，重疊時保留最左且最長者 (例如「姓名 職位」不再拆成姓名與職位)，
+        依明確程度由高到低、位置由前到後排序
+        """
+        candidates = sorted(self._automaton.find_all(text or ""), key=lambda m: (m[0], m[0] - m[1]))
+        selected = []
+        covered_until = 0
+        for start, end, (p_id, specificity) in candidates:
+            if start < covered_until:
+                continue
+            selected.append(SpeakerMention(p_id, text[start:end], start, end, specificity))
+            covered_until = end
+        selected.sort(key=lambda m: (-m.specificity, m.start))
+        return selected
+
+    def resolve(self, text: str) -> Optional[str]:
+        """返回最可能被指派的參與者 ID，沒有任何提及時返回 None"""
+        mentions = self.mentions(text)
+        if not mentions:
+            return None
+        best = mentions[0]
+        logger.info(f"解析到主席可能指派的第一位發言者: {best.keyword} (ID: {best.participant_id})")
+        return best.participant_id
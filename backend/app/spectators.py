@@ -0,0 +1,139 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 唯讀觀眾
+
+大型會議的觀眾不加入 connected_clients，也不經過指令處理：
+每場會議一個 SpectatorFeed，所有觀眾直接讀取會議的事件記錄 (EventLog，已編碼文字幀的環狀緩衝區)，
+各自只保存讀到的序號。廣播事件時不需要為觀眾做任何事，
+由會議的節拍任務每 tick_interval 秒喚醒一次所有觀眾，各自送出新的事件幀；
+閒置超過 heartbeat_interval 秒時送出心跳。觀眾的加入與離開只是計數的增減。
+
+觀眾落後到緩衝區之外時改送最新的會議快照 (同一序號的快照只編碼一次，由所有觀眾共用)。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import MESSAGE_TYPES, SPECTATOR_CONFIG
+from app.connections import Frame
+from app.events import EventLog
+
+logger = logging.getLogger(__name__)
+
+
+class SpectatorFeed:
+    """單場會議的觀眾節拍、快照快取與觀眾計數"""
+
+    def __init__(self, conference_id: str,
+                 events: Callable[[], Optional[EventLog]],
+                 snapshot: Callable[[Optional[int]], List[Frame]],
+                 config: Optional[Dict[str, Any]] = None):
+        self.conference_id = conference_id
+        self.config = config or SPECTATOR_CONFIG
+        self._events = events
+        self._snapshot = snapshot
+        self.count = 0
+        self.closed = False
+        self._close_args = (1000, "")
+        # 每次節拍換一個新的 Event，觀眾等待的是自己讀取時的那一個
+        self._tick = asyncio.Event()
+        self._ticker: Optional[asyncio.Task] = None
+        self._heartbeats = 0
+        self._snapshot_cache: Optional[List[Frame]] = None
+        self._snapshot_seq = -1
+        self._heartbeat_cache: Optional[Frame] = None
+        self._heartbeat_key = (-1, -1)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.config["max_spectators"]
+
+    def close(self, code: int = 1000, reason: str = ""):
+        """會議結束：觀眾送完剩餘的事件後關閉連線"""
+        self.closed = True
+        self._close_args = (code, reason)
+        self._wake()
+
+    def _wake(self):
+        tick, self._tick = self._tick, asyncio.Event()
+        tick.set()
+
+    async def _run_ticker(self):
+        interval = self.config["tick_interval"]
+        heartbeat_interval = self.config["heartbeat_interval"]
+        notified_seq = -1
+        last_activity = time.monotonic()
+        while self.count > 0 and not self.closed:
+            await asyncio.sleep(interval)
+            events = self._events()
+            now = time.monotonic()
+            if events is not None and events.last_seq != notified_seq:
+                notified_seq = events.last_seq
+                last_activity = now
+                self._wake()
+            elif now - last_activity >= heartbeat_interval:
+                last_activity = now
+                self._heartbeats += 1
+                self._wake()
+        self._ticker = None
+
+    def _initial(self, since: Optional[int]) -> List[Frame]:
+        """連線時的初始消息；完整快照依序號快取，同時加入的大量觀眾共用同一份"""
+        if since is not None:
+            return self._snapshot(since)
+        events = self._events()
+        seq = events.last_seq if events is not None else 0
+        if self._snapshot_cache is None or self._snapshot_seq != seq:
+            self._snapshot_cache = self._snapshot(None)
+            self._snapshot_seq = seq
+        return self._snapshot_cache
+
+    def _heartbeat(self, seq: int) -> Frame:
+        """心跳帶有目前的觀眾人數，同一序號與人數的心跳只編碼一次"""
+        key = (seq, self.count)
+        if self._heartbeat_cache is None or self._heartbeat_key != key:
+            self._heartbeat_cache = Frame.encode({
+                "type": MESSAGE_TYPES["heartbeat"],
+                "seq": seq,
+                "spectators": self.count
+            })
+            self._heartbeat_key = key
+        return self._heartbeat_cache
+
+    async def serve(self, websocket: Any, since: Optional[int] = None):
+        """送出初始消息後跟隨事件記錄，直到會議結束或觀眾斷線"""
+        self.count += 1
+        if self._ticker is None:
+            self._ticker = asyncio.create_task(self._run_ticker())
+        try:
+            frames = self._initial(since)
+            cursor = max((frame.seq for frame in frames if frame.seq is not None), default=0)
+            heartbeats = self._heartbeats
+            while True:
+                for frame in frames:
+                    await websocket.send_text(frame.text)
+                tick = self._tick
+                events = self._events()
+                if events is None:
+                    break
+                if events.last_seq > cursor:
+                    frames = events.since(cursor)
+                    if frames is None:
+                        # 落後到緩衝區之外：改送最新的快照
+                        logger.debug(f"會議 {self.conference_id} 的觀眾落後 (序號 {cursor})，改送快照")
+                        frames = self._initial(None)
+                    cursor = max((frame.seq for frame in frames if frame.seq is not None), default=cursor)
+                    continue
+                if self.closed:
+                    break
+                if heartbeats != self._heartbeats:
+                    heartbeats = self._heartbeats
+                    frames = [self._heartbeat(cursor)]
+                    continue
+                frames = []
+                await tick.wait()
+            code, reason = self._close_args
+            await websocket.close(code=code, reason=reason)
+        finally:
+            self.count -= 1
@@ -0,0 +1,210 @@
+"""
+飛豬隊友 AI 虛擬會議系統 - 滾動摘要
+
+每輪討論結束後，在背景把該輪發言壓縮為本輪摘要，再與先前的累積摘要整合，
+使討論與總結提示詞只需「累積摘要 + 最近發言」，提示詞大小不隨輪數成長。
+各輪的摘要依序串接執行，累積摘要永遠按輪次更新；下一輪開始時若尚未完成，
+發言者暫時看到的是上一版累積摘要。
+
+同時每輪也會立即擷取該輪的重點與行動項目 (map)，
+會議結束時秘書只需彙整各輪的擷取結果 (reduce)，不必重讀整份記錄。
+擷取失敗的回合在總結前重新擷取一次，仍失敗時改用該輪摘要；
+仍有回合兩者皆無時不做 reduce，由呼叫端改用上下文視窗，總結不會默默略過整輪討論。
+
+累積摘要、各輪摘要與重點同時寫入會議狀態中的 summary_state，隨狀態快照發布；
+其他工作程序接手會議時由此還原，不必重新摘要已完成的回合。
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import llm
+from app.config import MODERATOR_CONFIG, PROMPT_TEMPLATES, SUMMARY_CONFIG
+from app.context import assemble_prompt, format_context_line
+from app.control import ConferenceControl
+
+logger = logging.getLogger(__name__)
+
+
+class MeetingSummarizer:
+    """單場會議的背景摘要器"""
+
+    def __init__(self, conference_id: str, topic: str, control: Optional[ConferenceControl] = None,
+                 state: Optional[Dict[str, Any]] = None):
+        self.conference_id = conference_id
+        self.topic = topic
+        # 摘要與擷取以會議的受追蹤任務執行：暫停時在呼叫 LLM 前等待，結束會議時一併取消
+        self.control = control
+        # 可序列化的摘要狀態 (會議狀態中的 summary_state)，輪次鍵為字串以便 JSON 編碼
+        self.state = state if state is not None else {}
+        self.round_summaries: Dict[int, str] = _int_keys(self.state.get("round_summaries"))
+        self.summary = self.state.get("summary", "")
+        # 各輪擷取的重點與行動項目
+        self.round_points: Dict[int, str] = _int_keys(self.state.get("round_points"))
+        # 尚未成功擷取重點的回合：(本輪主題, 發言行)，供總結前重新擷取
+        self._round_inputs: Dict[int, Tuple[str, List[str]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._extract_tasks: Dict[int, asyncio.Task] = {}
+
+    def submit_round(self, round_num: int, round_topic: str, messages: List[dict]):
+        """排入一輪已完成的發言，於背景更新摘要 (不等待結果)"""
+        if not SUMMARY_CONFIG["enabled"] or not messages:
+            return
+        lines = [format_context_line(m) for m in messages]
+        self._task = self._start(self._summarize(self._task, round_num, round_topic, lines))
+        if SUMMARY_CONFIG["incremental_conclusion"]:
+            # 重點擷取只依賴本輪記錄，不必等待先前的摘要
+            self._round_inputs[round_num] = (round_topic, lines)
+            self._extract_tasks[round_num] = self._start(self._extract(round_num, round_topic, lines))
+
+    async def wait(self):
+        """等待所有已排入的摘要完成"""
+        if self._task:
+            await _wait_quietly(self._task)
+
+    async def wait_for_points(self):
+        """等待所有回合的重點擷取完成"""
+        for task in list(self._extract_tasks.values()):
+            await _wait_quietly(task)
+
+    async def collect_points(self, rounds: int) -> Optional[Dict[int, str]]:
+        """
+        總結用的第 1 至 rounds 輪重點：等待擷取完成，失敗的回合重新擷取一次，仍失敗時改用該輪摘要
+        仍有回合兩者皆無時返回 None
+        """
+        await self.wait_for_points()
+        missing = [round_num for round_num in range(1, rounds + 1) if round_num not in self.round_points]
+        for round_num in missing:
+            if round_num in self._round_inputs:
+                logger.warning(f"會議 {self.conference_id} 第 {round_num} 輪缺少重點，重新擷取")
+                await self._extract(round_num, *self._round_inputs[round_num])
+        if any(round_num not in self.round_points for round_num in missing):
+            await self.wait()
+
+        points = {}
+        for round_num in range(1, rounds + 1):
+            text = self.round_points.get(round_num) or self.round_summaries.get(round_num)
+            if not text:
+                logger.warning(f"會議 {self.conference_id} 第 {round_num} 輪沒有重點也沒有摘要，無法只以各輪重點總結")
+                return None
+            points[round_num] = text
+        return points
+
+    def points_text(self, max_tokens: Optional[int] = None, points: Optional[Dict[int, str]] = None) -> str:
+        """依輪次組合各輪的擷取結果 (或 collect_points 的結果)；指定 max_tokens 時由最早的回合開始捨棄"""
+        points = self.round_points if points is None else points
+        blocks = [f"【第 {round_num} 輪】\n{text}" for round_num, text in sorted(points.items())]
+        return _fit_lines(blocks, max_tokens, "\n\n")
+
+    def cancel(self):
+        """取消尚未完成的摘要與擷取"""
+        for task in [self._task, *self._extract_tasks.values()]:
+            if task and not task.done():
+                task.cancel()
+
+    def _save(self):
+        """把目前的摘要與重點寫入會議狀態，下一次發布快照時一併送出"""
+        self.state["summary"] = self.summary
+        self.state["round_summaries"] = {str(round_num): text for round_num, text in self.round_summaries.items()}
+        self.state["round_points"] = {str(round_num): text for round_num, text in self.round_points.items()}
+
+    def _start(self, coroutine) -> asyncio.Task:
+        return self.control.start(coroutine) if self.control else asyncio.create_task(coroutine)
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        if self.control:
+            await self.control.checkpoint()
+        return await llm.create_chat_completion(
+            messages=[
+                {"role": "system", "content": f"你是會議秘書{MODERATOR_CONFIG['name']}，負責精確、客觀地整理會議記錄。"},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=SUMMARY_CONFIG["temperature"],
+            max_tokens=max_tokens,
+            conference_id=self.conference_id,
+            stage="summary"
+        )
+
+    def _transcript_prompt(self, stage: str, round_num: int, round_topic: str, lines: List[str]) -> str:
+        return assemble_prompt(
+            stage,
+            lambda _, transcript: PROMPT_TEMPLATES[stage].format(
+                topic=self.topic, round_num=round_num, round_topic=round_topic, transcript=transcript
+            ),
+            context=lambda max_tokens: _fit_lines(lines, max_tokens)
+        )
+
+    async def _extract(self, round_num: int, round_topic: str, lines: List[str]):
+        if not llm.is_available():
+            return
+        try:
+            prompt = self._transcript_prompt("round_extract", round_num, round_topic, lines)
+            self.round_points[round_num] = await self._complete(prompt, SUMMARY_CONFIG["extract_max_tokens"])
+            self._round_inputs.pop(round_num, None)
+            self._save()
+            logger.info(f"會議 {self.conference_id} 第 {round_num} 輪重點擷取完成")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"會議 {self.conference_id} 第 {round_num} 輪重點擷取失敗: {str(e)}")
+
+    async def _summarize(self, previous: Optional[asyncio.Task], round_num: int, round_topic: str, lines: List[str]):
+        # 依輪次順序更新累積摘要
+        if previous:
+            try:
+                await previous
+            except Exception:
+                pass
+        if not llm.is_available():
+            return
+
+        try:
+            round_prompt = self._transcript_prompt("round_summary", round_num, round_topic, lines)
+            round_summary = await self._complete(round_prompt, SUMMARY_CONFIG["round_max_tokens"])
+            self.round_summaries[round_num] = round_summary
+            self._save()
+
+            if not self.summary:
+                self.summary = round_summary
+            else:
+                meeting_prompt = assemble_prompt(
+                    "meeting_summary",
+                    lambda _, __: PROMPT_TEMPLATES["meeting_summary"].format(
+                        topic=self.topic, summary=self.summary, round_num=round_num, round_summary=round_summary
+                    )
+                )
+                self.summary = await self._complete(meeting_prompt, SUMMARY_CONFIG["meeting_max_tokens"])
+            self._save()
+            logger.info(f"會議 {self.conference_id} 第 {round_num} 輪摘要完成 (累積摘要 {len(self.summary)} 字)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"會議 {self.conference_id} 第 {round_num} 輪摘要失敗: {str(e)}")
+
+
+async def _wait_quietly(task: asyncio.Task):
+    """等待背景任務；任務本身被取消時不向呼叫端拋出"""
+    try:
+        await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            raise
+
+
+def _int_keys(items: Optional[Dict[Any, str]]) -> Dict[int, str]:
+    """還原以字串為鍵的各輪資料"""
+    return {int(round_num): text for round_num, text in (items or {}).items()}
+
+
+def _fit_lines(lines: List[str], max_tokens: Optional[int], separator: str = "\n") -> str:
+    """由最新的一行往前取，直到用完 token 預算"""
+    selected = []
+    used = 0
+    for line in reversed(lines):
+        tokens = llm.estimate_tokens(line) + 1
+        if max_tokens is not None and used + tokens > max_tokens:
+            break
+        selected.append(line)
+        used += tokens
+    return separator.join(reversed(selected))
@@ -1,5 +1,7 @@
 import uvicorn
 import os
+import subprocess
+import sys
 from dotenv import load_dotenv
 
 # 載入環境變數
@@ -14,12 +16,28 @@ if __name__ == "__main__":
     print(f"監聽端口: {port}")
     print(f"調試模式: {'開啟' if debug else '關閉'}")
     
+    workers = int(os.getenv("WORKERS", 1))
+    bus_backend = os.getenv("CONFERENCE_BUS", "memory")
+    
     if not os.getenv("OPENAI_API_KEY"):
         print("警告: 未設置 OPENAI_API_KEY 環境變數，LLM 功能將不可用")
+    if workers > 1 and bus_backend != "socket":
+        print("警告: 多個工作程序需要設置 CONFERENCE_BUS=socket 才能共享會議")
+    
+    # 跨程序匯流排：預設由本程序一併啟動代理程序 (多個容器共用時只需其中一個啟動，其餘設置 START_BUS_BROKER=false)
+    broker = None
+    if bus_backend == "socket" and os.getenv("START_BUS_BROKER", "true").lower() in ("true", "1", "t"):
+        print("啟動會議匯流排代理程序")
+        broker = subprocess.Popen([sys.executable, "-m", "app.bus.broker"])
     
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=debug
-    ) 
\ No newline at end of file
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            reload=debug,
+            workers=workers
+        )
+    finally:
+        if broker:
+            broker.terminate()
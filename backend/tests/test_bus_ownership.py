@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+from app.bus.broker import Broker, Peer
+from app.bus.memory import MemoryBus, MemoryHub
+from app.bus.protocol import pack
+from app.bus.ring import HashRing
+from app.connections import Frame
+
+KEYS = [f"conference-{i}" for i in range(2000)]
+
+
+def assignment(nodes):
+    ring = HashRing(nodes)
+    return {key: ring.owner(key) for key in KEYS}
+
+
+def test_ring_assignment_is_stable():
+    assert assignment(["w1", "w2", "w3"]) == assignment(["w3", "w1", "w2", "w1"])
+    assert HashRing([]).owner("conference-0") is None
+    assert set(assignment(["w1", "w2", "w3"]).values()) == {"w1", "w2", "w3"}
+
+
+def test_ring_adding_worker_moves_about_one_nth():
+    before = assignment(["w1", "w2", "w3"])
+    after = assignment(["w1", "w2", "w3", "w4"])
+    moved = [key for key in KEYS if before[key] != after[key]]
+    # 只有改歸新成員的會議移動，數量約為 1/4
+    assert all(after[key] == "w4" for key in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_ring_removing_worker_moves_only_its_keys():
+    before = assignment(["w1", "w2", "w3", "w4"])
+    after = assignment(["w1", "w2", "w4"])
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert moved and all(before[key] == "w3" for key in moved)
+    assert len(moved) == sum(1 for owner in before.values() if owner == "w3")
+
+
+def test_memory_claim_only_after_owner_leaves():
+    async def scenario():
+        hub = MemoryHub()
+        owner, other, third = (MemoryBus(hub, worker_id=w) for w in ("w1", "w2", "w3"))
+        orphans = []
+        other.set_handlers(lambda *args: None, lambda cid: None, on_orphans=orphans.extend)
+        for bus in (owner, other, third):
+            await bus.start()
+        owner.put_state("c1", {"stage": "discussion", "messages": []}, 0)
+        owner.publish("c1", Frame.encode({"type": "new_message", "seq": 1}), {"stage": "discussion", "messages": [1]})
+
+        # 擁有者仍在線上：拒絕認領
+        assert await other.claim("c1") is None
+
+        await owner.stop()
+        assert orphans == ["c1"]
+        state = await other.claim("c1")
+        assert state is not None and state.owner == "w2" and state.seq == 1
+        assert state.data["messages"] == [1]
+        # 已由在線上的工作程序認領：其他工作程序不能再認領
+        assert await third.claim("c1") is None
+        assert await other.claim("c1") is not None
+
+    asyncio.run(scenario())
+
+
+class FakeTransport:
+    def get_write_buffer_size(self):
+        return 0
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.sent = []
+
+    def is_closing(self):
+        return False
+
+    def write(self, data: bytes):
+        self.sent.append(data)
+
+    def ops(self):
+        return [json.loads(data.split(b"\n", 1)[0]) for data in self.sent]
+
+
+def connect(broker: Broker, worker: str) -> Peer:
+    peer = Peer(FakeWriter(), broker.max_buffer)
+    broker._dispatch(peer, {"op": "hello", "worker": worker}, b"", b"")
+    return peer
+
+
+def publish(broker: Broker, peer: Peer, seq: int, owner: str):
+    line, payload = pack({"op": "pub", "cid": "c1", "seq": seq, "owner": owner, "offset": 0},
+                         b"{}", b'{"stage": "discussion"}').split(b"\n", 1)
+    header = json.loads(line)
+    broker._dispatch(peer, header, line + b"\n", payload)
+
+
+def test_broker_fences_stale_owner():
+    broker = Broker("/tmp/unused.sock")
+    old = connect(broker, "w1")
+    new = connect(broker, "w2")
+    publish(broker, old, 1, "w1")
+
+    # 擁有者仍在線上時拒絕認領
+    broker._dispatch(new, {"op": "claim", "cid": "c1", "worker": "w2", "req": 1}, b"", b"")
+    assert new.writer.ops()[-1]["ok"] is False
+
+    # 擁有者斷線後由 w2 認領，擁有者換成 w2
+    del broker.workers["w1"]
+    broker._dispatch(new, {"op": "claim", "cid": "c1", "worker": "w2", "req": 2}, b"", b"")
+    assert new.writer.ops()[-1]["ok"] is True
+    assert broker.states["c1"][:2] == (1, "w2")
+
+    # 原擁有者恢復連線後再發布的事件被拒絕並收到 fenced，快照不變
+    publish(broker, old, 2, "w1")
+    assert old.writer.ops()[-1] == {"op": "fenced", "cid": "c1", "sizes": []}
+    assert broker.states["c1"][:2] == (1, "w2")
+
+    publish(broker, new, 2, "w2")
+    assert broker.states["c1"][:2] == (2, "w2")
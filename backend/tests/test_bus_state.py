@@ -0,0 +1,63 @@
+import json
+
+from app.bus.base import ConferenceState
+from app.bus.protocol import split_payload
+from app.bus.socket_bus import SocketBus
+
+
+def conference(count: int) -> dict:
+    return {"id": "c1", "stage": "discussion", "current_round": 1,
+            "messages": [{"id": f"m{i}", "text": "發言" * 50} for i in range(count)]}
+
+
+def unpack(data: bytes):
+    line, payload = data.split(b"\n", 1)
+    header = json.loads(line)
+    frame, head, *messages = split_payload(header, payload)
+    return header, head, messages
+
+
+def test_publish_encodes_only_new_messages():
+    bus = SocketBus(path="/tmp/unused.sock", worker_id="w1")
+    state = conference(3)
+    header, head, messages = unpack(bus._pack_state({"op": "pub", "cid": "c1", "seq": 1}, "c1", state, b"{}"))
+    assert header["offset"] == 0 and len(messages) == 3
+    assert b"messages" not in head
+
+    state["messages"].append({"id": "m3", "text": "新的發言"})
+    state["stage"] = "paused"
+    header, head, messages = unpack(bus._pack_state({"op": "pub", "cid": "c1", "seq": 2}, "c1", state, b"{}"))
+    assert header["offset"] == 3 and [json.loads(m)["id"] for m in messages] == ["m3"]
+    assert json.loads(head)["stage"] == "paused"
+
+    # 沒有新增消息的事件只送狀態欄位
+    header, head, messages = unpack(bus._pack_state({"op": "pub", "cid": "c1", "seq": 3}, "c1", state, b"{}"))
+    assert header["offset"] == 4 and messages == []
+
+
+def test_state_applies_increments_before_and_after_decoding():
+    bus = SocketBus(path="/tmp/unused.sock", worker_id="w1")
+    owner_state = conference(2)
+    _, head, messages = unpack(bus._pack_state({}, "c1", owner_state, b""))
+    remote = ConferenceState("c1", 1, "w1", head=head, messages=messages)
+
+    owner_state["messages"].append({"id": "m2", "text": "x"})
+    header, head, messages = unpack(bus._pack_state({}, "c1", owner_state, b""))
+    assert remote.apply(2, "w1", head, messages, header["offset"])
+    assert [m["id"] for m in remote.data["messages"]] == ["m0", "m1", "m2"]
+
+    # 已解碼後繼續附加
+    owner_state["messages"].append({"id": "m3", "text": "y"})
+    owner_state["current_round"] = 2
+    header, head, messages = unpack(bus._pack_state({}, "c1", owner_state, b""))
+    assert remote.apply(3, "w1", head, messages, header["offset"])
+    assert remote.seq == 3 and remote.data["current_round"] == 2
+    assert remote.data["messages"] == owner_state["messages"]
+
+
+def test_state_rejects_gap_and_accepts_full_resend():
+    remote = ConferenceState("c1", 1, "w1", head=b'{"stage": "discussion"}', messages=[b'{"id": "m0"}'])
+    assert not remote.apply(5, "w1", b'{"stage": "discussion"}', [b'{"id": "m3"}'], 3)
+    assert remote.seq == 1 and remote.message_count == 1
+    assert remote.apply(5, "w2", b'{"stage": "ended"}', [b'{"id": "a"}', b'{"id": "b"}'], 0)
+    assert remote.owner == "w2" and [m["id"] for m in remote.data["messages"]] == ["a", "b"]
@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+import pytest
+from starlette.websockets import WebSocket, WebSocketState
+
+import app.connections as connections
+import app.main as main
+from app.config import BROADCAST_CONFIG, MESSAGE_TYPES
+from app.connections import SLOW_CONSUMER_CLOSE_CODE, ClientConnection, Frame
+from app.events import EventLog
+
+MESSAGE = {
+    "type": "new_message",
+    "seq": 12,
+    "message": {"id": "m1", "speakerName": "李經理", "text": "同意「預算」方案\n但需評估風險 ✓", "score": 0.5,
+                "tags": [], "streamed": False, "parent": None}
+}
+
+
+class FakeWebSocket:
+    """記錄送出的文字幀；blocked 時送出永遠不會完成 (例如半斷線的瀏覽器)"""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed = None
+        self.blocked = blocked
+
+    async def send_text(self, text: str):
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = code
+
+
+def frame(message_type: str, n: int = 0) -> Frame:
+    return Frame.encode({"type": message_type, "n": n})
+
+
+def connection(websocket, policy="coalesce", queue_size=3, **config):
+    closed = []
+    client = ClientConnection(websocket, "c1", on_closed=closed.append,
+                              config=dict(BROADCAST_CONFIG, queue_size=queue_size, slow_consumer_policy=policy, **config))
+    return client, closed
+
+
+def test_slow_client_does_not_delay_others():
+    async def scenario():
+        fast, _ = connection(FakeWebSocket(), queue_size=10)
+        slow, _ = connection(FakeWebSocket(blocked=True), queue_size=10)
+        fast.start()
+        slow.start()
+        for n in range(5):
+            assert fast.send(frame(MESSAGE_TYPES["new_message"], n))
+            assert slow.send(frame(MESSAGE_TYPES["new_message"], n))
+        await asyncio.sleep(0.01)
+        assert len(fast.websocket.sent) == 5
+        # 第一則卡在送出中，其餘仍在佇列
+        assert slow.websocket.sent == [] and slow.pending == 4
+        fast.stop()
+        slow.stop()
+
+    asyncio.run(scenario())
+
+
+def test_coalesce_drops_pending_deltas_before_disconnecting():
+    async def scenario():
+        client, _ = connection(FakeWebSocket())
+        client.send(frame(MESSAGE_TYPES["message_delta"], 1))
+        client.send(frame(MESSAGE_TYPES["message_delta"], 2))
+        client.send(frame(MESSAGE_TYPES["message_end"]))
+        # 佇列已滿：捨棄未送出的增量文字，完整的 message_end 保留
+        assert client.send(frame(MESSAGE_TYPES["new_message"]))
+        assert client.dropped == 2
+        assert [item.type for item in client._queue] == [MESSAGE_TYPES["message_end"], MESSAGE_TYPES["new_message"]]
+        client.send(frame(MESSAGE_TYPES["new_message"]))
+        # 沒有可捨棄的增量文字時斷開
+        assert not client.send(frame(MESSAGE_TYPES["new_message"]))
+        assert client.closed
+
+    asyncio.run(scenario())
+
+
+def test_drop_discards_new_messages():
+    async def scenario():
+        client, _ = connection(FakeWebSocket(), policy="drop")
+        for n in range(3):
+            client.send(frame(MESSAGE_TYPES["message_delta"], n))
+        assert not client.send(frame(MESSAGE_TYPES["new_message"]))
+        assert client.dropped == 1 and client.pending == 3 and not client.closed
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_closes_slow_consumer():
+    async def scenario():
+        client, closed = connection(FakeWebSocket(), policy="disconnect")
+        for n in range(3):
+            client.send(frame(MESSAGE_TYPES["message_delta"], n))
+        assert not client.send(frame(MESSAGE_TYPES["new_message"]))
+        assert client.closed
+        client.start()
+        await asyncio.sleep(0.01)
+        # 待送消息被捨棄，直接以 1013 關閉
+        assert client.websocket.sent == []
+        assert client.websocket.closed == SLOW_CONSUMER_CLOSE_CODE
+        assert closed == [client]
+
+    asyncio.run(scenario())
+
+
+def test_send_timeout_treats_client_as_gone():
+    async def scenario():
+        client, closed = connection(FakeWebSocket(blocked=True), send_timeout=0.02)
+        client.start()
+        client.send(frame(MESSAGE_TYPES["new_message"]))
+        await asyncio.sleep(0.1)
+        assert closed == [client]
+        assert client.closed and not client.send(frame(MESSAGE_TYPES["new_message"]))
+
+    asyncio.run(scenario())
+
+
+def send_json_text(message) -> str:
+    """以 Starlette 的 WebSocket.send_json 送出，返回實際送出的文字"""
+    sent = []
+
+    async def send(event):
+        sent.append(event)
+
+    async def scenario():
+        websocket = WebSocket({"type": "websocket", "path": "/", "headers": []}, receive=None, send=send)
+        websocket.application_state = WebSocketState.CONNECTED
+        await websocket.send_json(message)
+
+    asyncio.run(scenario())
+    return sent[0]["text"]
+
+
+def test_frame_is_byte_identical_to_send_json(monkeypatch):
+    monkeypatch.setattr(connections, "orjson", None)
+    assert Frame.encode(MESSAGE).text == send_json_text(MESSAGE)
+
+
+def test_orjson_frame_decodes_to_send_json_value():
+    if connections.orjson is None:
+        pytest.skip("未安裝 orjson")
+    text = Frame.encode(MESSAGE).text
+    assert json.loads(text) == json.loads(send_json_text(MESSAGE))
+
+
+def test_broadcast_encodes_once_for_all_clients(monkeypatch):
+    async def scenario():
+        encoded = []
+        encode = connections.encode_message
+
+        def counting(message):
+            encoded.append(message["type"])
+            return encode(message)
+
+        monkeypatch.setattr(connections, "encode_message", counting)
+        clients = [connection(FakeWebSocket(), queue_size=10)[0] for _ in range(3)]
+        monkeypatch.setitem(main.connected_clients, "c1", clients)
+        monkeypatch.setitem(main.conference_events, "c1", EventLog(8))
+        await main.broadcast_message("c1", dict(MESSAGE))
+        assert encoded == ["new_message"]
+        # 所有客戶端的佇列放入同一個幀物件
+        assert len({id(client._queue[0]) for client in clients}) == 1
+
+    asyncio.run(scenario())
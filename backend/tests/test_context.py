@@ -0,0 +1,35 @@
+from app.context import ConferenceContext, context_budgets, format_context_line
+
+MESSAGES = [{"speakerName": f"P{index % 4}", "speakerTitle": "經理", "text": f"第{index}則發言"} for index in range(40)]
+
+
+def test_windows_match_slicing_the_transcript():
+    context = ConferenceContext(discussion_window=15, conclusion_window=30)
+    for message in MESSAGES:
+        context.append(message)
+    # 與每次重新切片、格式化整份記錄的結果相同，但只保留最大視窗的行數
+    assert context.discussion() == "\\n".join(format_context_line(m) for m in MESSAGES[-15:])
+    assert context.conclusion() == "\n".join(format_context_line(m) for m in MESSAGES[-30:])
+    assert len(context) == 30
+
+
+def test_new_message_invalidates_cached_windows():
+    context = ConferenceContext(discussion_window=2, conclusion_window=2)
+    context.append(MESSAGES[0])
+    assert context.discussion() == format_context_line(MESSAGES[0])
+    context.append(MESSAGES[1])
+    assert context.discussion().split("\\n") == [format_context_line(MESSAGES[0]), format_context_line(MESSAGES[1])]
+    context.append(MESSAGES[2])
+    assert context.discussion().split("\\n") == [format_context_line(MESSAGES[1]), format_context_line(MESSAGES[2])]
+
+
+def test_rebuilt_context_matches_incremental_one():
+    # 接手會議或遺失緩衝區時，由既有記錄重建的上下文與逐則加入的相同
+    incremental = ConferenceContext.for_scenario(None)
+    for message in MESSAGES:
+        incremental.append(message)
+    rebuilt = ConferenceContext.for_scenario(None, MESSAGES)
+    budgets = context_budgets(None)
+    assert (rebuilt.discussion_window, rebuilt.conclusion_window) == (budgets["discussion"], budgets["conclusion"])
+    assert rebuilt.discussion() == incremental.discussion()
+    assert rebuilt.conclusion() == incremental.conclusion()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+import app.control as control_module
+import app.main as main
+from app import llm
+from app.config import LLM_PROVIDER_CONFIG
+from app.control import ConferenceControl
+from app.llm.providers import MockProvider
+
+
+class BlockingProvider(MockProvider):
+    """每個請求都停在回應之前，直到 gate 被設定"""
+
+    def __init__(self):
+        super().__init__({**LLM_PROVIDER_CONFIG["mock"], "latency": {"distribution": "fixed", "value": 0},
+                          "tokens_per_second": 0})
+        self.started = None
+        self.gate = None
+
+    async def _before_response(self):
+        self.started.set()
+        await self.gate.wait()
+        await super()._before_response()
+
+
+@pytest.fixture
+def provider():
+    previous = llm.get_provider()
+    blocking = BlockingProvider()
+    llm.set_provider(blocking)
+    yield blocking
+    llm.set_provider(previous)
+
+
+def test_mailbox_runs_commands_in_arrival_order():
+    async def scenario():
+        control = ConferenceControl("c1")
+        handled = []
+
+        def handler(name, delay=0):
+            async def run():
+                await asyncio.sleep(delay)
+                handled.append(name)
+            return run
+
+        # 放入信箱即返回，不等待較慢的指令完成
+        assert control.post("pause_conference", handler("pause", 0.05))
+        assert control.post("resume_conference", handler("resume"))
+        assert control.post("end_conference", handler("end"))
+        assert handled == []
+        await asyncio.sleep(0.1)
+        return handled
+
+    assert asyncio.run(scenario()) == ["pause", "resume", "end"]
+
+
+def test_full_mailbox_rejects_new_commands(monkeypatch):
+    monkeypatch.setattr(control_module, "MAILBOX_SIZE", 2)
+
+    async def scenario():
+        control = ConferenceControl("c1")
+        handled = []
+
+        async def handler():
+            handled.append(len(handled))
+
+        accepted = [control.post("pause_conference", handler) for _ in range(3)]
+        await asyncio.sleep(0)
+        return accepted, handled
+
+    accepted, handled = asyncio.run(scenario())
+    assert accepted == [True, True, False]
+    assert handled == [0, 1]
+
+
+def test_commands_are_handled_while_a_round_is_blocked(provider):
+    async def scenario():
+        provider.started = asyncio.Event()
+        provider.gate = asyncio.Event()
+        config = main.ConferenceConfig(topic="預算", participants=[{"id": "ceo", "name": "王總", "title": "執行長"},
+                                                                 {"id": "cfo", "name": "李經理", "title": "財務長"}])
+        conference_id = main.create_conference(config, pacing=False)
+        conference = main.active_conferences[conference_id]
+        # 略過自我介紹，直接進入第一輪討論；主席的開場白停在 LLM 請求中
+        conference["stage"] = "discussion"
+        runner = main.start_orchestrator(conference_id)
+        await asyncio.wait_for(provider.started.wait(), 5)
+
+        main.process_client_message(conference_id, json.dumps({"type": "pause_conference"}))
+        await asyncio.sleep(0.01)
+        assert conference["stage"] == "paused" and not runner.done()
+
+        main.process_client_message(conference_id, json.dumps({"type": "resume_conference"}))
+        await asyncio.sleep(0.01)
+        assert conference["stage"] == "discussion" and not runner.done()
+
+        # 結束會議會取消停在請求中的一輪，不必等它完成
+        main.process_client_message(conference_id, json.dumps({"type": "end_conference"}))
+        await asyncio.wait_for(asyncio.wait([runner]), 1)
+        assert runner.cancelled()
+        assert conference["stage"] == "ended"
+        assert not provider.gate.is_set()
+
+    asyncio.run(scenario())
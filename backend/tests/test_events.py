@@ -0,0 +1,65 @@
+from app.connections import Frame
+from app.events import EventLog
+
+
+def make_log(capacity: int = 3, events: int = 5) -> EventLog:
+    log = EventLog(capacity)
+    for i in range(events):
+        log.publish({"type": "new_message", "index": i})
+    return log
+
+
+def seqs(frames):
+    return [frame.seq for frame in frames]
+
+
+def test_since_last_seq_is_empty():
+    log = make_log()
+    assert log.last_seq == 5
+    assert log.since(5) == []
+    # 尚無事件的會議以 since=0 連接也不需補送
+    assert EventLog(3).since(0) == []
+
+
+def test_since_returns_buffered_tail():
+    log = make_log()
+    assert log.first_seq == 3
+    assert seqs(log.since(2)) == [3, 4, 5]
+    assert seqs(log.since(4)) == [5]
+
+
+def test_since_just_evicted_seq_needs_snapshot():
+    log = make_log()
+    # 序號 2 仍可補送 (下一個是 3)，序號 1 之後的 2 已被淘汰
+    assert log.since(2) is not None
+    assert log.since(1) is None
+    assert log.since(0) is None
+
+
+def test_since_negative_or_future_seq():
+    log = make_log()
+    assert log.since(-1) is None
+    assert log.since(6) is None
+    assert log.since(100) is None
+
+
+def test_record_appends_consecutive_frames():
+    log = EventLog(3)
+    assert log.record(Frame.encode({"type": "new_message", "seq": 1}))
+    assert log.record(Frame.encode({"type": "new_message", "seq": 2}))
+    assert seqs(log.since(0)) == [1, 2]
+    # 重複或舊的事件與沒有序號的幀不保存
+    assert not log.record(Frame.encode({"type": "new_message", "seq": 2}))
+    assert not log.record(Frame.encode({"type": "new_message"}))
+    assert log.last_seq == 2
+
+
+def test_record_gap_clears_buffer():
+    log = make_log()
+    assert log.record(Frame.encode({"type": "new_message", "seq": 8}))
+    assert log.last_seq == 8
+    assert log.first_seq == 8
+    # 序號 6、7 未收到，之前的事件都不能再補送
+    assert log.since(5) is None
+    assert seqs(log.since(7)) == [8]
+    assert log.since(8) == []
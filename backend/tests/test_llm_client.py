@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from app import llm
+from app.config import LLM_PROVIDER_CONFIG
+from app.llm.providers import MockProvider, OpenAIProvider, ProviderError
+
+MESSAGES = [{"role": "system", "content": "你是財務長"}, {"role": "user", "content": "請發言"}]
+
+
+def mock_config(**overrides):
+    return {**LLM_PROVIDER_CONFIG["mock"], "latency": {"distribution": "fixed", "value": 0},
+            "tokens_per_second": 0, **overrides}
+
+
+@pytest.fixture
+def use_provider(monkeypatch):
+    previous = llm.get_provider()
+    monkeypatch.setattr(llm.scheduler, "enabled", False)
+    yield llm.set_provider
+    llm.set_provider(previous)
+
+
+def test_completions_do_not_block_event_loop(use_provider):
+    use_provider(MockProvider(mock_config(latency={"distribution": "fixed", "value": 0.1})))
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        heartbeat = asyncio.create_task(ticker())
+        started = time.monotonic()
+        texts = await asyncio.gather(*(
+            llm.create_chat_completion([{"role": "user", "content": f"請求 {n}"}], conference_id=f"c{n}")
+            for n in range(10)
+        ))
+        elapsed = time.monotonic() - started
+        heartbeat.cancel()
+        return texts, elapsed, ticks
+
+    texts, elapsed, ticks = asyncio.run(scenario())
+    assert all(texts)
+    # 十個請求同時等待，總時間約為一次延遲，其間事件迴圈持續運作
+    assert elapsed < 0.5
+    assert ticks >= 5
+
+
+def test_api_key_change_keeps_connection_pool():
+    provider = OpenAIProvider(api_key="sk-first")
+    client = provider.get_client()
+    pool = provider._http_client
+    assert provider.get_client() is client
+
+    provider.set_api_key("sk-second")
+    replaced = provider.get_client()
+    assert replaced is not client and replaced.api_key == "sk-second"
+    assert provider._http_client is pool
+
+    provider.set_api_key(None)
+    assert not provider.is_available()
+    asyncio.run(provider.aclose())
+
+
+def test_mock_provider_is_deterministic():
+    async def scenario():
+        first = await MockProvider(mock_config()).complete(MESSAGES, model="m", temperature=0.7, max_tokens=500)
+        again = await MockProvider(mock_config()).complete(MESSAGES, model="m", temperature=0.7, max_tokens=500)
+        other_seed = await MockProvider(mock_config(seed=7)).complete(MESSAGES, model="m", temperature=0.7, max_tokens=500)
+        deltas = [delta async for delta in MockProvider(mock_config(tokens_per_second=2000)).stream(
+            MESSAGES, model="m", temperature=0.7, max_tokens=500)]
+        return first, again, other_seed, deltas
+
+    first, again, other_seed, deltas = asyncio.run(scenario())
+    low, high = LLM_PROVIDER_CONFIG["mock"]["response_chars"]
+    assert first.text == again.text and low <= len(first.text) <= high
+    assert other_seed.text != first.text
+    # 串流與完整生成的內容相同
+    assert len(deltas) > 1 and "".join(deltas) == first.text
+
+
+def test_mock_provider_injects_rate_limit_errors(use_provider):
+    use_provider(MockProvider(mock_config(error_rate=1.0, error_status_codes=[429], retry_after=2.0)))
+
+    async def scenario():
+        with pytest.raises(ProviderError) as error:
+            await llm.create_chat_completion(MESSAGES, conference_id="c1")
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers["retry-after"] == "2.0"
+    assert llm.get_provider().errors == 1
+
+
+def test_provider_can_be_selected_by_name(use_provider):
+    use_provider("mock")
+    assert llm.get_provider().name == "mock" and llm.is_available()
@@ -0,0 +1,181 @@
+import asyncio
+import copy
+import json
+import random
+import uuid
+from collections import Counter
+
+import pytest
+
+import app.main as main
+from app import llm
+from app.config import LLM_PROVIDER_CONFIG, MODERATOR_CONFIG, ORCHESTRATION_CONFIG, SUMMARY_CONFIG
+from app.llm.providers import MockProvider
+
+PARTICIPANTS = [
+    {"id": "ceo", "name": "王總", "title": "執行長"},
+    {"id": "cfo", "name": "李經理", "title": "財務長"},
+    {"id": "cto", "name": "陳工", "title": "技術長"},
+]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    # 連續執行多場會議會用完全局排程器的每分鐘 token 額度，流程測試不需要限流
+    monkeypatch.setattr(llm.scheduler, "enabled", False)
+    previous = llm.get_provider()
+    mock = MockProvider({**LLM_PROVIDER_CONFIG["mock"], "latency": {"distribution": "fixed", "value": 0},
+                         "tokens_per_second": 0})
+    llm.set_provider(mock)
+    yield mock
+    llm.set_provider(previous)
+
+
+class DelayedProvider(MockProvider):
+    """依提示中的參與者姓名延遲回應，並記錄同時進行的請求數"""
+
+    def __init__(self, delays):
+        super().__init__({**LLM_PROVIDER_CONFIG["mock"], "latency": {"distribution": "fixed", "value": 0},
+                          "tokens_per_second": 0})
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+
+    async def complete(self, messages, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            prompt = messages[-1]["content"]
+            await asyncio.sleep(next((delay for name, delay in self.delays.items() if name in prompt), 0))
+            return await super().complete(messages, **kwargs)
+        finally:
+            self.active -= 1
+
+
+def new_conference(rounds=1):
+    config = main.ConferenceConfig(topic="產品上市策略", participants=PARTICIPANTS, rounds=rounds)
+    return main.create_conference(config, pacing=False)
+
+
+def test_second_start_returns_same_runner(provider):
+    async def scenario():
+        conference_id = new_conference()
+        runner = main.start_orchestrator(conference_id)
+        assert runner is not None
+        assert main.start_orchestrator(conference_id) is runner
+        # next_round 不再推進流程，也不會另外啟動一個推進者
+        await main.process_next_round(conference_id)
+        assert main.start_orchestrator(conference_id) is runner
+        await asyncio.wait_for(runner, 30)
+        assert main.active_conferences[conference_id]["stage"] == "ended"
+        assert main.start_orchestrator(conference_id) is runner
+
+    asyncio.run(scenario())
+
+
+def test_ended_conference_is_not_restarted(provider):
+    async def scenario():
+        conference_id = new_conference()
+        main.get_conference_control(conference_id).cancel()
+        assert main.start_orchestrator(conference_id) is None
+
+    asyncio.run(scenario())
+
+
+def run_recording_snapshots(monkeypatch, rounds=2):
+    """執行一場完整會議，返回每則消息發布後的狀態快照 (經 JSON 編碼，與匯流排送出的相同)"""
+    snapshots = []
+    announce = main.announce_message
+
+    async def recording(conference_id, message, streamed=False):
+        await announce(conference_id, message, streamed)
+        snapshots.append(json.loads(json.dumps(main.active_conferences[conference_id])))
+
+    monkeypatch.setattr(main, "announce_message", recording)
+
+    async def scenario():
+        conference_id = new_conference(rounds)
+        await asyncio.wait_for(main.start_orchestrator(conference_id), 30)
+
+    asyncio.run(scenario())
+    monkeypatch.setattr(main, "announce_message", announce)
+    return snapshots
+
+
+def adopt(state):
+    """模擬另一個工作程序從快照接手會議 (與 adopt_conference 認領成功後的步驟相同)"""
+    conference_id = str(uuid.uuid4())
+    main.active_conferences[conference_id] = dict(copy.deepcopy(state), id=conference_id)
+    main.connected_clients[conference_id] = []
+    main.get_conference_control(conference_id).completed_rounds = state.get("completed_rounds", 0)
+    return conference_id, main.start_orchestrator(conference_id)
+
+
+def test_adopted_conference_resumes_at_the_next_turn(provider, monkeypatch):
+    snapshots = run_recording_snapshots(monkeypatch)
+    full = snapshots[-1]["messages"]
+    assert {snapshot["step"] for snapshot in snapshots} == {"introduction", "round-1", "round-2", "conclusion"}
+
+    async def scenario():
+        # 在每一則消息之後接手：已發布的消息原樣保留，其餘發言各補一次
+        for snapshot in snapshots[:-1]:
+            conference_id, runner = adopt(snapshot)
+            await asyncio.wait_for(runner, 30)
+            messages = main.active_conferences[conference_id]["messages"]
+            assert messages[:len(snapshot["messages"])] == snapshot["messages"]
+            assert len(messages) == len(full)
+            assert Counter(m["speakerId"] for m in messages) == Counter(m["speakerId"] for m in full)
+            assert main.active_conferences[conference_id]["stage"] == "ended"
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_introductions_keep_participant_order(provider, monkeypatch):
+    # 名單中越前面的參與者越晚完成
+    delayed = DelayedProvider({"王總": 0.15, "李經理": 0.1, "陳工": 0.05})
+    llm.set_provider(delayed)
+    monkeypatch.setitem(ORCHESTRATION_CONFIG, "concurrent_introductions", True)
+
+    async def scenario():
+        conference_id = new_conference()
+        await main.generate_introductions(conference_id)
+        return main.active_conferences[conference_id]["messages"]
+
+    messages = asyncio.run(scenario())
+    assert delayed.peak == len(PARTICIPANTS)
+    assert [m["speakerId"] for m in messages] == [MODERATOR_CONFIG["id"], "ceo", "cfo", "cto", MODERATOR_CONFIG["id"]]
+
+
+def test_pipelined_discussion_matches_sequential_transcript(provider, monkeypatch):
+    # 累積摘要在背景完成的時間點會改變提示詞，發言順序的隨機擾動也固定下來，只比較管線化本身的影響
+    monkeypatch.setitem(SUMMARY_CONFIG, "enabled", False)
+    monkeypatch.setattr(random, "uniform", lambda low, high: 1.0)
+
+    def transcript(pipelined):
+        monkeypatch.setitem(ORCHESTRATION_CONFIG, "pipelined_discussion", pipelined)
+
+        async def scenario():
+            conference_id = new_conference(rounds=2)
+            await asyncio.wait_for(main.start_orchestrator(conference_id), 30)
+            return [(m["speakerId"], m["text"]) for m in main.active_conferences[conference_id]["messages"]]
+
+        return asyncio.run(scenario())
+
+    prefetched = []
+    take = main.TurnPrefetcher.take
+
+    async def recording_take(self, speaker_id, prompt, stage="discussion"):
+        prefetched.append(speaker_id in self.tasks)
+        return await take(self, speaker_id, prompt, stage)
+
+    monkeypatch.setattr(main.TurnPrefetcher, "take", recording_take)
+
+    sequential = transcript(False)
+    requests = provider.requests
+    assert not any(prefetched)
+    prefetched.clear()
+    assert transcript(True) == sequential
+    # 主席開場白以外的發言都已預先生成
+    assert prefetched.count(True) == len(prefetched) - 2
+    # 預先生成的發言都被使用，沒有多出的請求
+    assert provider.requests - requests == requests
@@ -0,0 +1,86 @@
+from app.config import AI_CONFIG, LLM_PROVIDER_CONFIG, MODERATOR_CONFIG, ROUND_TOPICS
+from app.llm.providers import MockProvider
+from app.plan import ConferencePlan, compile_participant
+
+
+def conference(participants, chair=None, rounds=2, notes=""):
+    return {
+        "id": "c1",
+        "topic": "預算",
+        "scenario": None,
+        "rounds": rounds,
+        "additional_notes": notes,
+        "participants": {**{p["id"]: p for p in participants}, MODERATOR_CONFIG["id"]: MODERATOR_CONFIG},
+        "config": {"participants": participants, "chair": chair}
+    }
+
+
+PARTICIPANTS = [
+    {"id": "cfo", "name": "李經理", "title": "財務長", "temperature": 0.2},
+    {"id": "General manager", "name": "王總", "title": "總經理"},
+    {"id": "intern", "name": "小陳", "title": "實習生", "isActive": False},
+    {"id": "cto", "name": "陳工", "title": "技術長", "rolePrompt": "你是重視可行性的技術長"},
+]
+
+NOTES = "補充資料" * 3000
+
+
+def test_chair_resolution_order():
+    assert ConferencePlan.build(conference(PARTICIPANTS, chair="cto")).chair_id == "cto"
+    # 指定的主席未啟用時回退到總經理，再回退到第一位活躍參與者
+    assert ConferencePlan.build(conference(PARTICIPANTS, chair="intern")).chair_id == "General manager"
+    assert ConferencePlan.build(conference([PARTICIPANTS[0], PARTICIPANTS[3]])).chair_id == "cfo"
+    assert ConferencePlan.build(conference([])).chair_id is None
+
+
+def test_speaker_lists_keep_original_order():
+    plan = ConferencePlan.build(conference(PARTICIPANTS))
+    assert plan.introduction_ids == ["cfo", "General manager", "cto"]
+    assert plan.speaker_ids == ["cfo", "cto"]
+    assert plan.speaker_matcher.resolve("請陳工先發言") == "cto"
+
+
+def test_participants_are_compiled_once():
+    plan = ConferencePlan.build(conference(PARTICIPANTS))
+    assert plan.participants["cfo"].temperature == 0.2
+    assert plan.participants["General manager"].temperature == AI_CONFIG["default_temperature"]
+    assert "你是重視可行性的技術長" in plan.participants["cto"].system_message
+    assert plan.participants["cto"] == compile_participant("cto", PARTICIPANTS[3])
+
+
+def test_round_topics_are_precomputed():
+    plan = ConferencePlan.build(conference(PARTICIPANTS, rounds=2))
+    assert plan.round_topics == {n: ROUND_TOPICS[n].format(topic="預算") for n in (1, 2)}
+    # 超出預先計算範圍的輪次即時計算並保存
+    assert plan.round_topic(9) == ROUND_TOPICS[1].format(topic="預算")
+    assert 9 in plan.round_topics
+
+
+def test_prompt_prefix_is_byte_identical_across_turns():
+    plan = ConferencePlan.build(conference(PARTICIPANTS, notes=NOTES))
+    first = plan.discussion_prompt("cfo", 1, plan.round_topic(1), "", "王總 (總經理): 先談預算")
+    second = plan.discussion_prompt("cfo", 2, plan.round_topic(2), "第一輪摘要", "陳工 (技術長): " + "很長的發言" * 500)
+    prefix = plan.discussion_prefix("cfo")
+    # 過長的補充資料只依前綴本身截斷，不隨上下文長度改變
+    assert NOTES not in prefix and "補充資料參考" in prefix
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert plan.chair_prompt("General manager", 1).startswith(plan.chair_prefix("General manager"))
+    assert plan.chair_prompt("General manager", 2).startswith(plan.chair_prefix("General manager"))
+    # 其他工作程序接手時重建的計畫得到相同的前綴
+    rebuilt = ConferencePlan.build(conference(PARTICIPANTS, notes=NOTES))
+    assert rebuilt.discussion_prefix("cfo") == prefix
+    assert rebuilt.participants["cfo"].system_message == plan.participants["cfo"].system_message
+
+
+def test_shared_prefix_is_reported_as_cached_tokens():
+    plan = ConferencePlan.build(conference(PARTICIPANTS, notes=NOTES))
+    provider = MockProvider(LLM_PROVIDER_CONFIG["mock"])
+    system = {"role": "system", "content": plan.participants["cfo"].system_message}
+
+    def usage(round_num, context):
+        prompt = plan.discussion_prompt("cfo", round_num, plan.round_topic(round_num), "", context)
+        return provider._usage_for([system, {"role": "user", "content": prompt}], "回應")
+
+    assert usage(1, "王總 (總經理): 先談預算").cached_tokens == 0
+    cached = usage(2, "陳工 (技術長): 我同意").cached_tokens
+    assert cached >= len(system["content"]) + len(plan.discussion_prefix("cfo")) - LLM_PROVIDER_CONFIG["mock"]["prompt_cache"]["block_chars"]
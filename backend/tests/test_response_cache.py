@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.llm import cache as cache_module
+from app.llm.cache import ResponseCache, make_cache_key
+
+
+def make_cache(**overrides):
+    config = {"enabled": True, "stages": ["introduction"], "max_temperature": None, "memory_entries": 2,
+              "disk_path": None, "ttl": 60, "max_disk_entries": 10}
+    config.update(overrides)
+    return ResponseCache(config)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_should_cache_policy():
+    cache = make_cache()
+    assert cache.should_cache("introduction", 0.9)
+    assert not cache.should_cache("discussion", 0.0)
+    assert not cache.should_cache(None, 0.0)
+
+    by_temperature = make_cache(stages=[], max_temperature=0.3)
+    assert by_temperature.should_cache("discussion", 0.3)
+    assert not by_temperature.should_cache("discussion", 0.7)
+
+    assert not make_cache(enabled=False).should_cache("introduction", 0.0)
+    assert not make_cache(stages=[]).should_cache("introduction", 0.0)
+
+
+def test_memory_lru_evicts_least_recently_used(clock):
+    async def scenario():
+        cache = make_cache()
+        await cache.set("a", "A")
+        await cache.set("b", "B")
+        assert await cache.get("a") == "A"
+        await cache.set("c", "C")
+        return cache, [await cache.get(key) for key in ("a", "b", "c")]
+
+    cache, values = asyncio.run(scenario())
+    assert values == ["A", None, "C"]
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["misses"], stats["stores"]) == (3, 1, 3)
+    assert stats["hit_rate"] == pytest.approx(0.75)
+
+
+def test_memory_entries_expire_after_ttl(clock):
+    async def scenario():
+        cache = make_cache()
+        await cache.set("a", "A")
+        clock[0] += 59
+        first = await cache.get("a")
+        clock[0] += 2
+        return cache, first, await cache.get("a")
+
+    cache, first, second = asyncio.run(scenario())
+    assert (first, second) == ("A", None)
+    assert cache.get_stats()["memory_entries"] == 0
+
+
+def test_disk_hit_keeps_original_creation_time(clock, tmp_path):
+    async def scenario():
+        writer = make_cache(disk_path=str(tmp_path / "cache.sqlite3"))
+        await writer.set("a", "A")
+        writer.close()
+
+        reader = make_cache(disk_path=str(tmp_path / "cache.sqlite3"))
+        clock[0] += 50
+        from_disk = await reader.get("a")
+        clock[0] += 20
+        # 已載入記憶體的項目仍依寫入磁碟時的建立時間過期
+        expired = await reader.get("a")
+        reader.close()
+        return from_disk, expired, reader.get_stats()
+
+    from_disk, expired, stats = asyncio.run(scenario())
+    assert from_disk == "A" and expired is None
+    assert (stats["disk_hits"], stats["misses"]) == (1, 1)
+
+
+def test_cache_key_covers_request_parameters():
+    messages = [{"role": "user", "content": "你好"}]
+    key = make_cache_key("mock", "m", messages, 0.2, 100)
+    assert key == make_cache_key("mock", "m", [dict(messages[0])], 0.2, 100)
+    assert key != make_cache_key("mock", "m", messages, 0.3, 100)
+    assert key != make_cache_key("mock", "m", messages, 0.2, 200)
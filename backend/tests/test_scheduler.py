@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from app.llm.scheduler import LLMScheduler, TokenBucket, parse_reset_duration
+
+
+def make_scheduler(**overrides):
+    options = dict(requests_per_minute=6000, tokens_per_minute=600000, max_concurrency=1)
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+
+def test_bucket_refills_at_rate_and_caps_at_capacity():
+    bucket = TokenBucket(60)
+    bucket.tokens = 0.0
+    bucket.updated = 100.0
+    bucket.refill(102.0)
+    assert bucket.tokens == pytest.approx(2.0)
+    bucket.refill(1000.0)
+    assert bucket.tokens == 60.0
+
+
+def test_bucket_wait_time_caps_oversized_requests():
+    bucket = TokenBucket(60)
+    bucket.tokens = 30.0
+    assert bucket.wait_time(10) == 0.0
+    assert bucket.wait_time(40) == pytest.approx(10.0)
+    # 超過整桶容量的請求只需等到桶滿
+    assert bucket.wait_time(1000) == pytest.approx(30.0)
+
+
+def test_parse_reset_duration():
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("1.5s") == 1.5
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration("2") == 2.0
+    assert parse_reset_duration("") is None
+    assert parse_reset_duration("soon") is None
+
+
+def test_weighted_fair_queuing_admission_order():
+    async def scenario():
+        scheduler = make_scheduler()
+        scheduler.set_weight("a", 2)
+        holder = await scheduler.acquire("hold", 1)
+        order = []
+
+        async def request(conference_id, index):
+            async with scheduler.admit(conference_id, 1):
+                order.append(f"{conference_id}{index}")
+                await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(request("a", i)) for i in range(4)]
+        tasks += [asyncio.create_task(request("b", i)) for i in range(2)]
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["queues"] == {"a": 4, "b": 2}
+        scheduler.release(holder)
+        await asyncio.gather(*tasks)
+        return order
+
+    # a 每個請求佔 1/2 單位虛擬時間：a 取得 b 的兩倍名額
+    assert asyncio.run(scenario()) == ["a0", "b0", "a1", "a2", "b1", "a3"]
+
+
+def test_weight_applies_to_sequential_caller():
+    async def scenario(weight):
+        scheduler = make_scheduler()
+        scheduler.set_weight("a", weight)
+        granted = []
+        done = asyncio.Event()
+
+        async def caller(conference_id):
+            # 一次只發出一個請求，放行後才排下一個 (如逐一發言的討論)
+            while not done.is_set():
+                async with scheduler.admit(conference_id, 1):
+                    granted.append(conference_id)
+                    if len(granted) >= 120:
+                        done.set()
+                    await asyncio.sleep(0)
+
+        async def burst(conference_id):
+            # 持續保持多個請求排隊
+            async def one():
+                async with scheduler.admit(conference_id, 1):
+                    granted.append(conference_id)
+                    if len(granted) >= 120:
+                        done.set()
+                    await asyncio.sleep(0)
+            while not done.is_set():
+                await asyncio.gather(*(one() for _ in range(4)))
+
+        tasks = [asyncio.create_task(caller("a")), asyncio.create_task(burst("b")), asyncio.create_task(burst("c"))]
+        await done.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        window = granted[:120]
+        return {cid: window.count(cid) for cid in "abc"}
+
+    equal = asyncio.run(scenario(1))
+    weighted = asyncio.run(scenario(3))
+    # 權重相同時三者平分；權重 3 時 a 不因每次放行後佇列變空而排到最後
+    assert abs(equal["a"] - 40) <= 4
+    assert weighted["a"] >= 55
+    assert abs(weighted["b"] - weighted["c"]) <= 4
+
+
+def test_idle_lag_is_bounded():
+    async def scenario():
+        scheduler = make_scheduler(max_lag=2)
+        scheduler._virtual_time = 100.0
+        scheduler._finish["a"] = 10.0
+        ticket = await scheduler.acquire("a", 1)
+        scheduler.release(ticket)
+        return ticket.start_tag
+
+    assert asyncio.run(scenario()) == 98.0
+
+
+def test_record_usage_corrects_token_estimate():
+    async def scenario():
+        scheduler = make_scheduler(tokens_per_minute=1000)
+        ticket = await scheduler.acquire("a", 500)
+        before = scheduler._tokens.tokens
+        ticket.record_usage(100)
+        scheduler.release(ticket)
+        return before, scheduler._tokens.tokens
+
+    before, after = asyncio.run(scenario())
+    assert before == pytest.approx(500, abs=1)
+    assert after == pytest.approx(900, abs=1)
+
+
+def test_record_usage_charges_underestimates():
+    async def scenario():
+        scheduler = make_scheduler(tokens_per_minute=1000)
+        ticket = await scheduler.acquire("a", 100)
+        ticket.record_usage(400)
+        scheduler.release(ticket)
+        return scheduler._tokens.tokens
+
+    assert asyncio.run(scenario()) == pytest.approx(600, abs=1)
+
+
+def test_oversized_estimate_refunds_only_what_was_charged():
+    async def scenario():
+        scheduler = make_scheduler(tokens_per_minute=1000)
+        ticket = await scheduler.acquire("a", 5000)
+        charged = ticket.charged_tokens
+        after_grant = scheduler._tokens.tokens
+        ticket.record_usage(300)
+        scheduler.release(ticket)
+        return charged, after_grant, scheduler._tokens.tokens
+
+    charged, after_grant, after_release = asyncio.run(scenario())
+    assert charged == 1000
+    assert after_grant == pytest.approx(0, abs=1)
+    assert after_release == pytest.approx(700, abs=1)
+
+
+def test_cancel_while_queued_frees_queue_and_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+        holder = await scheduler.acquire("a", 1)
+        waiting = asyncio.create_task(scheduler.acquire("b", 1))
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["queue_depth"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        stats = scheduler.get_stats()
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 1
+        scheduler.release(holder)
+        assert scheduler.get_stats()["in_flight"] == 0
+        # 取消的請求不佔用名額，之後的請求可以立即放行
+        ticket = await asyncio.wait_for(scheduler.acquire("c", 1), 1)
+        scheduler.release(ticket)
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_blocks_until_tokens_refill():
+    async def scenario():
+        scheduler = make_scheduler(requests_per_minute=60, max_concurrency=10)
+        scheduler._requests.tokens = 0.0
+        waiting = asyncio.create_task(scheduler.acquire("a", 1))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        scheduler._requests.tokens = 1.0
+        scheduler._dispatch()
+        ticket = await asyncio.wait_for(waiting, 1)
+        scheduler.release(ticket)
+
+    asyncio.run(scenario())
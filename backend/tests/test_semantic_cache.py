@@ -0,0 +1,65 @@
+import asyncio
+
+from app.config import SEMANTIC_CACHE_CONFIG
+from app.llm.semantic_cache import SemanticIntroductionCache, cosine_similarity, hash_embedding
+
+TOPIC = "討論公司2024年第三季的行銷策略與預算分配，並規劃下一季的社群媒體活動"
+NEAR_IDENTICAL = [
+    "討論公司2024年第三季的行銷策略及預算分配，並規劃下一季的社群媒體活動",
+    "討論公司2024年第三季行銷策略與預算分配，並規劃下一季的社群媒體活動。",
+    "討論公司 2024 年第三季的行銷策略與預算分配 並規劃下一季的社群媒體活動！",
+]
+DIFFERENT = [
+    "討論公司2025年第一季的行銷策略與預算分配，並規劃下一季的社群媒體活動",
+    "討論公司2024年第三季的研發進度與人力配置，並規劃下一季的產品上市時程",
+    "評估新辦公室搬遷的成本與時程",
+]
+ROLE = "我是飛豬隊友的行銷經理，負責品牌與市場策略。"
+PARTICIPANT = {"id": "Marketing manager", "name": "行銷豬", "title": "行銷經理"}
+
+
+def similarity(a, b):
+    dimensions = SEMANTIC_CACHE_CONFIG["dimensions"]
+    return cosine_similarity(hash_embedding(a, dimensions), hash_embedding(b, dimensions))
+
+
+def make_cache():
+    return SemanticIntroductionCache({**SEMANTIC_CACHE_CONFIG, "enabled": True, "disk_path": None})
+
+
+def test_embedding_ignores_case_whitespace_and_punctuation():
+    assert similarity("Q3 marketing strategy review", "q3  Marketing Strategy Review.") > 0.999
+
+
+def test_near_identical_topics_clear_threshold():
+    threshold = SEMANTIC_CACHE_CONFIG["threshold"]
+    for topic in NEAR_IDENTICAL:
+        assert similarity(TOPIC, topic) >= threshold, topic
+
+
+def test_different_topics_stay_below_threshold():
+    threshold = SEMANTIC_CACHE_CONFIG["threshold"]
+    for topic in DIFFERENT:
+        assert similarity(TOPIC, topic) < threshold, topic
+
+
+def test_cache_reuses_introduction_only_for_similar_topic_and_same_participant():
+    async def scenario():
+        cache = make_cache()
+        await cache.set(PARTICIPANT, TOPIC, ROLE, "大家好，我是行銷豬。")
+        similar = await cache.get(PARTICIPANT, NEAR_IDENTICAL[0], ROLE)
+        different_topic = await cache.get(PARTICIPANT, DIFFERENT[1], ROLE)
+        different_role = await cache.get(PARTICIPANT, TOPIC, "我是飛豬隊友的財務經理，負責預算控管。")
+        other_participant = await cache.get({**PARTICIPANT, "name": "另一隻豬"}, TOPIC, ROLE)
+        return similar, different_topic, different_role, other_participant
+
+    assert asyncio.run(scenario()) == ("大家好，我是行銷豬。", None, None, None)
+
+
+def test_disabled_cache_never_hits():
+    async def scenario():
+        cache = SemanticIntroductionCache({**SEMANTIC_CACHE_CONFIG, "enabled": False, "disk_path": None})
+        await cache.set(PARTICIPANT, TOPIC, ROLE, "大家好")
+        return await cache.get(PARTICIPANT, TOPIC, ROLE)
+
+    assert asyncio.run(scenario()) is None
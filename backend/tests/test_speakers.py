@@ -0,0 +1,57 @@
+from app.speakers import SPECIFICITY_COMBINED, SPECIFICITY_NAME, AhoCorasick, SpeakerMatcher
+
+PARTICIPANTS = [
+    {"id": "cmo", "name": "王小明", "title": "行銷經理"},
+    {"id": "cto", "name": "王小", "title": "研發總監", "aliases": ["技術長"]},
+    {"id": "cfo", "name": "陳大文", "title": "財務經理"},
+    {"id": "sales", "name": "Amy", "title": "業務經理"},
+    {"id": "sales2", "name": "Bob", "title": "業務經理"},
+]
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+    assert sorted(automaton.find_all("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+
+def test_automaton_without_match():
+    automaton = AhoCorasick([("abc", 1), ("", 2)])
+    assert automaton.find_all("ababab") == []
+    assert automaton.find_all("") == []
+
+
+def test_longest_match_wins_when_name_is_prefix_of_another():
+    matcher = SpeakerMatcher(PARTICIPANTS)
+    # 「王小」是「王小明」的前綴，重疊時保留最長者
+    assert matcher.resolve("請王小明先分享。") == "cmo"
+    assert matcher.resolve("請王小先分享。") == "cto"
+    mentions = matcher.mentions("請王小明先分享")
+    assert [(m.participant_id, m.keyword) for m in mentions] == [("cmo", "王小明")]
+
+
+def test_combined_name_and_title_is_not_split():
+    matcher = SpeakerMatcher(PARTICIPANTS)
+    mentions = matcher.mentions("接下來請財務經理陳大文發言")
+    assert [(m.participant_id, m.keyword, m.specificity) for m in mentions] == \
+        [("cfo", "財務經理陳大文", SPECIFICITY_COMBINED)]
+
+
+def test_more_specific_mention_beats_earlier_title():
+    matcher = SpeakerMatcher(PARTICIPANTS)
+    text = "感謝行銷經理的準備，我們先請技術長說明。"
+    assert matcher.resolve(text) == "cto"
+    assert [m.specificity for m in matcher.mentions(text)][0] == SPECIFICITY_NAME
+
+
+def test_shared_title_is_ignored_and_case_is_folded():
+    matcher = SpeakerMatcher(PARTICIPANTS)
+    assert matcher.resolve("請業務經理說明。") is None
+    assert matcher.resolve("請 AMY 說明業務狀況。") == "sales"
+
+
+def test_no_match():
+    matcher = SpeakerMatcher(PARTICIPANTS)
+    assert matcher.mentions("今天天氣很好。") == []
+    assert matcher.resolve("今天天氣很好。") is None
+    assert matcher.resolve("") is None
+    assert SpeakerMatcher([]).resolve("王小明") is None
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import app.main as main
+from app.events import EventLog
+from app.spectators import SpectatorFeed
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = code
+
+
+def test_heartbeat_reflects_spectator_count():
+    async def scenario():
+        feed = SpectatorFeed("c1", lambda: None, lambda since: [])
+        feed.count = 2
+        first = feed._heartbeat(5)
+        assert feed._heartbeat(5) is first
+        feed.count = 3
+        assert json.loads(feed._heartbeat(5).text)["spectators"] == 3
+        assert json.loads(feed._heartbeat(6).text)["seq"] == 6
+
+    asyncio.run(scenario())
+
+
+def test_feed_removed_after_last_spectator_of_ended_conference(monkeypatch):
+    async def scenario():
+        events = EventLog(8)
+        events.publish({"type": "new_message"})
+        monkeypatch.setitem(main.active_conferences, "c1", {"stage": "discussion", "messages": []})
+        monkeypatch.setitem(main.conference_events, "c1", events)
+        monkeypatch.setattr(main, "initial_frames", lambda cid, since: [events.since(0)[0]])
+
+        feed = main.get_spectator_feed("c1")
+        websocket = FakeWebSocket()
+        watcher = asyncio.create_task(feed.serve(websocket))
+        await asyncio.sleep(0)
+        assert feed.count == 1
+
+        main.active_conferences["c1"]["stage"] = "ended"
+        feed.close()
+        main.release_spectator_feed("c1", feed)
+        # 仍有觀眾時保留
+        assert main.conference_spectators.get("c1") is feed
+        await watcher
+        assert websocket.closed == 1000 and feed.count == 0
+        main.release_spectator_feed("c1", feed)
+        assert "c1" not in main.conference_spectators
+
+        # 會議已結束後才加入的觀眾：收到初始消息後即關閉
+        late = main.get_spectator_feed("c1")
+        assert late is not feed and late.closed
+        websocket = FakeWebSocket()
+        await late.serve(websocket)
+        assert [frame["type"] for frame in websocket.sent] == ["new_message"] and websocket.closed == 1000
+        main.release_spectator_feed("c1", late)
+        assert "c1" not in main.conference_spectators
+
+    asyncio.run(scenario())
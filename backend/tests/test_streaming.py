@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import app.main as main
+from app import llm
+from app.config import LLM_PROVIDER_CONFIG, MESSAGE_TYPES, STREAMING_CONFIG
+from app.llm.providers import MockProvider
+
+
+class TrackingProvider(MockProvider):
+    """記錄串流是否已關閉的模擬供應商"""
+
+    def __init__(self):
+        super().__init__({**LLM_PROVIDER_CONFIG["mock"], "latency": {"distribution": "fixed", "value": 0},
+                          "tokens_per_second": 200})
+        self.open_streams = 0
+
+    async def stream(self, messages, **kwargs):
+        self.open_streams += 1
+        try:
+            async for delta in super().stream(messages, **kwargs):
+                yield delta
+        finally:
+            self.open_streams -= 1
+
+
+@pytest.fixture
+def provider():
+    previous = llm.get_provider()
+    tracking = TrackingProvider()
+    llm.set_provider(tracking)
+    yield tracking
+    llm.set_provider(previous)
+
+
+def test_cancelled_streaming_turn_releases_scheduler_slot(provider):
+    async def scenario():
+        first_delta = asyncio.Event()
+
+        async def slow_client(delta):
+            # 第一段增量文字之後停在送出 (例如緩慢的 WebSocket)，發言在此被取消
+            first_delta.set()
+            await asyncio.sleep(60)
+
+        turn = asyncio.create_task(main.generate_ai_response("請發言", "Marketing manager",
+                                                             on_delta=slow_client, stage="discussion"))
+        await asyncio.wait_for(first_delta.wait(), 5)
+        assert llm.scheduler.in_flight == 1
+        assert provider.open_streams == 1
+        turn.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await turn
+        # 不依賴垃圾回收：取消後立即歸還名額並關閉供應商串流
+        assert llm.scheduler.in_flight == 0
+        assert provider.open_streams == 0
+
+    asyncio.run(scenario())
+
+
+def test_failing_delta_callback_closes_stream(provider):
+    async def scenario():
+        async def broken_client(delta):
+            raise RuntimeError("client gone")
+
+        text = await main.generate_ai_response("請發言", "Marketing manager", on_delta=broken_client, stage="discussion")
+        assert "client gone" in text
+        assert llm.scheduler.in_flight == 0
+        assert provider.open_streams == 0
+
+    asyncio.run(scenario())
+
+
+def test_streamed_turn_is_committed_exactly_once(provider, monkeypatch):
+    events = []
+
+    async def record(conference_id, message):
+        events.append(message)
+
+    monkeypatch.setitem(STREAMING_CONFIG, "enabled", True)
+    monkeypatch.setitem(STREAMING_CONFIG, "flush_interval", 0)
+    monkeypatch.setattr(main, "broadcast_message", record)
+
+    async def scenario():
+        config = main.ConferenceConfig(topic="預算", participants=[{"id": "cfo", "name": "李經理", "title": "財務長"}])
+        conference_id = main.create_conference(config, pacing=False)
+        text = await main.generate_and_add_message(conference_id, "cfo", "請發言", stage="discussion")
+        return main.active_conferences[conference_id]["messages"], text
+
+    messages, text = asyncio.run(scenario())
+    deltas = [event for event in events if event["type"] == MESSAGE_TYPES["message_delta"]]
+    ends = [event for event in events if event["type"] == MESSAGE_TYPES["message_end"]]
+    # 增量文字逐段推送，完整消息只以 message_end 提交一次，且與增量屬於同一則消息
+    assert len(deltas) > 1 and len(ends) == 1
+    assert not any(event["type"] == MESSAGE_TYPES["new_message"] for event in events)
+    committed = ends[0]["message"]
+    assert "".join(delta["delta"] for delta in deltas) == committed["text"] == text
+    assert {delta["message_id"] for delta in deltas} == {committed["id"]}
+    assert [message["id"] for message in messages] == [committed["id"]]
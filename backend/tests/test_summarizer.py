@@ -0,0 +1,91 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from app import llm
+from app.summarizer import MeetingSummarizer
+
+MESSAGES = [{"speakerName": "甲", "speakerTitle": "經理", "text": "我們先確認預算。"}]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """依提示內容回應的假 LLM；failures 指定哪些 (種類, 輪次) 要失敗幾次"""
+    failures = {}
+
+    async def complete(messages, **kwargs):
+        prompt = messages[-1]["content"]
+        kind = "extract" if "條列擷取" in prompt else "summary" if "壓縮為" in prompt else "meeting"
+        match = re.search(r"第 (\d+) 輪", prompt)
+        round_num = int(match.group(1)) if match else 0
+        remaining = failures.get((kind, round_num), 0)
+        if remaining:
+            failures[(kind, round_num)] = remaining - 1
+            raise RuntimeError("provider error")
+        return f"{kind}-{round_num}"
+
+    monkeypatch.setattr(llm, "is_available", lambda: True)
+    monkeypatch.setattr(llm, "create_chat_completion", complete)
+    return failures
+
+
+def run_rounds(failures, rounds=3):
+    async def scenario():
+        summarizer = MeetingSummarizer("c1", "預算")
+        for round_num in range(1, rounds + 1):
+            summarizer.submit_round(round_num, f"主題{round_num}", MESSAGES)
+        points = await summarizer.collect_points(rounds)
+        return summarizer, points
+
+    return asyncio.run(scenario())
+
+
+def test_failed_extract_is_retried(fake_llm):
+    fake_llm[("extract", 2)] = 1
+    summarizer, points = run_rounds(fake_llm)
+    assert points == {1: "extract-1", 2: "extract-2", 3: "extract-3"}
+    text = summarizer.points_text(None, points)
+    assert [int(n) for n in re.findall(r"【第 (\d+) 輪】", text)] == [1, 2, 3]
+
+
+def test_round_summary_replaces_points_that_keep_failing(fake_llm):
+    fake_llm[("extract", 2)] = 2
+    _, points = run_rounds(fake_llm)
+    assert points == {1: "extract-1", 2: "summary-2", 3: "extract-3"}
+
+
+def test_round_without_points_or_summary_needs_context_window(fake_llm):
+    fake_llm[("extract", 2)] = 2
+    fake_llm[("summary", 2)] = 1
+    _, points = run_rounds(fake_llm)
+    assert points is None
+
+
+def test_rounds_never_submitted_are_missing(fake_llm):
+    async def scenario():
+        summarizer = MeetingSummarizer("c1", "預算")
+        summarizer.submit_round(2, "主題2", MESSAGES)
+        return await summarizer.collect_points(2)
+
+    # 第 1 輪沒有任何資料 (例如會議接手前的回合)，不能只彙整第 2 輪
+    assert asyncio.run(scenario()) is None
+
+
+def test_state_restores_on_another_worker(fake_llm):
+    async def scenario():
+        state = {}
+        summarizer = MeetingSummarizer("c1", "預算", state=state)
+        for round_num in (1, 2):
+            summarizer.submit_round(round_num, f"主題{round_num}", MESSAGES)
+        await summarizer.wait_for_points()
+        await summarizer.wait()
+        # 狀態隨快照以 JSON 送到接手的工作程序
+        restored = MeetingSummarizer("c1", "預算", state=json.loads(json.dumps(state)))
+        return summarizer, restored, await restored.collect_points(2)
+
+    summarizer, restored, points = asyncio.run(scenario())
+    assert restored.summary == summarizer.summary == "meeting-2"
+    assert restored.round_summaries == {1: "summary-1", 2: "summary-2"}
+    assert points == {1: "extract-1", 2: "extract-2"}
@@ -0,0 +1,82 @@
+from app.context import ConferenceContext, assemble_prompt
+from app.config import PROMPT_BUDGET_CONFIG
+from app.llm.tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_messages_tokens,
+    estimate_tokens,
+    truncate_to_tokens
+)
+
+
+def test_estimate_ascii():
+    assert estimate_tokens("") == 0
+    # 英數字串約每 4 字元 1 個 token，空白不計
+    assert estimate_tokens("hello world") == 4
+    assert estimate_tokens("a b c") == 3
+    assert estimate_tokens("a.b") == 3
+
+
+def test_estimate_cjk_counts_full_width_punctuation():
+    assert estimate_tokens("你好") == 3
+    assert estimate_tokens("你好，世界") == 8
+    assert estimate_tokens("飛豬隊友") == 6
+
+
+def test_estimate_mixed():
+    # GPT、4 各 1，兩個中文字 3，「-」與「!」各 1
+    assert estimate_tokens("GPT-4 模型!") == 7
+    assert estimate_messages_tokens([{"role": "user", "content": "你好"}, {"role": "system", "content": None}]) == \
+        3 + 2 * MESSAGE_OVERHEAD_TOKENS
+
+
+def test_truncate_keeps_text_within_budget():
+    text = "一二三四五六七八九十"
+    assert estimate_tokens(text) == 15
+    assert truncate_to_tokens(text, 15) == text
+    truncated = truncate_to_tokens(text, 14)
+    assert truncated == "一二三四五六七八…"
+    assert estimate_tokens(truncated) <= 14
+    # 多保留一個字就會超出預算
+    assert estimate_tokens("一二三四五六七八九…") > 14
+
+
+def test_truncate_without_room_for_suffix():
+    assert truncate_to_tokens("一二三", 1) == ""
+    assert truncate_to_tokens("一二三", 0) == ""
+
+
+def test_context_window_drops_oldest_lines_first():
+    context = ConferenceContext(discussion_window=3, conclusion_window=3)
+    for index, text in enumerate(["第一", "第二", "第三"]):
+        context.append({"speakerName": f"P{index}", "speakerTitle": "T", "text": text})
+    full = context.conclusion()
+    assert full.splitlines() == ["P0 (T): 第一", "P1 (T): 第二", "P2 (T): 第三"]
+    line_tokens = estimate_tokens("P2 (T): 第三")
+    separator_tokens = estimate_tokens("\n")
+    assert context.conclusion(max_tokens=2 * line_tokens + separator_tokens).splitlines() == \
+        ["P1 (T): 第二", "P2 (T): 第三"]
+    assert context.conclusion(max_tokens=2 * line_tokens + separator_tokens - 1) == "P2 (T): 第三"
+    assert context.conclusion(max_tokens=0) == ""
+
+
+def test_assemble_prompt_fits_stage_budget():
+    budget = PROMPT_BUDGET_CONFIG["discussion"]
+
+    def render(notes, context):
+        parts = ["請發言。"]
+        if notes:
+            parts.append(f"補充資料：{notes}")
+        if context:
+            parts.append(f"上下文：{context}")
+        return "\n".join(parts)
+
+    context = ConferenceContext(discussion_window=1000, conclusion_window=1000)
+    for index in range(1000):
+        context.append({"speakerName": "甲", "speakerTitle": "經理", "text": f"第{index}則發言內容"})
+    prompt = assemble_prompt("discussion", render, notes="資料" * budget, context=context.discussion)
+    assert estimate_tokens(prompt) <= budget
+    # 補充資料最多佔預算的 notes_share，其餘留給最新的上下文
+    notes_part = prompt.split("補充資料：", 1)[1].split("\n上下文：", 1)[0]
+    assert estimate_tokens(notes_part) <= int(budget * PROMPT_BUDGET_CONFIG["notes_share"])
+    assert "第999則發言內容" in prompt
+    assert "第0則發言內容" not in prompt
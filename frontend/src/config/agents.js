@@ -16,7 +16,11 @@ export const MODERATOR_CONFIG = {
 // WebSocket 消息類型
 export const MESSAGE_TYPES = {
   NEW_MESSAGE: "new_message",
+  MESSAGE_DELTA: "message_delta",
+  MESSAGE_END: "message_end",
   INIT: "init",
+  RESYNC: "resync",
+  SNAPSHOT_CHUNK: "snapshot_chunk",
   STAGE_CHANGE: "stage_change",
   ROUND_UPDATE: "round_update",
   ROUND_COMPLETED: "round_completed",
@@ -6,6 +6,13 @@ import { toast } from 'react-toastify';
 
 const ConferenceContext = createContext();
 
+// 連線意外中斷時的重新連線間隔 (毫秒，逐次加倍) 與次數上限
+const RECONNECT_BASE_DELAY = 1000;
+const RECONNECT_MAX_DELAY = 10000;
+const RECONNECT_MAX_ATTEMPTS = 10;
+// 伺服器正常結束會議時使用的關閉碼，不需重新連線
+const NORMAL_CLOSE_CODE = 1000;
+
 export const useConference = () => useContext(ConferenceContext);
 
 export const ConferenceProvider = ({ children }) => {
@@ -20,10 +27,21 @@ export const ConferenceProvider = ({ children }) => {
   const ws = useRef(null);
   const navigate = useNavigate();
   const lastMessageRef = useRef(null);
+  // 最後收到的事件序號，重新連線時以 ?since=<seq> 只補送錯過的事件
+  const lastSeqRef = useRef(null);
+  const reconnectTimer = useRef(null);
+  const reconnectAttempts = useRef(0);
+
+  const resetConnectionState = () => {
+    clearTimeout(reconnectTimer.current);
+    reconnectTimer.current = null;
+    reconnectAttempts.current = 0;
+    lastSeqRef.current = null;
+  };
 
-  const connectSocket = useCallback((confId) => {
+  const connectSocket = useCallback((confId, since = null) => {
     if (!confId) return;
-    console.log(`嘗試連接 WebSocket: ${confId}`);
+    console.log(`嘗試連接 WebSocket: ${confId}${since !== null ? `，補送序號 ${since} 之後的事件` : ''}`);
 
     if (ws.current) {
       ws.current.close();
@@ -31,7 +49,7 @@ export const ConferenceProvider = ({ children }) => {
     }
 
     const wsBaseUrl = process.env.REACT_APP_WS_URL || 'ws://localhost:8000'; 
-    const wsUrl = `${wsBaseUrl}/ws/conference/${confId}`;
+    const wsUrl = `${wsBaseUrl}/ws/conference/${confId}${since !== null ? `?since=${since}` : ''}`;
     
     try {
       const newSocket = new WebSocket(wsUrl);
@@ -39,6 +57,7 @@ export const ConferenceProvider = ({ children }) => {
 
       newSocket.onopen = () => {
         console.log(`WebSocket 連接已建立: ${confId}`);
+        reconnectAttempts.current = 0;
         setError(null);
       };
 
@@ -54,18 +73,75 @@ export const ConferenceProvider = ({ children }) => {
             return;
           }
 
+          // 事件序號：init 的序號即快照的位置；resync 之後補送的事件才推進序號，重複收到的事件略過
+          if (typeof data.seq === 'number') {
+            if (data.type === MESSAGE_TYPES.INIT) {
+              lastSeqRef.current = data.seq;
+            } else if (data.type !== MESSAGE_TYPES.RESYNC && data.type !== MESSAGE_TYPES.SNAPSHOT_CHUNK) {
+              if (lastSeqRef.current !== null && data.seq <= lastSeqRef.current) {
+                return;
+              }
+              lastSeqRef.current = data.seq;
+            }
+          }
+
           switch (data.type) {
             case MESSAGE_TYPES.INIT:
+              // 快照重新連線時 messages 為空，會議記錄隨後以 snapshot_chunk 分段送達
               setMessages(data.messages || []);
               setStage(data.stage || 'waiting');
               setCurrentRound(data.current_round || 0);
               setIsLoading(false);
               break;
+            case MESSAGE_TYPES.RESYNC:
+              // 保留已有的消息，接著補送錯過的事件
+              setStage(data.stage || 'waiting');
+              setCurrentRound(data.current_round || 0);
+              setIsLoading(false);
+              break;
+            case MESSAGE_TYPES.SNAPSHOT_CHUNK:
+              setMessages(prev => [...prev.slice(0, data.offset), ...(data.messages || [])]);
+              break;
             case MESSAGE_TYPES.NEW_MESSAGE:
               setMessages(prev => [...prev, data.message]);
               setCurrentSpeaker(data.current_speaker);
               setTimeout(() => lastMessageRef.current?.scrollIntoView({ behavior: "smooth" }), 100);
               break;
+            case MESSAGE_TYPES.MESSAGE_DELTA:
+              // 串流中的發言：第一段建立暫存消息，之後逐段附加文字
+              setMessages(prev => {
+                const index = prev.findIndex(msg => msg.id === data.message_id);
+                if (index === -1) {
+                  return [...prev, {
+                    id: data.message_id,
+                    speakerId: data.speakerId,
+                    speakerName: data.speakerName,
+                    speakerTitle: data.speakerTitle,
+                    text: data.delta,
+                    timestamp: new Date().toISOString(),
+                    streaming: true
+                  }];
+                }
+                const updated = [...prev];
+                updated[index] = { ...updated[index], text: updated[index].text + data.delta };
+                return updated;
+              });
+              setCurrentSpeaker(data.speakerId);
+              break;
+            case MESSAGE_TYPES.MESSAGE_END:
+              // 串流結束：以完整消息取代暫存內容
+              setMessages(prev => {
+                const index = prev.findIndex(msg => msg.id === data.message.id);
+                if (index === -1) {
+                  return [...prev, data.message];
+                }
+                const updated = [...prev];
+                updated[index] = data.message;
+                return updated;
+              });
+              setCurrentSpeaker(data.current_speaker);
+              setTimeout(() => lastMessageRef.current?.scrollIntoView({ behavior: "smooth" }), 100);
+              break;
             case MESSAGE_TYPES.STAGE_CHANGE:
               setStage(data.stage);
               setIsLoading(false);
@@ -93,16 +169,28 @@ export const ConferenceProvider = ({ children }) => {
       newSocket.onclose = (event) => {
         console.log(`WebSocket 連接已關閉，代碼: ${event.code}, 原因: ${event.reason}`);
         setIsLoading(false); 
-        setStage(prevStage => prevStage !== 'ended' ? 'ended' : 'ended'); 
-        
-        if (!event.wasClean && currentConferenceId) {
+
+        // 已被新的連線取代或元件已卸載：不處理
+        if (ws.current !== newSocket) {
+          return;
+        }
+        ws.current = null;
+
+        // 非正常結束 (網路中斷、會議移到其他工作程序、伺服器重啟等)：以最後的序號重新連線補送
+        if (event.code !== NORMAL_CLOSE_CODE && reconnectAttempts.current < RECONNECT_MAX_ATTEMPTS) {
+          const delay = Math.min(RECONNECT_BASE_DELAY * 2 ** reconnectAttempts.current, RECONNECT_MAX_DELAY);
+          reconnectAttempts.current += 1;
+          console.warn(`WebSocket 連接意外斷開，${delay} 毫秒後重新連線 (第 ${reconnectAttempts.current} 次)`);
+          setError("WebSocket 連接意外斷開，正在重新連線...");
+          reconnectTimer.current = setTimeout(() => connectSocket(confId, lastSeqRef.current), delay);
+          return;
+        }
+
+        setStage('ended');
+        if (!event.wasClean) {
           setError("WebSocket 連接意外斷開。"); 
           console.warn("WebSocket 連接意外斷開");
         }
-        
-        if (ws.current === newSocket) { 
-          ws.current = null;
-        }
       };
     } catch (err) {
       console.error('創建 WebSocket 連接失敗:', err);
@@ -118,6 +206,7 @@ export const ConferenceProvider = ({ children }) => {
     setError(null);
     setMessages([]);
     setCurrentConferenceId(confId);
+    resetConnectionState();
     try {
       const data = await getConference(confId);
       setConferenceData(data);
@@ -138,6 +227,7 @@ export const ConferenceProvider = ({ children }) => {
     setIsLoading(true);
     setError(null);
     setMessages([]);
+    resetConnectionState();
     try {
       const result = await apiStartConference(config);
       console.log("後端返回的啟動結果:", result);
@@ -271,6 +361,7 @@ export const ConferenceProvider = ({ children }) => {
 
   useEffect(() => {
     return () => {
+      clearTimeout(reconnectTimer.current);
       if (ws.current) {
         console.log("ConferenceProvider 卸載，關閉 WebSocket");
         ws.current.close();